@@ -0,0 +1,78 @@
+"""
+Benchmark stored size and save/load time per compression algorithm.
+
+Run from the repository root:
+    python -m benchmarks.bench_compression [--sizes 100 1000 10000 100000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from cryptography.fernet import Fernet
+
+from core import compression
+from core.utils import encrypt_data, decrypt_data
+
+ITEMS = ["Coffee", "Groceries", "Rent", "Bus ticket", "Lunch", "Books", "Gym", "Phone bill"]
+
+
+def make_budgets(n):
+    rng = random.Random(n)
+    start = date(2020, 1, 1)
+    return [{"id": i + 1, "item": rng.choice(ITEMS), "amount": round(rng.uniform(1, 200), 2),
+             "date": (start + timedelta(days=i // 5)).isoformat()} for i in range(n)]
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench(sizes, repeat=3):
+    key = Fernet.generate_key()
+    algorithms = ["none"] + [a for a in compression.available_algorithms() if a != "none"] + ["auto"]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "budgets.enc")
+        for n in sizes:
+            records = make_budgets(n)
+            for algo in algorithms:
+                def save():
+                    with open(path, "wb") as f:
+                        f.write(encrypt_data(records, key, compression=algo))
+
+                def load():
+                    with open(path, "rb") as f:
+                        decrypt_data(f.read(), key)
+
+                save_t = _best_of(save, repeat)
+                size = os.path.getsize(path)
+                load_t = _best_of(load, repeat)
+                rows.append((n, algo, size, save_t, load_t))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    print(f"{'records':>8} | {'algorithm':<9} | {'file size':>11} | {'ratio':>6} | {'save ms':>8} | {'load ms':>8}")
+    print("-" * 66)
+    baseline = {}
+    for n, algo, size, save_t, load_t in bench(args.sizes, args.repeat):
+        baseline.setdefault(n, size)
+        print(f"{n:>8} | {algo:<9} | {size:>11,} | {size / baseline[n]:>6.2f} | "
+              f"{save_t * 1000:>8.2f} | {load_t * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
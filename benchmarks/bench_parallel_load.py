@@ -0,0 +1,52 @@
+"""
+Benchmark single-process vs process-pool loading of segmented stores.
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel_load [--sizes 10000 100000 300000]
+
+Speedups depend on the number of cores; with one CPU the pool only adds
+overhead, which is why it is disabled automatically there.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from cryptography.fernet import Fernet
+
+from core import storage
+from benchmarks.bench_compression import make_budgets
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 300000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    key = Fernet.generate_key()
+    print(f"CPUs: {os.cpu_count()}, segment size: {storage.SEGMENT_RECORDS} records")
+    print(f"{'records':>8} | {'segments':>8} | {'serial ms':>9} | {'pool ms':>8} | {'speedup':>7}")
+    print("-" * 53)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "budgets.enc")
+        for n in args.sizes:
+            storage.write_records(path, make_budgets(n), key, "budgets", parallel=False)
+            storage.read_records(path, key, parallel=True)  # warm the pool
+            serial = _best_of(lambda: storage.read_records(path, key, parallel=False), args.repeat)
+            pooled = _best_of(lambda: storage.read_records(path, key, parallel=True), args.repeat)
+            segments = -(-n // storage.SEGMENT_RECORDS)
+            print(f"{n:>8} | {segments:>8} | {serial * 1000:>9.1f} | {pooled * 1000:>8.1f} | {serial / pooled:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""
+Headless local API server for TriFlow clients (e.g. the mobile app).
+
+Serves tasks and expenses from the PySide6 data layer
+(``triflow_pyside6_pyside6_app.data.local_store``) as a small JSON API over
+HTTP/1.1, using only asyncio:
+
+    GET    /tasks                 full task list
+    GET    /expenses              full expense list
+    GET    /changes?since=<cursor>   delta feed of changes after <cursor>
+    GET    /summary               counters from the stores' summary blocks
+    POST   /tasks                 {"description": ..., "due_at": ..., "recurrence": ..., "tags": [...]}
+    PATCH  /tasks/<id>            {"description": ..., "completed": ..., "due_at": ..., "recurrence": ..., "tags": [...]}
+    DELETE /tasks/<id>
+    POST   /expenses              {"item": ..., "amount": ..., "tags": [...]}  (auto-categorized without tags)
+    DELETE /expenses/<id>
+
+Cheap polling is the point of the design:
+
+- connections are kept alive, so a poll does not pay a TCP handshake;
+- every collection carries an ETag derived from its change sequence, and a
+  matching ``If-None-Match`` is answered with an empty 304;
+- ``/changes`` returns only the records changed since the client's last
+  cursor (304 when there is nothing new).  A cursor is
+  ``<generation>.<seq>``: sequence numbers restart with the server, so a
+  cursor from an earlier run (or a bare number other than 0) is answered
+  with a full ``"reset"`` snapshot rather than an empty delta;
+- responses are gzip-compressed when the client accepts it, and the encoded
+  bodies are cached per version so unchanged data is never re-serialised.
+
+Changes made by other processes (the desktop apps) are picked up by
+comparing the data files' mtimes on each request and diffing by record id.
+Decrypting and writing the stores happens in the default executor so one
+client's reload or save does not stall the others; a change only reaches
+the in-memory records and the change log once it has been saved.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import math
+import os
+import uuid
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+from triflow_pyside6_pyside6_app.data import local_store
+
+from . import archive, categorize, reminders, tags
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+# Number of change entries retained for the delta feed.  Clients that fall
+# further behind get a full snapshot instead.
+CHANGE_LOG_LIMIT = 10000
+# Bodies smaller than this are not worth compressing.
+GZIP_MIN_SIZE = 512
+IDLE_TIMEOUT = 30.0
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+MAX_BODY = 1024 * 1024
+
+
+class HttpError(Exception):
+    def __init__(self, status, message=""):
+        super().__init__(message or REASONS.get(status, ""))
+        self.status = status
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class Collection:
+    """In-memory view of one stored collection plus its change history."""
+
+    def __init__(self, name, path, load, save, read_summary):
+        self.name = name
+        self.path = path
+        self._load = load
+        self._save = save
+        self._read_summary = read_summary
+        self.records = []
+        self.version = 0
+        self.stamp = None
+        self._cache = {}
+
+    def read(self):
+        """Load the records from disk; returns (records, stamp).  Blocking."""
+        stamp = _file_stamp(self.path)
+        return self._load(), stamp
+
+    def reload(self):
+        self.records, self.stamp = self.read()
+        self._cache.clear()
+
+    def save(self, records):
+        """Write *records*; returns the file's new stamp.  Blocking."""
+        self._save(records)
+        return _file_stamp(self.path)
+
+    def by_id(self, rid):
+        for r in self.records:
+            if r["id"] == rid:
+                return r
+        return None
+
+    def next_id(self):
+        # Archived records are not in self.records; the summary counts them.
+        return archive.next_id(self._read_summary(), self.records)
+
+    def encoded(self, body_fn, gzip_ok):
+        """Return the JSON body (gzipped if requested) for the current version."""
+        key = (self.version, gzip_ok)
+        if key not in self._cache:
+            if (self.version, False) not in self._cache:
+                self._cache = {(self.version, False): json.dumps(body_fn()).encode("utf-8")}
+            raw = self._cache[(self.version, False)]
+            self._cache[key] = gzip.compress(raw, 5) if gzip_ok else raw
+        return self._cache[key]
+
+
+class ApiState:
+    """Shared server state: collections, sequence counter and change log."""
+
+    def __init__(self):
+        # A restart invalidates every ETag the clients hold.
+        self.generation = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.changes = []
+        self.lock = asyncio.Lock()
+        self.collections = {
+            "tasks": Collection("tasks", local_store.tasks_file(), local_store.load_tasks,
+                                local_store.save_tasks, local_store.read_task_summary),
+            "expenses": Collection("expenses", local_store.budgets_file(), local_store.load_budgets,
+                                   local_store.save_budgets, local_store.read_budget_summary),
+        }
+        for coll in self.collections.values():
+            coll.reload()
+
+    def cursor(self):
+        return f"{self.generation}.{self.seq}"
+
+    def parse_cursor(self, text):
+        """Sequence number a /changes cursor points at; None if it is from another run."""
+        generation, _, seq = text.rpartition(".")
+        seq = int(seq)
+        if seq and generation != self.generation:
+            return None
+        return seq
+
+    @property
+    def oldest_seq(self):
+        return self.changes[0]["seq"] if self.changes else self.seq + 1
+
+    def etag(self, coll):
+        return f'W/"{self.generation}-{coll.version}"'
+
+    def record_change(self, coll, op, rid, record=None):
+        self.seq += 1
+        coll.version = self.seq
+        self.changes.append({"seq": self.seq, "collection": coll.name, "op": op,
+                             "id": rid, "record": record})
+        if len(self.changes) > CHANGE_LOG_LIMIT:
+            del self.changes[:len(self.changes) - CHANGE_LOG_LIMIT]
+
+    async def sync_from_disk(self):
+        """Fold changes written by other processes into the change log."""
+        if all(_file_stamp(c.path) == c.stamp for c in self.collections.values()):
+            return
+        loop = asyncio.get_running_loop()
+        # Under the lock, so a save of ours in flight is not mistaken for an
+        # outside change.
+        async with self.lock:
+            for coll in self.collections.values():
+                if _file_stamp(coll.path) == coll.stamp:
+                    continue
+                records, coll.stamp = await loop.run_in_executor(None, coll.read)
+                self._fold(coll, records)
+
+    def _fold(self, coll, records):
+        old = {r["id"]: r for r in coll.records}
+        coll.records = records
+        new = {r["id"]: r for r in records}
+        for rid, rec in new.items():
+            if old.get(rid) != rec:
+                self.record_change(coll, "upsert", rid, rec)
+        for rid in old.keys() - new.keys():
+            self.record_change(coll, "delete", rid)
+
+    def changes_since(self, since):
+        if since is None or since > self.seq or since < self.oldest_seq - 1:
+            # Client is too far behind, or its cursor is from an earlier run:
+            # send a snapshot it can replace its copy with.
+            return {"seq": self.seq, "cursor": self.cursor(), "reset": True,
+                    "tasks": self.collections["tasks"].records,
+                    "expenses": self.collections["expenses"].records}
+        start = len(self.changes) - (self.seq - since)
+        return {"seq": self.seq, "cursor": self.cursor(), "reset": False,
+                "changes": self.changes[max(start, 0):]}
+
+
+def _parse_json(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise HttpError(400, "Body must be valid JSON.")
+    if not isinstance(data, dict):
+        raise HttpError(400, "Body must be a JSON object.")
+    return data
+
+
+def _parse_id(text):
+    try:
+        return int(text)
+    except ValueError:
+        raise HttpError(404)
+
+
+def _run_blocking(fn, *args):
+    return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def _persist(coll, records):
+    """Save *records* as *coll*'s new contents; memory is only updated on success."""
+    coll.stamp = await _run_blocking(coll.save, records)
+    coll.records = records
+
+
+async def dispatch(state, method, target, headers, body):
+    """Route one request.  Returns (status, extra_headers, payload_fn, coll).
+
+    *payload_fn* builds the JSON-serialisable body lazily so cached encodings
+    can be reused; *coll* (when given) is used for the ETag and body cache.
+    """
+    url = urlsplit(target)
+    parts = [p for p in url.path.split("/") if p]
+    await state.sync_from_disk()
+
+    if parts == ["health"]:
+        return 200, {}, (lambda: {"status": "ok", "seq": state.seq}), None
+
+    if parts == ["summary"]:
+        summary = {"tasks": await _run_blocking(local_store.read_task_summary),
+                   "expenses": await _run_blocking(local_store.read_budget_summary)}
+        return 200, {}, (lambda: summary), None
+
+    if parts == ["changes"]:
+        if method != "GET":
+            raise HttpError(405)
+        try:
+            since = state.parse_cursor(parse_qs(url.query).get("since", ["0"])[0])
+        except ValueError:
+            raise HttpError(400, "since must be a cursor from an earlier /changes response.")
+        etag = f'W/"{state.generation}-seq{state.seq}"'
+        if since == state.seq or headers.get("if-none-match") == etag:
+            return 304, {"ETag": etag}, None, None
+        result = state.changes_since(since)
+        return 200, {"ETag": etag}, (lambda: result), None
+
+    if not parts or parts[0] not in state.collections or len(parts) > 2:
+        raise HttpError(404)
+    coll = state.collections[parts[0]]
+
+    if len(parts) == 1:
+        if method == "GET":
+            etag = state.etag(coll)
+            if headers.get("if-none-match") == etag:
+                return 304, {"ETag": etag}, None, None
+            return 200, {"ETag": etag}, (lambda: coll.records), coll
+        if method == "POST":
+            data = _parse_json(body)
+            record = _new_record(coll, data)
+            async with state.lock:
+                record = {"id": await _run_blocking(coll.next_id), **record}
+                await _persist(coll, coll.records + [record])
+                state.record_change(coll, "upsert", record["id"], record)
+            return 201, {"ETag": state.etag(coll)}, (lambda: record), None
+        raise HttpError(405)
+
+    rid = _parse_id(parts[1])
+    if method == "GET":
+        record = coll.by_id(rid)
+        if record is None:
+            raise HttpError(404)
+        return 200, {}, (lambda: record), None
+    if method == "PATCH" and coll.name == "tasks":
+        data = _parse_json(body)
+        async with state.lock:
+            old = coll.by_id(rid)
+            if old is None:
+                raise HttpError(404)
+            record = dict(old)
+            if "description" in data:
+                desc = str(data["description"]).strip()
+                if not desc:
+                    raise HttpError(400, "Task description cannot be empty.")
+                record["description"] = desc
+            if "completed" in data:
+                record["completed"] = bool(data["completed"])
+            _apply_due(record, data)
+            _apply_tags(record, data)
+            await _persist(coll, [record if r is old else r for r in coll.records])
+            state.record_change(coll, "upsert", rid, record)
+        return 200, {"ETag": state.etag(coll)}, (lambda: record), None
+    if method == "DELETE":
+        async with state.lock:
+            record = coll.by_id(rid)
+            if record is None:
+                raise HttpError(404)
+            await _persist(coll, [r for r in coll.records if r is not record])
+            state.record_change(coll, "delete", rid)
+        return 204, {"ETag": state.etag(coll)}, None, None
+    raise HttpError(405)
+
+
+def _apply_due(record, data):
+    """Set or clear a task's due_at/recurrence from a request body (null clears)."""
+    try:
+        for field, parse in (("due_at", reminders.parse_due), ("recurrence", reminders.parse_recurrence)):
+            if field not in data:
+                continue
+            value = parse(str(data[field] or ""))
+            if value:
+                record[field] = value
+            else:
+                record.pop(field, None)
+    except ValueError as e:
+        raise HttpError(400, f"Invalid {field}: {e}")
+
+
+def _apply_tags(record, data):
+    """Replace a record's tags from a list (or comma-separated string) in the body."""
+    if "tags" not in data:
+        return
+    value = data["tags"] or []
+    new_tags = tags.parse_tags(",".join(map(str, value)) if isinstance(value, list) else value)
+    if new_tags:
+        record["tags"] = new_tags
+    else:
+        record.pop("tags", None)
+
+
+def _new_record(coll, data):
+    """Validate a POST body into a new record; the caller assigns its id."""
+    if coll.name == "tasks":
+        desc = str(data.get("description", "")).strip()
+        if not desc:
+            raise HttpError(400, "Task description cannot be empty.")
+        record = {
+            "description": desc,
+            "completed": False,
+            "created_at": datetime.now().isoformat(),
+        }
+        _apply_due(record, data)
+        _apply_tags(record, data)
+        return record
+    item = str(data.get("item", "")).strip()
+    if not item:
+        raise HttpError(400, "Expense name cannot be empty.")
+    try:
+        amount = float(data.get("amount"))
+    except (TypeError, ValueError):
+        raise HttpError(400, "Amount must be a valid number.")
+    if not math.isfinite(amount):
+        raise HttpError(400, "Amount must be a valid number.")
+    record = {
+        "item": item,
+        "amount": amount,
+        "date": datetime.now().date().isoformat(),
+    }
+    _apply_tags(record, data)
+    if "tags" not in data:
+        categorize.default_categorizer().categorize(record)
+    return record
+
+
+async def _read_request(reader):
+    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Malformed request line.")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = b""
+    if method in ("POST", "PATCH", "PUT"):
+        if "content-length" not in headers:
+            raise HttpError(411)
+        length = int(headers["content-length"]) if headers["content-length"].isdigit() else -1
+        if length < 0:
+            raise HttpError(400, "Malformed Content-Length.")
+        if length > MAX_BODY:
+            raise HttpError(413)
+        body = await reader.readexactly(length)
+    return method.upper(), target, version.upper(), headers, body
+
+
+def _write_response(writer, status, headers, body, keep_alive):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    headers = dict(headers)
+    if body is not None:
+        headers.setdefault("Content-Type", "application/json")
+    headers["Content-Length"] = str(len(body or b""))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    lines.extend(f"{k}: {v}" for k, v in headers.items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+
+
+async def handle_connection(state, reader, writer):
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                break
+            except HttpError as exc:
+                body = json.dumps({"error": str(exc)}).encode("utf-8")
+                _write_response(writer, exc.status, {}, body, False)
+                break
+            if request is None:
+                break
+            method, target, version, headers, body = request
+            conn = headers.get("connection", "").lower()
+            keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+            gzip_ok = "gzip" in headers.get("accept-encoding", "")
+            try:
+                status, extra, payload_fn, coll = await dispatch(state, method, target, headers, body)
+            except HttpError as exc:
+                status, extra, coll = exc.status, {}, None
+                payload_fn = (lambda msg=str(exc): {"error": msg})
+            except Exception as exc:  # keep the server alive on handler bugs
+                status, extra, coll = 500, {}, None
+                payload_fn = (lambda msg=str(exc): {"error": msg})
+            out = None
+            if payload_fn is not None:
+                if coll is not None:
+                    out = coll.encoded(payload_fn, gzip_ok)
+                    if gzip_ok:
+                        extra["Content-Encoding"] = "gzip"
+                else:
+                    out = json.dumps(payload_fn()).encode("utf-8")
+                    if gzip_ok and len(out) >= GZIP_MIN_SIZE:
+                        out = gzip.compress(out, 5)
+                        extra["Content-Encoding"] = "gzip"
+                extra["Vary"] = "Accept-Encoding"
+            _write_response(writer, status, extra, out, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    state = ApiState()
+    server = await asyncio.start_server(lambda r, w: handle_connection(state, r, w), host, port)
+    print(f"TriFlow API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TriFlow headless API server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Hot/cold tiering for task and budget stores.
+
+Completed tasks and expenses older than the archive horizon
+(``[archive] horizon_days`` in config.ini) are moved out of the main
+("hot") data file into one encrypted segment per month:
+
+    data/tasks.json.enc                  hot records, read at startup
+    data/archive/tasks/2025-01.enc       archived records for January 2025
+
+Segments use the same container format as the hot file (see storage), so
+their record counts and totals can be listed without decrypting them.
+Loading the hot file therefore costs the same however long the history
+grows, and archived months are only decrypted when the user pages back or
+searches.
+
+New ids must not collide with archived ones, so they are allocated past
+the highest id of the combined summary (next_id()), not past the last hot
+record, which may be gone once the newest record is deleted.
+"""
+
+import os
+from datetime import date, timedelta
+
+from . import storage, timeline
+from .config import get_int
+
+DEFAULT_HORIZON_DAYS = 90
+
+
+def horizon_days():
+    return get_int("archive", "horizon_days", DEFAULT_HORIZON_DAYS)
+
+
+def record_date(record, kind):
+    """Return the ISO date (YYYY-MM-DD) a record is filed under."""
+    if kind == "tasks":
+        return record.get("created_at", "")[:10]
+    return record.get("date", "")[:10]
+
+
+def is_archivable(record, kind, cutoff):
+    if kind == "tasks" and not record.get("completed"):
+        return False
+    day = record_date(record, kind)
+    return bool(day) and day < cutoff
+
+
+def archive_dir(path):
+    """Directory holding the monthly segments for the store at *path*."""
+    path = str(path)
+    name = os.path.basename(path).split(".")[0]
+    return os.path.join(os.path.dirname(path), "archive", name)
+
+
+def segment_path(path, month):
+    return os.path.join(archive_dir(path), f"{month}.enc")
+
+
+def list_months(path):
+    """Archived months (YYYY-MM) for the store at *path*, newest first."""
+    folder = archive_dir(path)
+    if not os.path.isdir(folder):
+        return []
+    months = [name[:-4] for name in os.listdir(folder) if name.endswith(".enc")]
+    return sorted(months, reverse=True)
+
+
+def load_month(path, key, month):
+    """Decrypt the archived records for *month* ([] if none)."""
+    return storage.read_records(segment_path(path, month), key)
+
+
+def month_summary(path, key, month, kind):
+    """Counters for one archived month, read from its summary block."""
+    return storage.read_summary(segment_path(path, month), key, kind)
+
+
+def combined_summary(path, key, kind):
+    """Summary of the hot file merged with every archived month's summary.
+
+    Only summary blocks are decrypted, one per month.
+    """
+    total = storage.read_summary(path, key, kind)
+    for month in list_months(path):
+        part = month_summary(path, key, month, kind)
+        total["count"] += part["count"]
+        total["max_id"] = max(total["max_id"], part["max_id"])
+        for field, pick in (("min_date", min), ("max_date", max)):
+            values = [v for v in (total[field], part[field]) if v]
+            total[field] = pick(values) if values else None
+        if kind == "tasks":
+            total["completed"] += part["completed"]
+        else:
+            total["total_spent"] = round(total["total_spent"] + part["total_spent"], 2)
+    return total
+
+
+def next_id(summary, records=()):
+    """Id for a new record: above every id in *summary* and in *records*.
+
+    *summary* comes from combined_summary(), so archived ids count; *records*
+    covers changes not saved yet.
+    """
+    return max(summary["max_id"], max((r["id"] for r in records), default=0)) + 1
+
+
+def iter_history(path, key, months=None):
+    """Yield archived records month by month, newest month first.
+
+    Segments are decrypted lazily, so a search that stops early never
+    touches older months.
+    """
+    for month in months if months is not None else list_months(path):
+        for record in load_month(path, key, month):
+            yield record
+
+
+def search_history(path, key, text, field):
+    """Archived records whose *field* contains *text* (case-insensitive)."""
+    needle = text.lower()
+    return [r for r in iter_history(path, key) if needle in str(r.get(field, "")).lower()]
+
+
+def needs_archiving(path, key, kind, today=None):
+    """Cheap check using the summary block: could anything be archived?"""
+    if not os.path.exists(path):
+        return False
+    summary = storage.read_summary(path, key, kind)
+    # Pending tasks never move, so for tasks only completed ones count.
+    oldest = summary.get("min_completed_date") if kind == "tasks" else summary["min_date"]
+    return summary["count"] > 1 and bool(oldest) and oldest < _cutoff(today)
+
+
+def _cutoff(today=None):
+    today = today or date.today()
+    return (today - timedelta(days=horizon_days())).isoformat()
+
+
+def archive_records(path, key, kind, today=None):
+    """Move archivable records from the hot file at *path* into month segments.
+
+    Segments are written before the hot file, so an interruption can only
+    leave a record in both tiers (callers showing history skip ids that
+    are still hot), never in neither.  Returns the number of records archived.
+    """
+    if not needs_archiving(path, key, kind, today):
+        return 0
+    cutoff = _cutoff(today)
+    records = storage.read_records(path, key)
+    newest_id = max(r["id"] for r in records)
+    hot, by_month = [], {}
+    for r in records:
+        if r["id"] != newest_id and is_archivable(r, kind, cutoff):
+            by_month.setdefault(record_date(r, kind)[:7], []).append(r)
+        else:
+            hot.append(r)
+    if not by_month:
+        return 0
+    for month, moved in by_month.items():
+        seg = segment_path(path, month)
+        existing = {r["id"]: r for r in storage.read_records(seg, key)}
+        existing.update((r["id"], r) for r in moved)
+        storage.write_records(seg, sorted(existing.values(), key=lambda r: r["id"]), key, kind)
+    storage.write_records(path, hot, key, kind, timeline=timeline.ARCHIVE)
+    return len(records) - len(hot)
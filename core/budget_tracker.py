@@ -1,47 +1,178 @@
-import os
 from datetime import datetime
 import json
-from .utils import load_key, encrypt_data, decrypt_data
+from . import daemon, tags, categorize, limits
+
+# storage, archive, profiles and undo pull in cryptography and the rest of
+# the storage stack, so they are imported where used: a CLI served by the
+# warm daemon (see core.daemon) never needs them.
 
 DATA_FILE = 'data/budgets.json.enc'
 
+def data_file():
+    """The budgets file, inside the active profile's directory if there is one."""
+    from . import profiles
+    return profiles.data_path(DATA_FILE)
+
 def load_budgets(key):
-    if not os.path.exists(DATA_FILE):
-        return []
-    with open(DATA_FILE, 'rb') as f:
-        enc_data = f.read()
-    return decrypt_data(enc_data, key)
+    from . import storage
+    return storage.read_records(data_file(), key)
 
 def save_budgets(budgets, key):
-    with open(DATA_FILE, 'wb') as f:
-        f.write(encrypt_data(budgets, key))
+    from . import storage
+    storage.write_records(data_file(), budgets, key, 'budgets', timeline='save')
+
+def read_summary(key):
+    """Counters for all budgets, archived ones included, without loading records."""
+    from . import archive
+    return archive.combined_summary(data_file(), key, 'budgets')
+
+def next_id(key, budgets=()):
+    """Id for a new expense; archived ids and unsaved *budgets* count (see archive.next_id)."""
+    from . import archive
+    return archive.next_id(read_summary(key), budgets)
+
+def archive_old_budgets(key):
+    """Move old expenses into monthly archive segments (see core.archive)."""
+    from . import archive
+    return archive.archive_records(data_file(), key, 'budgets')
+
+def load_history(key):
+    """Undo/redo log for the budgets file (see core.undo)."""
+    from . import undo
+    return undo.UndoLog(undo.journal_path(data_file()), key)
+
+def load_limit_tracker(key):
+    """Running totals for the [limits] in config.ini, read from summary blocks only."""
+    return limits.load_tracker(data_file(), key)
+
+def archived_months():
+    from . import archive
+    return archive.list_months(data_file())
+
+def load_archived_budgets(key, month):
+    from . import archive
+    return archive.load_month(data_file(), key, month)
+
+def load_budgets_as_of(key, when):
+    """The expenses as they were at *when* (see core.timeline)."""
+    from . import timeline
+    return timeline.as_of(data_file(), key, when)
+
+def diff_budgets(key, start, end):
+    from . import timeline
+    return timeline.diff(data_file(), key, start, end)
+
+def open_store():
+    """The budgets collection for the CLI.
+
+    Served from memory by the warm daemon when one is running for this
+    directory and profile; otherwise read from the file, after unlocking
+    $TRIFLOW_PROFILE and archiving old expenses.
+    """
+    store = daemon.connect('budgets')
+    if store is None:
+        from . import profiles
+        from .utils import load_keyring
+        profiles.unlock_from_env()
+        store = daemon.LocalCollection(data_file(), 'budgets', load_keyring())
+        store.archive_old()
+    return store
 
 def export_budgets(budgets):
     with open("budgets_export.json", "w") as f:
         json.dump(budgets, f, indent=4)
     print("Exported to budgets_export.json")
 
+def print_budgets(budgets):
+    print(f"{'ID':>3} | {'Item':<15} | {'Amount':<8} | {'Date':<10} | {'Tags'}")
+    print("-"*60)
+    for b in budgets:
+        print(f"{b['id']:>3} | {b['item']:<15} | ${b['amount']:<7.2f} | {b['date']:<10} | {tags.format_tags(b)}")
+
+def category_totals(budgets, query=""):
+    """Spend per category (tag) over the budgets matching a tag query."""
+    index = tags.TagIndex(budgets)
+    return index.totals([b["amount"] for b in budgets], index.query(query))
+
+def print_category_totals(totals):
+    for tag, total in totals.items():
+        print(f"  {tag:<20} ${total:.2f}")
+
+def filter_by_tags(budgets):
+    index = tags.TagIndex(budgets)
+    for tag, count in index.tags():
+        print(f"{tag}: {count}")
+    query = input("Tag query (e.g. food AND weekday NOT reimbursed): ")
+    try:
+        mask = index.query(query)
+    except ValueError as e:
+        print(e)
+        return
+    found = [budgets[i] for i in tags.iter_bits(mask)]
+    if not found:
+        print("No matching expenses.")
+        return
+    print_budgets(found)
+    print(f"\nTotal: ${sum(b['amount'] for b in found):.2f}")
+    print_category_totals(index.totals([b["amount"] for b in budgets], mask))
+
+def print_limit_status(entries):
+    for entry in entries:
+        print(("⚠ " if entry["level"] != "ok" else "  ") + limits.format_entry(entry))
+
+def view_archive(store):
+    months = dict(store.months())
+    if not months:
+        print("No archived expenses.")
+        return
+    for month, summary in months.items():
+        print(f"{month}: {summary['count']} expenses, ${summary['total_spent']:.2f}")
+    query = input("Enter a month (YYYY-MM) or text to search: ").strip()
+    if query in months:
+        found = store.archived(query)
+    else:
+        found = store.search_archive(query)
+    if found:
+        print_budgets(found)
+    else:
+        print("No archived expenses found.")
+
 def run_cli():
-    key = load_key()
-    budgets = load_budgets(key)
+    try:
+        store = open_store()
+    except ValueError as e:
+        print(e)
+        return
+    # Checked once here: a bad [limits] section must not fail after a save.
+    try:
+        limits.load_limits()
+        limits_error = None
+    except ValueError as e:
+        limits_error = f"Budget limits are off: {e}"
+        print(limits_error)
+    budgets = store.load()
     while True:
         print("\nWelcome to Budget Tracker!")
         print("1. View budget")
         print("2. Add expense")
         print("3. Remove expense")
         print("4. Export to JSON")
-        print("5. Exit")
+        print("5. View archive")
+        print("6. Filter by tags")
+        print("7. Budget status")
+        print("8. Exit")
         choice = input("Choose an option: ")
         if choice == '1':
             if not budgets:
                 print("No expenses found.")
             else:
-                print(f"{'ID':>3} | {'Item':<15} | {'Amount':<8} | {'Date'}")
-                print("-"*40)
-                for b in budgets:
-                    print(f"{b['id']:>3} | {b['item']:<15} | ${b['amount']:<7.2f} | {b['date']}")
-                total = sum(b['amount'] for b in budgets)
-                print(f"\nTotal Spent: ${total:.2f}")
+                print_budgets(budgets)
+                summary = store.summary()
+                print(f"\nTotal Spent: ${summary['total_spent']:.2f}")
+                totals = category_totals(budgets)
+                if totals:
+                    print("By category:")
+                    print_category_totals(totals)
         elif choice == '2':
             item = input("Enter expense name: ").strip()
             if not item:
@@ -53,30 +184,53 @@ def run_cli():
                 print("Invalid number. Try again.")
                 continue
             expense = {
-                "id": (budgets[-1]["id"] + 1) if budgets else 1,
+                "id": store.next_id(),
                 "item": item,
                 "amount": amount,
                 "date": datetime.now().date().isoformat()
             }
+            expense_tags = tags.parse_tags(input("Tags/categories (comma-separated, blank to auto-categorize): "))
+            if expense_tags:
+                expense["tags"] = expense_tags
+            else:
+                category = categorize.default_categorizer().categorize(expense)
+                if category:
+                    print(f"Categorized as {category}.")
             budgets.append(expense)
-            save_budgets(budgets, key)
+            store.save(budgets)
             print("Expense added!")
+            if limits_error is None:
+                print_limit_status(store.limit_add(expense))
         elif choice == '3':
             try:
                 eid = int(input("Enter expense id to remove: "))
             except ValueError:
                 print("Please enter a valid number.")
                 continue
-            orig_len = len(budgets)
+            removed = [b for b in budgets if b["id"] == eid]
             budgets = [b for b in budgets if b["id"] != eid]
-            if len(budgets) < orig_len:
-                save_budgets(budgets, key)
+            if removed:
+                store.save(budgets)
+                if limits_error is None:
+                    store.limit_remove(removed[0])
                 print("Expense removed!")
             else:
                 print("Expense not found.")
         elif choice == '4':
             export_budgets(budgets)
         elif choice == '5':
+            view_archive(store)
+        elif choice == '6':
+            filter_by_tags(budgets)
+        elif choice == '7':
+            entries = [] if limits_error else store.limit_status()
+            if limits_error:
+                print(limits_error)
+            elif entries:
+                print_limit_status(entries)
+            else:
+                print("No limits set. Add a [limits] section to config.ini.")
+        elif choice == '8':
             break
         else:
             print("Invalid option.")
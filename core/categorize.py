@@ -0,0 +1,133 @@
+"""
+Rule-based expense categorization.
+
+Rules live in the ``[categories]`` section of config.ini, one category per
+option with comma-separated patterns:
+
+    [categories]
+    food = lunch, coffee, grocer*, /\\bpizza\\b/
+    transport = uber, taxi, train
+
+- ``word``     matches the whole word, case-insensitively
+- ``prefix*``  matches any word starting with *prefix*
+- ``/regex/``  is used as-is (case-insensitive)
+
+All patterns are compiled into one alternation with a named group per
+category, so classifying an item is a single regex search whatever the
+number of rules.  The match that starts earliest in the item wins; when
+several start at the same place, the category listed first wins.  Results
+are cached per distinct (case-folded) item string, so bulk imports, where
+the same few hundred item names repeat, mostly skip the regex entirely.
+
+A classified category is stored as the expense's tag (see core.tags).
+"""
+
+import os
+import re
+
+from .config import CONFIG_FILE, load_config
+from .tags import normalize_tag
+
+SECTION = "categories"
+# Distinct item strings remembered per categorizer before the cache resets.
+CACHE_LIMIT = 65536
+
+_PATTERN = re.compile(r"\s*(/(?:\\.|[^/])*/|[^,]+?)\s*(?:,|$)")
+_MISS = object()
+
+
+def parse_patterns(text):
+    """Split a rule's value into patterns; /regex/ items may contain commas."""
+    return [m.group(1) for m in _PATTERN.finditer(text) if m.group(1)]
+
+
+def pattern_regex(pattern):
+    """Regex source for one rule pattern."""
+    if len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/"):
+        return pattern[1:-1]
+    if pattern.endswith("*"):
+        return r"\b" + re.escape(pattern[:-1]) + r"\w*"
+    return r"\b" + re.escape(pattern) + r"\b"
+
+
+class Categorizer:
+    """Compiled matcher over ``[(category, [pattern, ...]), ...]``."""
+
+    def __init__(self, rules):
+        self.categories = []
+        parts = []
+        for category, patterns in rules:
+            sources = []
+            for pattern in patterns:
+                source = pattern_regex(pattern)
+                try:
+                    re.compile(source)
+                except re.error as e:
+                    raise ValueError(f"Bad pattern {pattern!r} for category {category!r}: {e}")
+                sources.append(f"(?:{source})")
+            if sources:
+                parts.append(f"(?P<c{len(self.categories)}>{'|'.join(sources)})")
+                self.categories.append(category)
+        self._regex = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        self._cache = {}
+
+    def classify(self, item):
+        """Category for an expense item string, or None if no rule matches."""
+        key = item.strip().casefold()
+        category = self._cache.get(key, _MISS)
+        if category is not _MISS:
+            return category
+        category = None
+        if self._regex is not None:
+            m = self._regex.search(key)
+            if m:
+                category = self.categories[int(m.lastgroup[1:])]
+        if len(self._cache) >= CACHE_LIMIT:
+            self._cache.clear()
+        self._cache[key] = category
+        return category
+
+    def categorize(self, record, overwrite=False):
+        """Tag *record* with its category if it has no tags yet (or *overwrite*).
+
+        Returns the category applied, or None.
+        """
+        if record.get("tags") and not overwrite:
+            return None
+        category = self.classify(record["item"])
+        if category is None:
+            return None
+        existing = record.get("tags") or []
+        if category not in existing:
+            record["tags"] = [category] + existing
+        return category
+
+
+def load_rules():
+    """``[(category, patterns)]`` from config.ini, in file order."""
+    parser = load_config()
+    if not parser.has_section(SECTION):
+        return []
+    return [(normalize_tag(category), parse_patterns(value))
+            for category, value in parser.items(SECTION, raw=True)]
+
+
+_default = (None, None)
+
+
+def default_categorizer():
+    """Categorizer for config.ini's rules, rebuilt only when the file changes."""
+    global _default
+    try:
+        stamp = os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError:
+        stamp = None
+    if _default[0] != stamp or _default[1] is None:
+        _default = (stamp, Categorizer(load_rules()))
+    return _default[1]
+
+
+def categorize_records(records, categorizer=None, overwrite=False):
+    """Bulk-categorize expenses in place.  Returns how many were tagged."""
+    categorize = (categorizer or default_categorizer()).categorize
+    return sum(1 for r in records if categorize(r, overwrite) is not None)
@@ -0,0 +1,95 @@
+"""
+Payload compression applied before encryption.
+
+JSON compresses well, and compressing before Fernet also shrinks the
+base64 expansion Fernet adds on top, so files and every save get smaller.
+Compressed payloads start with a short header naming the algorithm:
+
+    b"\\x00TFC" + <algorithm id byte> + <compressed body>
+
+JSON never starts with a NUL byte, so payloads written before compression
+existed are recognised and returned unchanged.
+
+Algorithms: ``none``, ``zlib`` and ``lzma`` from the standard library, plus
+``zstd`` when the optional ``zstandard`` package is installed.  ``auto``
+picks one based on the payload size.
+"""
+
+import lzma
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+MAGIC = b"\x00TFC"
+ALGORITHM_IDS = {"none": 0, "zlib": 1, "lzma": 2, "zstd": 3}
+ALGORITHM_NAMES = {v: k for k, v in ALGORITHM_IDS.items()}
+
+# Below this size the header and compression overhead outweigh the savings.
+SMALL_PAYLOAD = 256
+# Above this size compression time dominates the save: prefer zstd if
+# installed, otherwise a fast zlib level.
+LARGE_PAYLOAD = 1024 * 1024
+
+
+def available_algorithms():
+    names = ["none", "zlib", "lzma"]
+    if zstandard is not None:
+        names.append("zstd")
+    return names
+
+
+def choose_algorithm(size):
+    """Pick an algorithm for a payload of *size* bytes."""
+    if size < SMALL_PAYLOAD:
+        return "none"
+    if size >= LARGE_PAYLOAD and zstandard is not None:
+        return "zstd"
+    return "zlib"
+
+
+def compress(raw, algorithm="auto"):
+    """Compress *raw* bytes and prefix the algorithm header."""
+    if algorithm == "auto":
+        algorithm = choose_algorithm(len(raw))
+    if algorithm not in ALGORITHM_IDS:
+        raise ValueError(f"Unknown compression algorithm: {algorithm}")
+    if algorithm == "zlib":
+        body = zlib.compress(raw, 1 if len(raw) >= LARGE_PAYLOAD else 6)
+    elif algorithm == "lzma":
+        body = lzma.compress(raw, preset=6)
+    elif algorithm == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        body = zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        body = raw
+    return MAGIC + bytes([ALGORITHM_IDS[algorithm]]) + body
+
+
+def algorithm_of(payload):
+    """Return the algorithm name recorded in *payload*, or None for legacy data."""
+    if not payload.startswith(MAGIC) or len(payload) <= len(MAGIC):
+        return None
+    return ALGORITHM_NAMES.get(payload[len(MAGIC)])
+
+
+def decompress(payload):
+    """Undo compress().  Payloads without a header are returned unchanged."""
+    if not payload.startswith(MAGIC):
+        return payload
+    algorithm = algorithm_of(payload)
+    body = payload[len(MAGIC) + 1:]
+    if algorithm == "zlib":
+        return zlib.decompress(body)
+    if algorithm == "lzma":
+        return lzma.decompress(body)
+    if algorithm == "zstd":
+        if zstandard is None:
+            raise ValueError("Data is zstd-compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if algorithm == "none":
+        return body
+    raise ValueError("Unknown compression algorithm id in payload header")
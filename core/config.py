@@ -0,0 +1,23 @@
+"""
+Access to user settings stored in ``config.ini``.
+
+Missing files, sections or options fall back to the defaults given by the
+caller, so every setting is optional.
+"""
+
+import configparser
+
+CONFIG_FILE = 'config.ini'
+
+
+def load_config():
+    parser = configparser.ConfigParser()
+    parser.read(CONFIG_FILE, encoding="utf-8")
+    return parser
+
+
+def get_int(section, option, default):
+    try:
+        return load_config().getint(section, option, fallback=default)
+    except ValueError:
+        return default
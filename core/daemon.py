@@ -0,0 +1,434 @@
+"""
+Warm background daemon for the interactive CLIs.
+
+Each run of ``task_cli``/``budget_cli`` otherwise pays for importing the
+storage stack (cryptography, compression, process pools), loading the key
+and decrypting the whole data file before showing its menu.  The daemon
+keeps one process with the key loaded and both collections decrypted in
+memory, and serves them over a Unix domain socket:
+
+    python -m desktop.cli.triflow_cli [--profile NAME] daemon start|stop|status
+
+The CLIs use the daemon automatically when one is running for their
+working directory and profile, and read the files directly otherwise.
+This module imports only the standard library, so a CLI served by the
+daemon never loads the storage stack at all.
+
+Protocol: one JSON object per line in each direction.
+
+    {"op": "load", "collection": "tasks"}             -> {"ok": true, "result": [...]}
+    {"op": "save", "collection": "tasks", "records": [...]}
+    {"op": "summary" | "months" | "next_id", "collection": ...}
+    {"op": "archived", "collection": ..., "month": "2025-01"}
+    {"op": "search_archive", "collection": ..., "text": "..."}
+    {"op": "limit_status" | "limit_add" | "limit_remove", "collection": "budgets", "expense": {...}}
+    {"op": "ping" | "stop"}
+
+Failures come back as ``{"ok": false, "error": "..."}``.
+
+The files stay the source of truth: saves are written through before the
+reply, and a collection is re-read when its file changes under the daemon
+(a GUI or another process saved it), judged by mtime and size.  Encoded
+``load`` replies are cached until the collection changes.
+
+The socket sits next to the data files (``data/triflow.sock``, or inside
+the profile's directory) with mode 0600, as it hands out decrypted data.
+A daemon started for a profile holds that profile's key, so its clients
+do not prompt for the password.  The daemon exits after
+``[daemon] idle_seconds`` without a connected client.
+"""
+
+import json
+import os
+import socket
+import time
+
+from .config import get_int
+
+# asyncio (like the storage stack) is imported only by the server side:
+# importing it costs more than a whole request to a running daemon.
+
+SOCKET_FILE = "data/triflow.sock"
+# Same values as core.profiles, which is not imported here: it pulls in
+# cryptography, which is exactly what a daemon client avoids loading.
+PROFILES_DIR = "profiles"
+PROFILE_ENV = "TRIFLOW_PROFILE"
+# Set to any value to make the CLIs read the files even if a daemon runs.
+DISABLE_ENV = "TRIFLOW_NO_DAEMON"
+DEFAULT_IDLE_SECONDS = 15 * 60
+# Collections are sent as one line; asyncio's default limit is 64 KiB.
+MAX_LINE = 256 * 1024 * 1024
+READ_BUFFER = 64 * 1024
+SEARCH_FIELDS = {"tasks": "description", "budgets": "item"}
+OPS = ("load", "save", "summary", "next_id", "months", "archived", "search_archive",
+       "limit_status", "limit_add", "limit_remove")
+
+
+class DaemonError(Exception):
+    pass
+
+
+def socket_path(profile=None):
+    """The socket of the daemon for *profile* (default: $TRIFLOW_PROFILE), relative to the cwd."""
+    profile = profile if profile is not None else os.environ.get(PROFILE_ENV)
+    return os.path.join(PROFILES_DIR, profile, SOCKET_FILE) if profile else SOCKET_FILE
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# -- client ------------------------------------------------------------------
+
+class Client:
+    """One connection to a running daemon."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._file = sock.makefile("rb", buffering=READ_BUFFER)
+
+    def request(self, op, **params):
+        try:
+            self.sock.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+            line = self._file.readline()
+        except OSError as e:
+            raise DaemonError(f"Lost connection to the TriFlow daemon: {e}") from None
+        if not line:
+            raise DaemonError("The TriFlow daemon closed the connection.")
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise DaemonError(reply["error"])
+        return reply.get("result")
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+
+def connect_client(path=None):
+    """A Client for the daemon at *path* (default socket_path()), or None if none is running."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:  # stale socket left by a daemon that died
+        sock.close()
+        return None
+    return Client(sock)
+
+
+def connect(name):
+    """The collection *name* ("tasks" or "budgets") served by the daemon, or None."""
+    client = None if os.environ.get(DISABLE_ENV) else connect_client()
+    return RemoteCollection(client, name) if client is not None else None
+
+
+class RemoteCollection:
+    """A collection served by the daemon, with the same calls as LocalCollection."""
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def _call(self, op, **params):
+        return self.client.request(op, collection=self.name, **params)
+
+    def load(self):
+        return self._call("load")
+
+    def save(self, records):
+        self._call("save", records=records)
+
+    def summary(self):
+        return self._call("summary")
+
+    def next_id(self):
+        return self._call("next_id")
+
+    def months(self):
+        return self._call("months")
+
+    def archived(self, month):
+        return self._call("archived", month=month)
+
+    def search_archive(self, text):
+        return self._call("search_archive", text=text)
+
+    def limit_status(self):
+        return self._call("limit_status")
+
+    def limit_add(self, expense):
+        return self._call("limit_add", expense=expense)
+
+    def limit_remove(self, expense):
+        self._call("limit_remove", expense=expense)
+
+
+# -- direct file access --------------------------------------------------------
+
+class LocalCollection:
+    """A collection read and written directly through its encrypted file."""
+
+    def __init__(self, path, kind, key):
+        self.path = path
+        self.kind = kind
+        self.key = key
+        self._limits = None
+
+    def archive_old(self):
+        from . import archive
+        return archive.archive_records(self.path, self.key, self.kind)
+
+    def load(self):
+        from . import storage
+        return storage.read_records(self.path, self.key)
+
+    def save(self, records):
+        from . import storage
+        storage.write_records(self.path, records, self.key, self.kind, timeline="save")
+        # Limit totals are rebuilt from the new summary when next needed.
+        self._limits = None
+
+    def summary(self):
+        """Counters over all records, archived ones included, from summary blocks."""
+        from . import archive
+        return archive.combined_summary(self.path, self.key, self.kind)
+
+    def next_id(self):
+        """Id for a new record, past every saved one, archived ones included."""
+        from . import archive
+        return archive.next_id(self.summary())
+
+    def months(self):
+        """``[month, summary]`` for each archived month."""
+        from . import archive
+        return [[month, archive.month_summary(self.path, self.key, month, self.kind)]
+                for month in archive.list_months(self.path)]
+
+    def archived(self, month):
+        from . import archive
+        return archive.load_month(self.path, self.key, month)
+
+    def search_archive(self, text):
+        from . import archive
+        return archive.search_history(self.path, self.key, text, SEARCH_FIELDS[self.kind])
+
+    def limit_tracker(self):
+        if self._limits is None:
+            from . import limits
+            self._limits = limits.load_tracker(self.path, self.key)
+        return self._limits
+
+    def limit_status(self):
+        return self.limit_tracker().status()
+
+    def limit_add(self, expense):
+        """Alerts for *expense*, already saved: the limits it pushed to a higher level."""
+        tracker = self.limit_tracker()
+        tracker.remove(expense)
+        return tracker.add(expense)
+
+    def limit_remove(self, expense):
+        # The tracker is built from the saved file, which no longer counts *expense*.
+        self.limit_tracker()
+
+
+# -- server ------------------------------------------------------------------
+
+class ServedCollection(LocalCollection):
+    """A LocalCollection whose records stay decrypted while its file is unchanged."""
+
+    def __init__(self, path, kind, key):
+        super().__init__(path, kind, key)
+        self.records = None
+        self.stamp = None
+        self._summary = None
+        self._encoded = None
+
+    def refresh(self):
+        """Re-read the file if it changed since the daemon last read or wrote it."""
+        if self.records is not None and _file_stamp(self.path) == self.stamp:
+            return
+        self.archive_old()
+        self.records = super().load()
+        self._changed()
+        self._limits = None
+
+    def _changed(self):
+        self.stamp = _file_stamp(self.path)
+        self._summary = None
+        self._encoded = None
+
+    def load(self):
+        self.refresh()
+        return self.records
+
+    def load_json(self):
+        """The records encoded as JSON, cached until they change."""
+        self.refresh()
+        if self._encoded is None:
+            self._encoded = json.dumps(self.records).encode("utf-8")
+        return self._encoded
+
+    def save(self, records):
+        super().save(records)
+        self.records = records
+        self._changed()
+        self._limits = None
+
+    def summary(self):
+        self.refresh()
+        if self._summary is None:
+            self._summary = super().summary()
+        return self._summary
+
+    def limit_tracker(self):
+        self.refresh()
+        return super().limit_tracker()
+
+
+class DaemonState:
+    def __init__(self, key, idle_seconds=None):
+        from . import task_tracker, budget_tracker
+        self.collections = {
+            "tasks": ServedCollection(task_tracker.data_file(), "tasks", key),
+            "budgets": ServedCollection(budget_tracker.data_file(), "budgets", key),
+        }
+        self.idle_seconds = idle_seconds or get_int("daemon", "idle_seconds", DEFAULT_IDLE_SECONDS)
+        self.clients = 0
+        self.last_active = time.monotonic()
+        import asyncio
+        self.stopping = asyncio.Event()
+
+    def warm(self):
+        for coll in self.collections.values():
+            coll.load_json()
+
+    def handle(self, request):
+        """Reply line (bytes, without the newline) for one decoded request."""
+        op = request.get("op")
+        if op == "ping":
+            # "clients" leaves out the connection asking.
+            return _reply({"pid": os.getpid(), "clients": self.clients - 1,
+                           "records": {name: len(c.records or ()) for name, c in self.collections.items()}})
+        if op == "stop":
+            self.stopping.set()
+            return _reply(None)
+        if op not in OPS:
+            raise DaemonError(f"Unknown operation {op!r}")
+        coll = self.collections.get(request.get("collection"))
+        if coll is None:
+            raise DaemonError(f"Unknown collection {request.get('collection')!r}")
+        if op.startswith("limit_") and coll.kind != "budgets":
+            raise DaemonError("Limits apply to budgets only.")
+        if op == "load":
+            return b'{"ok": true, "result": ' + coll.load_json() + b"}"
+        params = {k: v for k, v in request.items() if k not in ("op", "collection")}
+        return _reply(getattr(coll, op)(**params))
+
+
+def _reply(result):
+    return json.dumps({"ok": True, "result": result}).encode("utf-8")
+
+
+async def _handle_connection(state, reader, writer):
+    state.clients += 1
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except (ConnectionError, ValueError):
+                break
+            if not line:
+                break
+            state.last_active = time.monotonic()
+            try:
+                out = state.handle(json.loads(line))
+            except Exception as e:  # keep serving other requests and clients
+                out = json.dumps({"ok": False, "error": str(e)}).encode("utf-8")
+            writer.write(out + b"\n")
+            await writer.drain()
+    finally:
+        state.clients -= 1
+        state.last_active = time.monotonic()
+        writer.close()
+
+
+async def _idle_watch(state):
+    import asyncio
+    while not state.stopping.is_set():
+        await asyncio.sleep(min(state.idle_seconds, 5))
+        if state.clients == 0 and time.monotonic() - state.last_active >= state.idle_seconds:
+            state.stopping.set()
+
+
+async def serve(key, path=None, idle_seconds=None, ready=None):
+    """Serve the collections on *path* until stopped or idle; calls *ready()* once listening."""
+    import asyncio
+    path = path or socket_path()
+    state = DaemonState(key, idle_seconds)
+    state.warm()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)  # stale; callers check that no daemon answers first
+    old_umask = os.umask(0o177)
+    try:
+        server = await asyncio.start_unix_server(
+            lambda r, w: _handle_connection(state, r, w), path, limit=MAX_LINE)
+    finally:
+        os.umask(old_umask)
+    if ready:
+        ready()
+    watcher = asyncio.ensure_future(_idle_watch(state))
+    try:
+        async with server:
+            await state.stopping.wait()
+    finally:
+        watcher.cancel()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def start(key, path, idle_seconds=None, foreground=False):
+    """Run a daemon serving the active profile's data on *path*; detached unless *foreground*."""
+    import asyncio
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("The daemon needs Unix domain sockets, which this platform lacks.")
+    probe = connect_client(path)
+    if probe is not None:
+        probe.close()
+        raise DaemonError(f"A daemon is already serving {path}.")
+    if foreground:
+        asyncio.run(serve(key, path, idle_seconds))
+        return
+    read_end, write_end = os.pipe()
+    if os.fork():
+        os.close(write_end)
+        with os.fdopen(read_end, "rb") as pipe:
+            if pipe.read(1) != b"1":
+                raise DaemonError("The daemon failed to start; run it with --foreground to see why.")
+        return
+    # Child: detach from the terminal and serve until stopped or idle.
+    os.close(read_end)
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+    def ready():
+        os.write(write_end, b"1")
+        os.close(write_end)
+
+    try:
+        asyncio.run(serve(key, path, idle_seconds, ready))
+    finally:
+        os._exit(0)
+
@@ -0,0 +1,48 @@
+"""
+Advisory lock files guarding the moment an encrypted file is replaced.
+
+Saves, timeline and undo-journal writes and key rotation all replace (or
+append to) the same files from different processes.  Each of them holds
+``<file>.lock`` only around that final step, so key rotation can check
+that a file is unchanged and swap in its re-encrypted copy without a save
+landing in between and being overwritten.
+
+The lock is a file created with O_EXCL, which works the same on every
+platform.  Holders keep it for milliseconds; a lock older than
+STALE_SECONDS was left by a crashed process and is broken.
+"""
+
+import contextlib
+import os
+import time
+
+LOCK_SUFFIX = ".lock"
+STALE_SECONDS = 10.0
+POLL_SECONDS = 0.01
+
+
+def lock_path(path):
+    return f"{path}{LOCK_SUFFIX}"
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Hold the lock of *path* for the duration of the ``with`` block."""
+    lock = lock_path(path)
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock).st_mtime > STALE_SECONDS:
+                    os.remove(lock)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(POLL_SECONDS)
+    try:
+        yield
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(lock)
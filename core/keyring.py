@@ -0,0 +1,253 @@
+"""
+Versioned encryption keys and key rotation for TriFlow.
+
+The key file holds one key per line as ``<version>:<key>``.  A legacy
+``key.key`` containing a single bare key is read as version 1, so existing
+installs keep working unchanged.
+
+- New writes always use the newest key.
+- Reads go through a MultiFernet over every key in the ring, so data written
+  under older keys stays readable.
+- rotate_store() re-encrypts stored files one token at a time, recording
+  progress in a small state file so an interrupted rotation resumes where it
+  stopped.  Tokens are rotated without being decrypted to JSON, and only one
+  file is held in memory at a time.
+- store_files() lists every encrypted file of the stores: the hot files,
+  their archived months, undo journals, timelines and rolling backups.
+- retire_old_keys() drops superseded keys once a rotation has completed,
+  and refuses while any of those files still needs an old key.
+"""
+
+import json
+import os
+import threading
+import time
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+ROTATION_STATE_SUFFIX = ".rotation"
+# A file saved this many times while being rotated is left pending for the
+# next run rather than retried indefinitely.
+ROTATE_ATTEMPTS = 5
+RETRY_DELAY = 0.05
+
+
+def _parse_line(line):
+    version, sep, key = line.partition(":")
+    if not sep:
+        return 1, line
+    return int(version), key
+
+
+def read_keys(key_file):
+    """Return the ring as a list of (version, key bytes), oldest first."""
+    with open(key_file, "rb") as f:
+        lines = [ln.strip().decode("ascii") for ln in f.read().splitlines() if ln.strip()]
+    keys = sorted(_parse_line(ln) for ln in lines)
+    return [(version, key.encode("ascii")) for version, key in keys]
+
+
+def write_keys(key_file, keys):
+    """Atomically replace the key file with *keys* (list of (version, key))."""
+    tmp = key_file + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"".join(b"%d:%s\n" % (version, key) for version, key in keys))
+    os.replace(tmp, key_file)
+
+
+def ensure_keys(key_file):
+    """Load the ring, creating a fresh single-key ring if none exists."""
+    if not os.path.exists(key_file):
+        key = Fernet.generate_key()
+        with open(key_file, "wb") as f:
+            f.write(key)
+        return [(1, key)]
+    return read_keys(key_file)
+
+
+def multifernet(keys):
+    """Build a MultiFernet that encrypts with the newest key in *keys*."""
+    return MultiFernet([Fernet(key) for _, key in reversed(keys)])
+
+
+def add_key(key_file):
+    """Append a freshly generated key to the ring.  Returns its version."""
+    keys = ensure_keys(key_file)
+    version = keys[-1][0] + 1
+    keys.append((version, Fernet.generate_key()))
+    write_keys(key_file, keys)
+    return version
+
+
+def stale_files(keys, paths):
+    """Files in *paths* holding a token that only a key older than the newest can read.
+
+    Damaged tokens, which no key reads, do not count.
+    """
+    from .storage import iter_tokens
+
+    newest, ring = Fernet(keys[-1][1]), multifernet(keys)
+    stale = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        for token in iter_tokens(data):
+            try:
+                newest.decrypt(token)
+            except InvalidToken:
+                try:
+                    ring.decrypt(token)
+                except InvalidToken:
+                    continue
+                stale.append(str(path))
+                break
+    return stale
+
+
+def retire_old_keys(key_file, paths=()):
+    """Drop every key but the newest.  Only safe after a complete rotation.
+
+    Every file in *paths* (see store_files()) is checked first, so a file
+    the rotation missed, e.g. one written meanwhile, is not lost.
+    """
+    keys = ensure_keys(key_file)
+    state = _load_state(key_file)
+    if state and state.get("pending"):
+        raise RuntimeError("Key rotation has not finished; resume it before retiring keys.")
+    stale = stale_files(keys, paths)
+    if stale:
+        raise RuntimeError(f"Still encrypted with an old key: {', '.join(stale)}; "
+                           "rotate again before retiring keys.")
+    write_keys(key_file, keys[-1:])
+    return len(keys) - 1
+
+
+def store_files(paths):
+    """Every encrypted file of the stores whose hot files are *paths*.
+
+    That is each hot file and its archived months (see core.archive), the
+    rolling backups of both (the recovery path for damaged segments), the
+    undo journal (core.undo) and the timeline (core.timeline); these are
+    what a rotation must cover before old keys can be retired.
+    """
+    from . import archive, storage, timeline, undo
+
+    files = []
+    for path in paths:
+        tiers = [str(path)] + [archive.segment_path(path, month) for month in archive.list_months(path)]
+        for tier in tiers:
+            files.append(tier)
+            files.extend(storage.backup_paths(tier))
+        files.append(undo.journal_path(path))
+        files.extend(timeline.timeline_files(path))
+    return files
+
+
+def _state_file(key_file):
+    return key_file + ROTATION_STATE_SUFFIX
+
+
+def _load_state(key_file):
+    try:
+        with open(_state_file(key_file), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_state(key_file, state):
+    tmp = _state_file(key_file) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, _state_file(key_file))
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _rotate_file(path, fernet):
+    """Re-encrypt every token in *path* under the primary key.
+
+    Returns False if the file changed while it was being rotated (an app
+    saved it meanwhile), so the caller can retry.  The check and the
+    replace happen under the file's lock (core.filelock), which every
+    writer takes too, so no save can land between them.
+    """
+    from . import filelock
+    from .storage import rewrite_tokens
+
+    before = _stamp(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    tmp = path + ".rotating"
+    with open(tmp, "wb") as f:
+        f.write(rewrite_tokens(data, fernet.rotate))
+        f.flush()
+        os.fsync(f.fileno())
+    with filelock.locked(path):
+        if _stamp(path) == before:
+            os.replace(tmp, path)
+            return True
+    os.remove(tmp)
+    return False
+
+
+def _rotate_with_retries(path, fernet, stop_event):
+    """_rotate_file() with a bounded, backed-off retry.  Returns True once rotated."""
+    for attempt in range(ROTATE_ATTEMPTS):
+        if stop_event is not None and stop_event.is_set():
+            return False
+        if not os.path.exists(path) or _rotate_file(path, fernet):
+            return True
+        time.sleep(RETRY_DELAY * 2 ** attempt)
+    return False
+
+
+def rotate_store(key_file, paths, progress=None, stop_event=None):
+    """Re-encrypt every file in *paths* under the newest key.
+
+    Progress is persisted after each file, so calling this again after an
+    interruption (or with stop_event set) continues with the remaining
+    files.  A file that keeps being saved while it is rotated stays pending
+    for the next call.  *progress* is called as ``progress(done, total, path)``.
+    Returns True once every file has been rotated.
+    """
+    keys = ensure_keys(key_file)
+    fernet = multifernet(keys)
+    target = keys[-1][0]
+    state = _load_state(key_file)
+    if not state or state.get("version") != target:
+        state = {"version": target,
+                 "pending": [str(p) for p in paths if os.path.exists(p)],
+                 "done": []}
+        _save_state(key_file, state)
+    total = len(state["pending"]) + len(state["done"])
+    for path in list(state["pending"]):
+        if stop_event is not None and stop_event.is_set():
+            return False
+        if not _rotate_with_retries(path, fernet, stop_event):
+            continue
+        state["pending"].remove(path)
+        state["done"].append(path)
+        _save_state(key_file, state)
+        if progress:
+            progress(len(state["done"]), total, path)
+    return not state["pending"]
+
+
+def start_rotation(key_file, paths, progress=None):
+    """Run rotate_store() on a background thread.
+
+    Returns ``(thread, stop_event)``; set the event to pause the rotation,
+    which can later be resumed by starting it again.
+    """
+    stop_event = threading.Event()
+    thread = threading.Thread(target=rotate_store, args=(key_file, paths, progress, stop_event),
+                              name="triflow-key-rotation", daemon=True)
+    thread.start()
+    return thread, stop_event
@@ -0,0 +1,233 @@
+"""
+Spending limits per day, week or month, optionally per category.
+
+Limits are set in the ``[limits]`` section of config.ini:
+
+    [limits]
+    warn_percent = 80
+    daily = 50
+    monthly = 1500
+    monthly.food = 300
+
+``monthly.food`` only counts expenses tagged "food"; alerts start at
+``warn_percent`` of a limit.  A malformed option makes load_limits() raise
+ValueError; the CLIs report it when the budgets store is opened.
+
+LimitTracker keeps the amount spent in each limit's current period as a
+running total.  Adding or deleting an expense adjusts only the totals of
+the limits it falls under (O(number of limits)) and reports the limits it
+pushed past the warning threshold or over the limit.  When a period rolls
+over (a new day, week or month), the new period's totals are summed from
+per-day spend, never from the whole expense history.
+
+That per-day spend comes from the store's summary block (see
+storage.RECENT_DAYS), so load_tracker() and status() cost the same
+whatever the size of the history: one small block is decrypted, plus the
+summaries of archived months that overlap a current period, if any.
+"""
+
+import math
+from collections import namedtuple
+from datetime import date, timedelta
+
+# archive and storage are imported where used, so the budget CLI can
+# format limits without loading the storage stack (see core.daemon).
+from .config import load_config
+from .tags import normalize_tag
+
+SECTION = "limits"
+PERIODS = ("daily", "weekly", "monthly")
+DEFAULT_WARN_PERCENT = 80
+ALL = "*"
+
+Limit = namedtuple("Limit", "period category amount")
+
+
+def period_bounds(period, day):
+    """(first day, first day of the next period) of *period* containing *day*."""
+    if period == "daily":
+        return day, day + timedelta(days=1)
+    if period == "weekly":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def _amount(option, value):
+    try:
+        amount = float(value)
+    except ValueError:
+        amount = math.nan
+    if not math.isfinite(amount) or amount < 0:
+        raise ValueError(f"Invalid [{SECTION}] {option} = {value!r}: expected a non-negative number.")
+    return amount
+
+
+def parse_limits(items):
+    """Limits and warn ratio from ``(option, value)`` pairs of the config section.
+
+    Raises ValueError naming the offending option.
+    """
+    limits, warn = [], DEFAULT_WARN_PERCENT / 100
+    for option, value in items:
+        if option == "warn_percent":
+            warn = _amount(option, value) / 100
+            continue
+        period, _, category = option.partition(".")
+        if period not in PERIODS:
+            raise ValueError(f"Unknown [{SECTION}] period {period!r} in {option!r}; "
+                             f"use one of: {', '.join(PERIODS)}.")
+        limits.append(Limit(period, normalize_tag(category) or None, _amount(option, value)))
+    return limits, warn
+
+
+def load_limits():
+    parser = load_config()
+    if not parser.has_section(SECTION):
+        return [], DEFAULT_WARN_PERCENT / 100
+    # items() would also return every [DEFAULT] option.
+    defaults = parser.defaults()
+    return parse_limits([(option, value) for option, value in parser.items(SECTION)
+                         if option not in defaults])
+
+
+class LimitTracker:
+    """Running totals of the current period of each limit."""
+
+    def __init__(self, limits, warn=DEFAULT_WARN_PERCENT / 100, days=None, today=None):
+        self.limits = list(limits)
+        self.warn = warn
+        # {ISO day: {"*": spend, tag: spend}} for days a current period may need
+        self.days = {d: dict(t) for d, t in (days or {}).items()}
+        self.today = None
+        self.bounds = []
+        self.spent = []
+        self._roll(today or date.today())
+
+    @classmethod
+    def from_records(cls, limits, records, warn=DEFAULT_WARN_PERCENT / 100, today=None):
+        from . import storage
+        since = (today or date.today()) - timedelta(days=storage.RECENT_DAYS)
+        return cls(limits, warn, storage.recent_day_totals(records, since.isoformat()), today)
+
+    def _roll(self, today):
+        """Move every limit to the period containing *today*, re-summing changed ones."""
+        if today == self.today:
+            return
+        self.today = today
+        bounds = [period_bounds(limit.period, today) for limit in self.limits]
+        spent = []
+        for i, (limit, (start, end)) in enumerate(zip(self.limits, bounds)):
+            if i < len(self.bounds) and self.bounds[i] == (start, end):
+                spent.append(self.spent[i])
+                continue
+            lo, hi = start.isoformat(), end.isoformat()
+            spent.append(sum(totals.get(limit.category or ALL, 0.0)
+                             for day, totals in self.days.items() if lo <= day < hi))
+        self.bounds, self.spent = bounds, spent
+        # Days before every current period can never count again.
+        horizon = min((start for start, _ in bounds), default=today).isoformat()
+        for day in [d for d in self.days if d < horizon]:
+            del self.days[day]
+
+    def _level(self, i):
+        amount = self.limits[i].amount
+        spent = round(self.spent[i], 2)
+        if spent > amount:
+            return 2
+        return 1 if spent >= self.warn * amount else 0
+
+    def _apply(self, expense, sign):
+        """Adjust the totals for *expense*; returns the indexes of the limits touched."""
+        day = expense["date"][:10]
+        # Anything older than every current period can't affect a limit.
+        if self.bounds and day < min(start for start, _ in self.bounds).isoformat():
+            return []
+        names = (ALL, *(expense.get("tags") or ()))
+        totals = self.days.setdefault(day, {})
+        for name in names:
+            totals[name] = totals.get(name, 0.0) + sign * expense["amount"]
+        touched = []
+        for i, (limit, (start, end)) in enumerate(zip(self.limits, self.bounds)):
+            if start.isoformat() <= day < end.isoformat() and (limit.category or ALL) in names:
+                self.spent[i] += sign * expense["amount"]
+                touched.append(i)
+        return touched
+
+    def _raised(self, change):
+        """Run *change*; status entries of limits it moved to a higher alert level."""
+        before = [self._level(i) for i in range(len(self.limits))]
+        touched = change()
+        return [self._entry(i) for i in sorted(set(touched)) if self._level(i) > before[i]]
+
+    def add(self, expense, today=None):
+        """Count a new expense; returns status entries of limits it pushed to a higher alert level."""
+        self._roll(today or date.today())
+        return self._raised(lambda: self._apply(expense, 1))
+
+    def remove(self, expense, today=None):
+        self._roll(today or date.today())
+        self._apply(expense, -1)
+
+    def replace(self, before, after, today=None):
+        """Re-count an edited expense (amount, date or categories); alerts as for add()."""
+        self._roll(today or date.today())
+        return self._raised(lambda: self._apply(before, -1) + self._apply(after, 1))
+
+    def _entry(self, i):
+        limit, (start, end) = self.limits[i], self.bounds[i]
+        spent = round(self.spent[i], 2)
+        return {
+            "period": limit.period,
+            "category": limit.category,
+            "limit": limit.amount,
+            "spent": spent,
+            "remaining": round(limit.amount - spent, 2),
+            "start": start.isoformat(),
+            "end": (end - timedelta(days=1)).isoformat(),
+            "level": ("ok", "warning", "exceeded")[self._level(i)],
+        }
+
+    def status(self, today=None):
+        """One entry per limit for its current period: O(number of limits)."""
+        self._roll(today or date.today())
+        return [self._entry(i) for i in range(len(self.limits))]
+
+    def alerts(self, today=None):
+        return [entry for entry in self.status(today) if entry["level"] != "ok"]
+
+
+def format_entry(entry):
+    """e.g. "Monthly food: $250.00 of $300.00 (83%) - warning"."""
+    name = entry["period"].capitalize() + (f" {entry['category']}" if entry["category"] else "")
+    percent = entry["spent"] / entry["limit"] * 100 if entry["limit"] else 100.0
+    text = f"{name}: ${entry['spent']:.2f} of ${entry['limit']:.2f} ({percent:.0f}%)"
+    return text if entry["level"] == "ok" else f"{text} - {entry['level']}"
+
+
+def load_tracker(path, key, today=None):
+    """LimitTracker for the config's limits over the budgets store at *path*.
+
+    Built from summary blocks only: the hot file's, plus any archived month
+    overlapping a current period.  Stores written before summaries carried
+    per-day spend are read in full once.
+    """
+    from . import archive, storage
+    limits, warn = load_limits()
+    today = today or date.today()
+    summary = storage.read_summary(path, key, "budgets")
+    if "recent_days" not in summary:
+        return LimitTracker.from_records(limits, storage.read_records(path, key), warn, today)
+    days = {d: dict(t) for d, t in summary["recent_days"].items()}
+    earliest = min((period_bounds(limit.period, today)[0] for limit in limits), default=today)
+    for month in archive.list_months(path):
+        if month < earliest.isoformat()[:7]:
+            break
+        part = archive.month_summary(path, key, month, "budgets")
+        for day, totals in part.get("recent_days", {}).items():
+            merged = days.setdefault(day, {})
+            for name, total in totals.items():
+                merged[name] = merged.get(name, 0.0) + total
+    return LimitTracker(limits, warn, days, today)
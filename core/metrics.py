@@ -0,0 +1,185 @@
+"""
+Lightweight timing and counter instrumentation.
+
+Hot paths (key loading, encryption, file reads/writes, table refreshes) are
+wrapped with ``@timed("name")`` or ``with timer("name"):`` and byte/record
+volumes are recorded with ``count("name", n)``.
+
+Collection is off unless ``TRIFLOW_METRICS=1`` is set or enable() is
+called; while off, every hook is a single flag check.  When enabled through
+the environment, a summary table is printed to stderr on exit.
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Number of recent samples kept per timer for live percentiles.
+RECENT_SAMPLES = 256
+
+_enabled = os.environ.get("TRIFLOW_METRICS") == "1"
+_lock = threading.Lock()
+_timers = {}
+_counters = {}
+
+
+class _Timer:
+    __slots__ = ("calls", "total", "min", "max", "recent")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, elapsed):
+        self.calls += 1
+        self.total += elapsed
+        if elapsed < self.min:
+            self.min = elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.recent.append(elapsed)
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def record(name, elapsed):
+    """Add one timing sample (in seconds) for *name*."""
+    timer_ = _timers.get(name)
+    if timer_ is None:
+        with _lock:
+            timer_ = _timers.setdefault(name, _Timer())
+    timer_.add(elapsed)
+
+
+def count(name, n=1):
+    """Add *n* to the counter *name* (no-op while disabled)."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _TimerContext:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullContext()
+
+
+def timer(name):
+    """Context manager timing its block under *name*."""
+    return _TimerContext(name) if _enabled else _NULL
+
+
+def timed(name):
+    """Decorator timing every call of the wrapped function under *name*."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def snapshot():
+    """Return current metrics as plain data.
+
+    ``{"timers": {name: {calls, total_ms, mean_ms, min_ms, max_ms, p50_ms,
+    p95_ms}}, "counters": {name: value}}``
+    """
+    timers = {}
+    for name, t in list(_timers.items()):
+        recent = list(t.recent)
+        timers[name] = {
+            "calls": t.calls,
+            "total_ms": t.total * 1000,
+            "mean_ms": t.total * 1000 / t.calls if t.calls else 0.0,
+            "min_ms": (t.min if t.calls else 0.0) * 1000,
+            "max_ms": t.max * 1000,
+            "p50_ms": _percentile(recent, 0.50) * 1000,
+            "p95_ms": _percentile(recent, 0.95) * 1000,
+        }
+    return {"timers": timers, "counters": dict(_counters)}
+
+
+def format_summary(data=None):
+    """Render snapshot() as a text table."""
+    data = data or snapshot()
+    lines = [f"{'timer':<24} | {'calls':>6} | {'total ms':>9} | {'mean ms':>8} | {'p95 ms':>8} | {'max ms':>8}",
+             "-" * 78]
+    for name, t in sorted(data["timers"].items()):
+        lines.append(f"{name:<24} | {t['calls']:>6} | {t['total_ms']:>9.2f} | {t['mean_ms']:>8.3f} | "
+                     f"{t['p95_ms']:>8.3f} | {t['max_ms']:>8.3f}")
+    if data["counters"]:
+        lines.append("")
+        lines.append(f"{'counter':<24} | {'value':>12}")
+        lines.append("-" * 39)
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"{name:<24} | {value:>12,}")
+    return "\n".join(lines)
+
+
+def _dump_on_exit():
+    if _timers or _counters:
+        print("\nTriFlow metrics\n" + format_summary(), file=sys.stderr)
+
+
+if _enabled:
+    atexit.register(_dump_on_exit)
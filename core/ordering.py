@@ -0,0 +1,62 @@
+"""
+Sorting and filtering of record lists for table views.
+
+Tables sort by precomputed keys: each column's key is computed once per
+record (sort_keys) and reused for every later sort, so clicking a header
+never re-parses dates or re-lowercases strings.  A sort or filter produces
+a permutation -- a list of positions into the unchanged record list -- that
+a view can swap in at once.
+
+Large sorts are done in chunks that are then merged, so a worker thread
+running compute_order() gives up the GIL regularly instead of holding it
+for one long list.sort() call, and the GUI stays responsive meanwhile.
+"""
+
+import heapq
+
+# Rows sorted per chunk before merging.
+SORT_CHUNK = 20000
+
+
+def sort_keys(records, key_fn):
+    """Return ``[key_fn(r) for r in records]``; computed once per column."""
+    return [key_fn(r) for r in records]
+
+
+def search_text(values):
+    """Lower-cased text a row is matched against by filter_rows()."""
+    return "\x00".join(str(v) for v in values).casefold()
+
+
+def filter_rows(haystacks, text, rows=None):
+    """Positions whose search text contains *text*.
+
+    Only positions in *rows* are considered when given (e.g. the result of a
+    tag query).  Returns *rows* unchanged -- None meaning every row -- if
+    there is no text to filter by.
+    """
+    needle = text.strip().casefold()
+    if not needle:
+        return rows
+    if rows is None:
+        return [i for i, hay in enumerate(haystacks) if needle in hay]
+    return [i for i in rows if needle in haystacks[i]]
+
+
+def compute_order(keys, rows=None, reverse=False, chunk=SORT_CHUNK):
+    """Return *rows* (default: every position) ordered by ``keys[row]``.
+
+    The sort is stable, so equal keys keep their original order.  With
+    keys=None, *rows* is returned in insertion order; one of the two is
+    required.
+    """
+    if keys is None and rows is None:
+        raise ValueError("compute_order() needs keys or rows")
+    rows = list(range(len(keys)) if rows is None else rows)
+    if keys is None:
+        return rows[::-1] if reverse else rows
+    key = keys.__getitem__
+    if len(rows) <= chunk:
+        return sorted(rows, key=key, reverse=reverse)
+    runs = [sorted(rows[i:i + chunk], key=key, reverse=reverse) for i in range(0, len(rows), chunk)]
+    return list(heapq.merge(*runs, key=key, reverse=reverse))
@@ -0,0 +1,225 @@
+"""
+Per-user profiles with password-derived encryption keys.
+
+Each profile has its own directory under ``profiles/`` that mirrors the
+default layout (``data/tasks.json.enc``, ``tasks.enc``, archives and
+backups next to them), plus a ``profile.json`` holding the KDF salt and
+parameters and a small token used to check the password:
+
+    profiles/alice/profile.json
+    profiles/alice/data/tasks.json.enc
+
+The profile's Fernet key is derived from the password with scrypt
+(PBKDF2-SHA256 where hashlib lacks scrypt) and never written to disk.
+Without an active profile everything keeps using the shared ``key.key``
+ring and the usual file locations, so existing installs are unaffected.
+
+Deriving a key is deliberately slow (tens of milliseconds or more), so
+derived keys are cached in memory for the session: loads and saves reuse
+the active profile's key, and switching back to a profile unlocked
+earlier is a dictionary lookup.  Cache entries are indexed by an HMAC of
+salt and password under a random per-process secret, so the password
+itself is not kept; lock() and lock_all() drop entries (the key bytes
+are overwritten, as far as Python allows).
+"""
+
+import base64
+import getpass
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+from .config import get_int
+
+PROFILES_DIR = "profiles"
+# The CLIs open this profile when it is set (see unlock_from_env).
+PROFILE_ENV = "TRIFLOW_PROFILE"
+PROFILE_FILE = "profile.json"
+# scrypt cost for new profiles (``[profiles] scrypt_n`` in config.ini);
+# existing profiles keep the parameters they were created with.
+DEFAULT_SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+
+_CHECK = b"triflow-profile"
+_NAME = re.compile(r"^[\w.@+-]{1,64}$")
+
+_lock = threading.Lock()
+_secret = secrets.token_bytes(32)
+_keys = {}  # HMAC(salt, password) -> bytearray(derived key)
+_active = None
+
+
+class Profile:
+    """An unlocked profile: its name, directory and derived key ring."""
+
+    def __init__(self, name, path, key):
+        self.name = name
+        self.path = path
+        self.keyring = MultiFernet([Fernet(bytes(key))])
+        self._key = key
+
+    @property
+    def key(self):
+        return bytes(self._key)
+
+    def data_path(self, default):
+        """Where the file normally at *default* lives for this profile."""
+        return os.path.join(self.path, str(default))
+
+    def __repr__(self):
+        return f"Profile({self.name!r})"
+
+
+def profile_dir(name, root=None):
+    if not _NAME.match(name) or name.strip(".") == "":
+        raise ValueError(f"Invalid profile name {name!r}: use letters, digits and . _ - @ +")
+    return os.path.join(root or PROFILES_DIR, name)
+
+
+def list_profiles(root=None):
+    """Names of the existing profiles, sorted."""
+    root = root or PROFILES_DIR
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in names if os.path.isfile(os.path.join(root, n, PROFILE_FILE)))
+
+
+def _kdf_params():
+    if hasattr(hashlib, "scrypt"):
+        return {"kdf": "scrypt", "n": get_int("profiles", "scrypt_n", DEFAULT_SCRYPT_N),
+                "r": SCRYPT_R, "p": SCRYPT_P}
+    return {"kdf": "pbkdf2-sha256", "iterations": PBKDF2_ITERATIONS}
+
+
+def _derive(password, salt, params):
+    secret = password.encode("utf-8")
+    if params["kdf"] == "scrypt":
+        n, r, p = params["n"], params["r"], params["p"]
+        raw = hashlib.scrypt(secret, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+    elif params["kdf"] == "pbkdf2-sha256":
+        raw = hashlib.pbkdf2_hmac("sha256", secret, salt, params["iterations"], dklen=32)
+    else:
+        raise ValueError(f"Unknown key derivation function {params['kdf']!r}")
+    return bytearray(base64.urlsafe_b64encode(raw))
+
+
+def derive_key(password, salt, params):
+    """Fernet key for *password*; cached for the rest of the session."""
+    tag = hmac.new(_secret, salt + b"\0" + password.encode("utf-8"), hashlib.sha256).digest()
+    with _lock:
+        key = _keys.get(tag)
+    if key is None:
+        key = _derive(password, salt, params)
+        with _lock:
+            key = _keys.setdefault(tag, key)
+    return key
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, PROFILE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"No profile named {os.path.basename(path)!r}.") from None
+
+
+def create_profile(name, password, root=None, params=None):
+    """Create a new profile protected by *password* and return it unlocked."""
+    if not password:
+        raise ValueError("A profile needs a password.")
+    path = profile_dir(name, root)
+    if os.path.exists(os.path.join(path, PROFILE_FILE)):
+        raise ValueError(f"Profile {name!r} already exists.")
+    salt = secrets.token_bytes(16)
+    params = dict(params or _kdf_params())
+    key = derive_key(password, salt, params)
+    meta = {"name": name, "salt": base64.b64encode(salt).decode("ascii"), **params,
+            "check": Fernet(bytes(key)).encrypt(_CHECK).decode("ascii")}
+    os.makedirs(path, exist_ok=True)
+    tmp = os.path.join(path, PROFILE_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(path, PROFILE_FILE))
+    return Profile(name, path, key)
+
+
+def unlock(name, password, root=None):
+    """Return the profile *name* unlocked with *password*.
+
+    Raises ValueError for an unknown profile or a wrong password.
+    """
+    path = profile_dir(name, root)
+    meta = _read_meta(path)
+    salt = base64.b64decode(meta["salt"])
+    key = derive_key(password, salt, meta)
+    try:
+        ok = Fernet(bytes(key)).decrypt(meta["check"].encode("ascii")) == _CHECK
+    except InvalidToken:
+        ok = False
+    if not ok:
+        _forget(key)
+        raise ValueError(f"Wrong password for profile {name!r}.")
+    return Profile(name, path, key)
+
+
+def _forget(key):
+    with _lock:
+        for tag in [t for t, k in _keys.items() if k is key]:
+            del _keys[tag]
+    key[:] = bytes(len(key))
+
+
+def lock(profile):
+    """Drop *profile*'s cached key; it must be unlocked with its password again."""
+    global _active
+    if _active is not None and _active._key is profile._key:
+        _active = None
+    _forget(profile._key)
+
+
+def lock_all():
+    global _active
+    _active = None
+    with _lock:
+        keys = list(_keys.values())
+        _keys.clear()
+    for key in keys:
+        key[:] = bytes(len(key))
+
+
+def activate(profile):
+    """Make *profile* (or None for the shared key.key setup) the active one."""
+    global _active
+    _active = profile
+
+
+def active():
+    return _active
+
+
+def data_path(default):
+    """*default* relocated into the active profile's directory, if any."""
+    return _active.data_path(default) if _active is not None else default
+
+
+def unlock_from_env(prompt=getpass.getpass):
+    """Unlock and activate the profile named by $TRIFLOW_PROFILE, if set.
+
+    Used by the interactive CLIs; returns the profile or None.
+    """
+    name = os.environ.get(PROFILE_ENV)
+    if not name:
+        return None
+    profile = unlock(name, prompt(f"Password for profile {name}: "))
+    activate(profile)
+    return profile
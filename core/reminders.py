@@ -0,0 +1,184 @@
+"""
+Due dates, recurrence and a heap-based reminder scheduler for tasks.
+
+Tasks may carry two optional fields:
+
+    "due_at":     "2025-06-01T09:00:00"   local time, ISO format
+    "recurrence": "daily" | "weekly" | "monthly"
+
+ReminderScheduler keeps pending reminders in a min-heap keyed by due time,
+so finding the next reminder is O(1) and adding, completing or editing a
+task is O(log n).  Edits don't search the heap: the old entry is left in
+place and skipped when it reaches the top (lazy deletion), and the heap is
+rebuilt if stale entries pile up.
+
+The GUIs arm a single one-shot timer (QTimer / Tk ``after``) for
+delay_seconds() and call pop_due() when it fires, instead of scanning
+every task periodically.
+"""
+
+import calendar
+import heapq
+from datetime import datetime, timedelta
+
+RECURRENCES = ("daily", "weekly", "monthly")
+# Hour used when a due date is given without a time.
+DEFAULT_DUE_HOUR = 9
+# Longest single timer wait; re-arming this often also absorbs clock changes
+# and sleep/resume without a periodic scan.
+MAX_SLEEP = 3600
+
+
+def parse_due(text):
+    """Parse "YYYY-MM-DD" or "YYYY-MM-DD HH:MM" into an ISO due_at string.
+
+    Returns None for blank input; raises ValueError for anything else.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(text, fmt).isoformat()
+        except ValueError:
+            pass
+    day = datetime.strptime(text, "%Y-%m-%d")
+    return day.replace(hour=DEFAULT_DUE_HOUR).isoformat()
+
+
+def parse_recurrence(text):
+    """Validate a recurrence name; blank means none."""
+    text = (text or "").strip().lower()
+    if not text:
+        return None
+    if text not in RECURRENCES:
+        raise ValueError(f"Recurrence must be one of: {', '.join(RECURRENCES)}.")
+    return text
+
+
+def format_due(task):
+    """Short display form, e.g. "2025-06-01 09:00 ↻" (empty if no due date)."""
+    due = task.get("due_at")
+    if not due:
+        return ""
+    return due[:16].replace("T", " ") + (" ↻" if task.get("recurrence") else "")
+
+
+def _add_months(when, months):
+    month = when.month - 1 + months
+    year, month = when.year + month // 12, month % 12 + 1
+    day = min(when.day, calendar.monthrange(year, month)[1])
+    return when.replace(year=year, month=month, day=day)
+
+
+def next_occurrence(due_at, recurrence, after):
+    """First occurrence of a recurring due time strictly after *after*."""
+    when = datetime.fromisoformat(due_at)
+    if recurrence in ("daily", "weekly"):
+        step = timedelta(days=1 if recurrence == "daily" else 7)
+        if when <= after:
+            # Skip missed occurrences arithmetically rather than one by one.
+            when += step * ((after - when) // step + 1)
+        return when.isoformat()
+    if recurrence == "monthly":
+        n = 1
+        start = when
+        while when <= after:
+            when = _add_months(start, n)
+            n += 1
+        return when.isoformat()
+    raise ValueError(f"Unknown recurrence: {recurrence!r}")
+
+
+def advance(task, now):
+    """Move a recurring task's due_at past *now*.  Returns True if changed."""
+    if not task.get("recurrence") or not task.get("due_at"):
+        return False
+    task["due_at"] = next_occurrence(task["due_at"], task["recurrence"], now)
+    return True
+
+
+class ReminderScheduler:
+    """Min-heap of (due time, task id) for pending tasks with a due date."""
+
+    def __init__(self, tasks=()):
+        self._heap = []
+        self._due = {}  # task id -> due datetime of its live heap entry
+        self.load(tasks)
+
+    def __len__(self):
+        return len(self._due)
+
+    def load(self, tasks):
+        """Replace the schedule with every pending, dated task in *tasks*."""
+        self._due = {t["id"]: datetime.fromisoformat(t["due_at"])
+                     for t in tasks if t.get("due_at") and not t.get("completed")}
+        self._heap = [(due, tid) for tid, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def update(self, task):
+        """Reschedule *task* after it was added, edited or completed."""
+        if not task.get("due_at") or task.get("completed"):
+            self.cancel(task["id"])
+            return
+        due = datetime.fromisoformat(task["due_at"])
+        if self._due.get(task["id"]) == due:
+            return
+        self._due[task["id"]] = due
+        heapq.heappush(self._heap, (due, task["id"]))
+        self._compact()
+
+    def cancel(self, task_id):
+        if self._due.pop(task_id, None) is not None:
+            self._compact()
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due, tid) for tid, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def next_due(self):
+        """Due time of the next reminder, or None if nothing is scheduled."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def delay_seconds(self, now):
+        """Seconds to wait before the next pop_due() (None: nothing scheduled)."""
+        due = self.next_due()
+        if due is None:
+            return None
+        return min(max((due - now).total_seconds(), 0.0), MAX_SLEEP)
+
+    def pop_due(self, now):
+        """Remove and return the ids of every task due at or before *now*."""
+        ids = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return ids
+            _, tid = heapq.heappop(self._heap)
+            del self._due[tid]
+            ids.append(tid)
+
+
+def fire_due(scheduler, tasks, now):
+    """Pop the reminders due at *now* and return the matching tasks.
+
+    Recurring tasks are advanced to their next occurrence and rescheduled;
+    the second return value says whether any task changed and needs saving.
+    """
+    ids = set(scheduler.pop_due(now))
+    if not ids:
+        return [], False
+    due = [t for t in tasks if t["id"] in ids]
+    changed = False
+    for task in due:
+        if advance(task, now):
+            scheduler.update(task)
+            changed = True
+    return due, changed
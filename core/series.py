@@ -0,0 +1,149 @@
+"""
+Pre-aggregated spending series and downsampling for charts.
+
+SpendSeries folds expenses into one total per day (sorted day ordinals
+with parallel totals) once, and then keeps it current as expenses are
+added or removed: an add or delete touches a single day, and the running
+(cumulative) totals are only recomputed from that day onwards -- O(1) for
+the usual case of an expense dated today.  Weekly and monthly series are
+derived from the daily totals, never from the raw expenses.
+
+Years of daily data still hold far more points than a chart has pixels,
+so series are reduced to about one point per pixel before drawing:
+
+- lttb() (Largest-Triangle-Three-Buckets) keeps the visual shape of smooth
+  lines such as the cumulative total;
+- min_max() keeps each bucket's lowest and highest point, so single spikes
+  in per-period spend are never averaged away.
+"""
+
+from bisect import bisect_left
+from datetime import date
+
+PERIODS = ("day", "week", "month")
+
+
+def _period_start(ordinal, period):
+    if period == "day":
+        return ordinal
+    if period == "week":
+        return ordinal - date.fromordinal(ordinal).weekday()
+    return date.fromordinal(ordinal).replace(day=1).toordinal()
+
+
+class SpendSeries:
+    """Per-day spend totals kept sorted by day, with lazily extended running totals."""
+
+    def __init__(self, records=()):
+        per_day = {}
+        for r in records:
+            day = date.fromisoformat(r["date"][:10]).toordinal()
+            total, count = per_day.get(day, (0.0, 0))
+            per_day[day] = (total + r["amount"], count + 1)
+        self.days = sorted(per_day)
+        self.totals = [per_day[d][0] for d in self.days]
+        self._counts = [per_day[d][1] for d in self.days]
+        self._cumulative = []
+        self.version = 0
+
+    def __len__(self):
+        return len(self.days)
+
+    def _changed(self, i):
+        # Running totals before day index i are still valid.
+        del self._cumulative[i:]
+        self.version += 1
+
+    def add(self, record):
+        day = date.fromisoformat(record["date"][:10]).toordinal()
+        i = bisect_left(self.days, day)
+        if i < len(self.days) and self.days[i] == day:
+            self.totals[i] += record["amount"]
+            self._counts[i] += 1
+        else:
+            self.days.insert(i, day)
+            self.totals.insert(i, record["amount"])
+            self._counts.insert(i, 1)
+        self._changed(i)
+
+    def remove(self, record):
+        day = date.fromisoformat(record["date"][:10]).toordinal()
+        i = bisect_left(self.days, day)
+        if i == len(self.days) or self.days[i] != day:
+            return
+        self._counts[i] -= 1
+        if self._counts[i] <= 0:
+            del self.days[i], self.totals[i], self._counts[i]
+        else:
+            self.totals[i] -= record["amount"]
+        self._changed(i)
+
+    def cumulative(self):
+        """(days, running total) for every day with spending."""
+        cum = self._cumulative
+        running = cum[-1] if cum else 0.0
+        for total in self.totals[len(cum):]:
+            running += total
+            cum.append(running)
+        return self.days, cum
+
+    def per_period(self, period):
+        """(period start ordinals, spend per period) for "day", "week" or "month"."""
+        if period == "day":
+            return self.days, self.totals
+        xs, ys = [], []
+        for day, total in zip(self.days, self.totals):
+            start = _period_start(day, period)
+            if xs and xs[-1] == start:
+                ys[-1] += total
+            else:
+                xs.append(start)
+                ys.append(total)
+        return xs, ys
+
+
+def lttb(xs, ys, threshold):
+    """Downsample to *threshold* points with Largest-Triangle-Three-Buckets."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+    every = (n - 2) / (threshold - 2)
+    out_x, out_y = [xs[0]], [ys[0]]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex.
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+        ax, ay = xs[a], ys[a]
+        best, best_area = int(i * every) + 1, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out_x.append(xs[best])
+        out_y.append(ys[best])
+        a = best
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+
+def min_max(xs, ys, buckets):
+    """Keep the lowest and highest point of each of *buckets* equal-size buckets."""
+    n = len(xs)
+    if buckets <= 0 or n <= 2 * buckets:
+        return list(xs), list(ys)
+    out_x, out_y = [], []
+    size = n / buckets
+    for b in range(buckets):
+        start, end = int(b * size), int((b + 1) * size)
+        chunk = ys[start:end]
+        lo = start + chunk.index(min(chunk))
+        hi = start + chunk.index(max(chunk))
+        for j in sorted({lo, hi}):
+            out_x.append(xs[j])
+            out_y.append(ys[j])
+    return out_x, out_y
@@ -0,0 +1,493 @@
+"""
+Encrypted record files with a precomputed summary block.
+
+A store file is a short text container, one item per line:
+
+    TRIFLOW2
+    <crc32> <manifest JSON>
+    <summary token>
+    <records token: records 0..SEGMENT_RECORDS-1>
+    <records token: next SEGMENT_RECORDS records>
+    ...
+
+The summary is a tiny, separately encrypted JSON object maintained on every
+write (record count, completed count, total spent, min/max date, max id and
+a data version), so totals and counters can be shown by decrypting a few
+hundred bytes instead of the whole record payload.  Budget summaries also
+carry spend per day and category for the last RECENT_DAYS days, which is
+all that budget limits (see core.limits) need.
+
+Splitting records into segments lets large stores be decrypted and parsed
+on several cores: above PARALLEL_MIN_BYTES of payload (and with more than
+one CPU) segments are handed to a shared ProcessPoolExecutor and merged
+back in order.  Small stores stay in-process, where a pool round trip
+would cost more than it saves.
+
+The manifest records a SHA-256 digest, record count and id range for each
+segment, so damage is contained to single segments:
+
+- verify() checks segment digests against the manifest without decrypting
+  anything; verify_stores() skips files unchanged since their last clean
+  check.
+- read_records() loads every intact segment.  Damaged segments are
+  refilled from the newest rolling backup that still holds their id range,
+  and a copy of the damaged file is kept under ``quarantine/``.
+- Every write first snapshots the previous file into ``backups/`` (a hard
+  link, so it costs no copying), keeping the last BACKUPS versions.
+- The snapshot and the final replace happen under the file's lock
+  (core.filelock), so key rotation never overwrites a save.
+
+Files from earlier versions (``TRIFLOW1`` without a manifest, or a single
+bare token) are still read; they gain a manifest on their next save.
+"""
+
+import binascii
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from itertools import repeat
+
+from cryptography.fernet import InvalidToken
+
+from . import filelock, metrics, timeline as _timeline
+from .config import get_int
+from .utils import encrypt_data, encrypt_json, decrypt_data
+
+MAGIC = b"TRIFLOW2"
+LEGACY_MAGIC = b"TRIFLOW1"
+# Records per encrypted segment.
+SEGMENT_RECORDS = 5000
+# Payloads smaller than this are decrypted in-process.
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+# Rolling snapshots kept per file (``[storage] backups`` in config.ini).
+DEFAULT_BACKUPS = 3
+# Days of per-day spend kept in budget summaries; covers any current
+# day/week/month period even if nothing is saved for a month.
+RECENT_DAYS = 62
+
+log = logging.getLogger(__name__)
+
+_executor = None
+
+
+def recent_day_totals(records, since):
+    """Spend per day on or after *since*: ``{day: {"*": total, tag: total}}``."""
+    days = {}
+    for r in records:
+        day = r.get("date", "")[:10]
+        if day < since:
+            continue
+        totals = days.setdefault(day, {})
+        for name in ("*", *(r.get("tags") or ())):
+            totals[name] = totals.get(name, 0.0) + r["amount"]
+    return {day: {name: round(total, 2) for name, total in totals.items()} for day, totals in days.items()}
+
+
+def summarize(records, kind, data_version=0):
+    """Compute the summary block for *records* of *kind* ('tasks' or 'budgets')."""
+    if kind == "tasks":
+        dates = [r["created_at"][:10] for r in records if r.get("created_at")]
+    else:
+        dates = [r["date"] for r in records if r.get("date")]
+    summary = {
+        "kind": kind,
+        "count": len(records),
+        "max_id": max((r["id"] for r in records), default=0),
+        "min_date": min(dates, default=None),
+        "max_date": max(dates, default=None),
+        "data_version": data_version,
+    }
+    if kind == "tasks":
+        summary["completed"] = sum(1 for r in records if r.get("completed"))
+        summary["min_completed_date"] = min(
+            (r["created_at"][:10] for r in records if r.get("completed") and r.get("created_at")),
+            default=None)
+    else:
+        summary["total_spent"] = round(sum(r["amount"] for r in records), 2)
+        since = (date.today() - timedelta(days=RECENT_DAYS)).isoformat()
+        summary["recent_days"] = recent_day_totals(records, since)
+    return summary
+
+
+def _digest(token):
+    return hashlib.sha256(token).hexdigest()[:32]
+
+
+def _encode_manifest(manifest):
+    body = json.dumps(manifest, separators=(",", ":")).encode()
+    return b"%08x " % binascii.crc32(body) + body
+
+
+def _decode_manifest(line):
+    crc, _, body = line.partition(b" ")
+    try:
+        if int(crc, 16) != binascii.crc32(body):
+            return None
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def _parse(data):
+    """Split file contents into (manifest or None, summary token or None, segment tokens).
+
+    Segment tokens are returned in manifest order, with None for segments
+    whose digest matches no line in the file (i.e. damaged ones).
+    """
+    lines = [ln for ln in data.splitlines() if ln]
+    structured = bool(lines) and lines[0] in (MAGIC, LEGACY_MAGIC)
+    manifest, tokens = None, []
+    for i, ln in enumerate(lines):
+        if ln in (MAGIC, LEGACY_MAGIC):
+            continue
+        if i == 1 and lines[0] == MAGIC:
+            manifest = _decode_manifest(ln)
+            continue
+        tokens.append(ln)
+    if manifest is not None:
+        by_digest = {_digest(t): t for t in tokens}
+        summary = by_digest.get(manifest["summary"])
+        segments = [by_digest.get(seg["sha256"]) for seg in manifest["segments"]]
+        return manifest, summary, segments
+    if structured:
+        return None, (tokens[0] if tokens else None), tokens[1:]
+    return None, None, tokens
+
+
+def _read_file(path):
+    with metrics.timer("file_read"), open(path, "rb") as f:
+        data = f.read()
+    metrics.count("bytes_read", len(data))
+    return data
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        # forkserver/spawn children start clean, so forking a GUI process
+        # with live threads is never an issue.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context)
+    return _executor
+
+
+def _use_pool(parallel, size):
+    if parallel is not None:
+        return parallel
+    return (os.cpu_count() or 1) > 1 and size >= PARALLEL_MIN_BYTES
+
+
+def _map_segments(fn, items, key, parallel):
+    """Apply fn(item, key) to every item, in a process pool if *parallel*."""
+    global _executor
+    if parallel and len(items) > 1:
+        try:
+            return list(_pool().map(fn, items, repeat(key)))
+        except (BrokenProcessPool, OSError):
+            _executor = None
+    return [fn(item, key) for item in items]
+
+
+def _decrypt_segment(token, key):
+    return decrypt_data(token, key)
+
+
+def _try_decrypt_segment(token, key):
+    """Decrypt a segment that has no manifest digest to vouch for it."""
+    try:
+        return decrypt_data(token, key)
+    except (InvalidToken, ValueError):
+        return None
+
+
+def _encrypt_segment(records, key):
+    """(token, digest of the plaintext); the timeline skips segments whose digest it has seen."""
+    raw = json.dumps(records).encode()
+    return encrypt_json(raw, key), hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def _load_segments(path, key, parallel=None):
+    """Decrypt every intact segment of *path*.
+
+    Returns (manifest, list of record lists with None for damaged segments).
+    With a manifest, a segment whose digest matches but fails to decrypt
+    means a wrong key rather than damage, so InvalidToken is raised.
+    """
+    data = _read_file(path)
+    manifest, _, tokens = _parse(data)
+    intact = [t for t in tokens if t is not None]
+    use_pool = _use_pool(parallel, sum(len(t) for t in intact))
+    fn = _decrypt_segment if manifest is not None else _try_decrypt_segment
+    decrypted = iter(_map_segments(fn, intact, key, use_pool))
+    segments = [next(decrypted) if t is not None else None for t in tokens]
+    if not segments and manifest is None:
+        segments = [None]
+    return manifest, segments, data
+
+
+def backup_paths(path):
+    """Rolling snapshots of *path*, newest first."""
+    folder = os.path.join(os.path.dirname(str(path)), "backups")
+    name = os.path.basename(str(path))
+    return [os.path.join(folder, f"{name}.{n}") for n in range(1, get_int("storage", "backups", DEFAULT_BACKUPS) + 1)]
+
+
+def _snapshot(path):
+    """Rotate the backups of *path* and link the current file in as the newest."""
+    backups = backup_paths(path)
+    if not backups or not os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(backups[0]), exist_ok=True)
+    for older, newer in zip(reversed(backups), list(reversed(backups))[1:]):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+    try:
+        os.link(path, backups[0])
+    except OSError:
+        shutil.copy2(path, backups[0])
+
+
+def quarantine(path, data):
+    """Keep a copy of damaged file contents under ``quarantine/``.  Returns its path."""
+    folder = os.path.join(os.path.dirname(str(path)), "quarantine")
+    target = os.path.join(folder, f"{os.path.basename(str(path))}.{_digest(data)[:12]}.corrupt")
+    if not os.path.exists(target):
+        os.makedirs(folder, exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+    return target
+
+
+def _refill_from_backups(path, key, manifest, bad):
+    """Records for the damaged segments *bad*, taken from the newest backup holding them."""
+    refill = {}
+    ranges = {i: (manifest["segments"][i]["first_id"], manifest["segments"][i]["last_id"]) for i in bad}
+    for backup in backup_paths(path):
+        if not ranges or not os.path.exists(backup):
+            continue
+        try:
+            _, segments, _ = _load_segments(backup, key)
+        except (InvalidToken, ValueError, OSError):
+            continue
+        old = [r for seg in segments if seg for r in seg]
+        for i, (lo, hi) in list(ranges.items()):
+            found = [r for r in old if lo <= r["id"] <= hi]
+            if found:
+                refill[i] = found
+                del ranges[i]
+    return refill
+
+
+def recover(path, key):
+    """Load *path* tolerating damaged segments.
+
+    Returns ``(records, report)`` where report lists the damaged segment
+    indexes, how many of them were refilled from backups, the records
+    lost, and the quarantine copy (if any).
+    """
+    manifest, segments, data = _load_segments(path, key)
+    bad = [i for i, seg in enumerate(segments) if seg is None]
+    report = {"path": str(path), "segments": len(segments), "bad": bad,
+              "refilled": [], "lost_records": 0, "quarantined": None}
+    if bad:
+        report["quarantined"] = quarantine(path, data)
+        if manifest is not None:
+            refill = _refill_from_backups(path, key, manifest, bad)
+            for i in bad:
+                segments[i] = refill.get(i)
+            report["refilled"] = sorted(refill)
+            report["lost_records"] = sum(manifest["segments"][i]["records"] for i in bad if i not in refill)
+        log.warning("Store %s: %d damaged segment(s), %d refilled from backups, copy kept at %s",
+                    path, len(bad), len(report["refilled"]), report["quarantined"])
+    records = []
+    for seg in segments:
+        if seg:
+            records.extend(seg)
+    return records, report
+
+
+@metrics.timed("read_records")
+def read_records(path, key, parallel=None):
+    """Decrypt and return the record list stored at *path* ([] if missing).
+
+    Damaged segments do not fail the read: intact ones are returned and
+    the damaged ones are refilled from backups where possible (see
+    recover()).  *parallel* forces (True) or disables (False) the process
+    pool; by default it is used for payloads of at least PARALLEL_MIN_BYTES.
+    """
+    if not os.path.exists(path):
+        return []
+    manifest, segments, _ = _load_segments(path, key, parallel)
+    if any(seg is None for seg in segments):
+        records, _ = recover(path, key)
+    else:
+        records = [r for seg in segments for r in seg]
+    metrics.count("records_read", len(records))
+    return records
+
+
+def verify(path, key=None):
+    """Check the integrity of *path* without decrypting records.
+
+    Compares each segment against its manifest digest; with *key*, also
+    decrypts the summary and segments (a deep check, needed for files
+    without a manifest).  Returns a report dict with ``ok`` and ``bad``.
+    """
+    data = _read_file(path)
+    manifest, summary, tokens = _parse(data)
+    if manifest is None and key is None:
+        return {"path": str(path), "ok": None, "bad": [], "manifest": False,
+                "segments": len(tokens), "summary_ok": summary is not None}
+    bad = [i for i, t in enumerate(tokens) if t is None]
+    if key is not None:
+        bad = [i for i, t in enumerate(tokens) if t is None or _try_decrypt_segment(t, key) is None]
+    summary_ok = summary is not None
+    return {"path": str(path), "ok": not bad and summary_ok, "bad": bad, "manifest": manifest is not None,
+            "segments": len(tokens), "summary_ok": summary_ok}
+
+
+def verify_stores(paths, cache_file=None, key=None):
+    """Verify several stores, skipping files unchanged since their last clean check.
+
+    Clean results are remembered in *cache_file* (JSON) by mtime and size.
+    Returns the reports of the files that were actually checked.
+    """
+    cache = {}
+    if cache_file and os.path.exists(cache_file):
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    reports = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        st = os.stat(path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        if cache.get(str(path)) == stamp:
+            continue
+        report = verify(path, key)
+        reports.append(report)
+        if report["ok"]:
+            cache[str(path)] = stamp
+        else:
+            cache.pop(str(path), None)
+    if cache_file:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    return reports
+
+
+def rewrite_tokens(data, fn):
+    """Return file contents with *fn* applied to every token, manifest updated.
+
+    Used by key rotation, also on line logs holding ``<prefix> <token>``
+    lines (undo journals, timeline logs).  Damaged segments (lines matching
+    no digest in the manifest) are passed through byte for byte, so
+    recover() still finds them damaged and quarantines the original bytes.
+    """
+    manifest = _parse(data)[0]
+    lines = [ln for ln in data.splitlines() if ln]
+    if manifest is None:
+        out = []
+        for line in lines:
+            prefix, token = _split_token(line)
+            out.append(prefix + fn(token) if token else line)
+        return b"\n".join(out) + b"\n"
+    intact = {manifest["summary"], *(seg["sha256"] for seg in manifest["segments"])}
+    renamed, body = {}, []
+    for line in lines[2:]:
+        digest = _digest(line)
+        if digest in intact:
+            line = fn(line)
+            renamed[digest] = _digest(line)
+        body.append(line)
+    manifest["summary"] = renamed.get(manifest["summary"], manifest["summary"])
+    for seg in manifest["segments"]:
+        seg["sha256"] = renamed.get(seg["sha256"], seg["sha256"])
+    return b"\n".join([MAGIC, _encode_manifest(manifest)] + body) + b"\n"
+
+
+def _split_token(line):
+    """``(prefix, token)`` of a line ending in an encrypted token, else ``(line, None)``."""
+    head, sep, token = line.rpartition(b" ")
+    return (head + sep, token) if token.startswith(b"gA") else (line, None)
+
+
+def iter_tokens(data):
+    """Every encrypted token in file contents, as rewrite_tokens() finds them."""
+    for line in data.splitlines():
+        token = _split_token(line)[1]
+        if token:
+            yield token
+
+
+def read_summary(path, key, kind):
+    """Return the summary for the store at *path* without decrypting its records.
+
+    Legacy single-token files (and files whose summary token is damaged)
+    fall back to summarising the records.
+    """
+    if not os.path.exists(path):
+        return summarize([], kind)
+    summary_token = _parse(_read_file(path))[1]
+    if summary_token is None:
+        # Legacy file or damaged summary: rebuild it from the records.
+        return summarize(read_records(path, key), kind)
+    return decrypt_data(summary_token, key)
+
+
+@metrics.timed("write_records")
+def write_records(path, records, key, kind, parallel=None, timeline=None):
+    """Encrypt *records* and their summary and atomically replace *path*.
+
+    Records are written in segments of SEGMENT_RECORDS; large stores are
+    encrypted in the process pool (see read_records for *parallel*).
+    Hot files pass *timeline*, the reason for the save ("save",
+    "archive", ...), to log the change for point-in-time views (see
+    core.timeline).
+    """
+    version = 0
+    if os.path.exists(path):
+        try:
+            version = read_summary(path, key, kind).get("data_version", 0)
+        except Exception:
+            version = 0
+    summary = summarize(records, kind, version + 1)
+    chunks = [records[i:i + SEGMENT_RECORDS] for i in range(0, len(records), SEGMENT_RECORDS)] or [[]]
+    # Roughly 100 bytes of JSON per record before compression.
+    use_pool = _use_pool(parallel, len(records) * 100)
+    encrypted = _map_segments(_encrypt_segment, chunks, key, use_pool)
+    tokens = [token for token, _ in encrypted]
+    summary_token = encrypt_data(summary, key)
+    manifest = {
+        "summary": _digest(summary_token),
+        "segments": [{"sha256": _digest(token), "records": len(chunk),
+                      "first_id": min((r["id"] for r in chunk), default=0),
+                      "last_id": max((r["id"] for r in chunk), default=0)}
+                     for token, chunk in zip(tokens, chunks)],
+    }
+    blob = b"\n".join([MAGIC, _encode_manifest(manifest), summary_token] + tokens) + b"\n"
+    parent = os.path.dirname(str(path))
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with metrics.timer("file_write"):
+        with open(tmp, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        with filelock.locked(path):
+            _snapshot(path)
+            os.replace(tmp, path)
+    metrics.count("bytes_written", len(blob))
+    metrics.count("records_written", len(records))
+    if timeline:
+        with metrics.timer("timeline_record"):
+            _timeline.record(path, records, key, timeline, segments=[(digest, chunk) for (_, digest), chunk in zip(encrypted, chunks)])
+    return summary
@@ -1,23 +1,145 @@
-import os
 from datetime import datetime
-from .utils import load_key, encrypt_data, decrypt_data
+from . import daemon, reminders, tags
+
+# storage, archive, profiles and undo pull in cryptography and the rest of
+# the storage stack, so they are imported where used: a CLI served by the
+# warm daemon (see core.daemon) never needs them.
 
 DATA_FILE = 'data/tasks.json.enc'
 
+def data_file():
+    """The tasks file, inside the active profile's directory if there is one."""
+    from . import profiles
+    return profiles.data_path(DATA_FILE)
+
 def load_tasks(key):
-    if not os.path.exists(DATA_FILE):
-        return []
-    with open(DATA_FILE, 'rb') as f:
-        enc_data = f.read()
-    return decrypt_data(enc_data, key)
+    from . import storage
+    return storage.read_records(data_file(), key)
 
 def save_tasks(tasks, key):
-    with open(DATA_FILE, 'wb') as f:
-        f.write(encrypt_data(tasks, key))
+    from . import storage
+    storage.write_records(data_file(), tasks, key, 'tasks', timeline='save')
+
+def read_summary(key):
+    """Counters for all tasks, archived ones included, without loading records."""
+    from . import archive
+    return archive.combined_summary(data_file(), key, 'tasks')
+
+def next_id(key, tasks=()):
+    """Id for a new task; archived ids and unsaved *tasks* count (see archive.next_id)."""
+    from . import archive
+    return archive.next_id(read_summary(key), tasks)
+
+def archive_old_tasks(key):
+    """Move old completed tasks into monthly archive segments (see core.archive)."""
+    from . import archive
+    return archive.archive_records(data_file(), key, 'tasks')
+
+def load_history(key):
+    """Undo/redo log for the tasks file (see core.undo)."""
+    from . import undo
+    return undo.UndoLog(undo.journal_path(data_file()), key)
+
+def archived_months():
+    from . import archive
+    return archive.list_months(data_file())
+
+def load_archived_tasks(key, month):
+    from . import archive
+    return archive.load_month(data_file(), key, month)
+
+def load_tasks_as_of(key, when):
+    """The tasks as they were at *when* (see core.timeline)."""
+    from . import timeline
+    return timeline.as_of(data_file(), key, when)
+
+def diff_tasks(key, start, end):
+    from . import timeline
+    return timeline.diff(data_file(), key, start, end)
+
+def open_store():
+    """The tasks collection for the CLI.
+
+    Served from memory by the warm daemon when one is running for this
+    directory and profile; otherwise read from the file, after unlocking
+    $TRIFLOW_PROFILE and archiving old tasks.
+    """
+    store = daemon.connect('tasks')
+    if store is None:
+        from . import profiles
+        from .utils import load_keyring
+        profiles.unlock_from_env()
+        store = daemon.LocalCollection(data_file(), 'tasks', load_keyring())
+        store.archive_old()
+    return store
+
+def print_tasks(tasks):
+    print(f"{'ID':>3} | {'Description':<25} | {'Status':<10} | {'Created':<10} | {'Due':<18} | {'Tags'}")
+    print("-" * 100)
+    for t in tasks:
+        status = "✅ Done" if t["completed"] else "❌ Pending"
+        print(f"{t['id']:>3} | {t['description']:<25} | {status:<10} | {t['created_at'][:10]:<10} | "
+              f"{reminders.format_due(t):<18} | {tags.format_tags(t)}")
+
+def filter_by_tags(tasks):
+    index = tags.TagIndex(tasks)
+    for tag, count in index.tags():
+        print(f"{tag}: {count}")
+    query = input("Tag query (e.g. home AND NOT someday): ")
+    try:
+        found = index.select(tasks, query)
+    except ValueError as e:
+        print(e)
+        return
+    if found:
+        print_tasks(found)
+    else:
+        print("No matching tasks.")
+
+def print_due_reminders(tasks):
+    """Report tasks that are due, advancing recurring ones.  Returns True if tasks changed."""
+    due, changed = reminders.fire_due(reminders.ReminderScheduler(tasks), tasks, datetime.now())
+    for t in due:
+        print(f"⏰ Reminder: task {t['id']} \"{t['description']}\" is due.")
+    return changed
+
+def ask_due():
+    """Prompt for an optional due date and recurrence.  Returns (due_at, recurrence)."""
+    try:
+        due_at = reminders.parse_due(input("Due date (YYYY-MM-DD [HH:MM], blank for none): "))
+        if due_at is None:
+            return None, None
+        return due_at, reminders.parse_recurrence(input("Repeat (daily/weekly/monthly, blank for none): "))
+    except ValueError as e:
+        print(f"Ignoring due date: {e}")
+        return None, None
+
+def view_archive(store):
+    months = dict(store.months())
+    if not months:
+        print("No archived tasks.")
+        return
+    for month, summary in months.items():
+        print(f"{month}: {summary['count']} tasks")
+    query = input("Enter a month (YYYY-MM) or text to search: ").strip()
+    if query in months:
+        found = store.archived(query)
+    else:
+        found = store.search_archive(query)
+    if found:
+        print_tasks(found)
+    else:
+        print("No archived tasks found.")
 
 def run_cli():
-    key = load_key()
-    tasks = load_tasks(key)
+    try:
+        store = open_store()
+    except ValueError as e:
+        print(e)
+        return
+    tasks = store.load()
+    if print_due_reminders(tasks):
+        store.save(tasks)
     while True:
         print("\nWelcome to Task Tracker!")
         print("1. View tasks")
@@ -25,34 +147,38 @@ def run_cli():
         print("3. Mark task as complete")
         print("4. Delete task")
         print("5. Edit task description")
-        print("6. Exit")
+        print("6. View archive")
+        print("7. Filter by tags")
+        print("8. Exit")
         choice = input("Choose an option: ")
         if choice == '1':
             if not tasks:
                 print("No tasks found.")
             else:
-                # Print header
-                print(f"{'ID':>3} | {'Description':<25} | {'Status':<10} | {'Created'}")
-                print("-" * 60)
-                for t in tasks:
-                    status = "✅ Done" if t["completed"] else "❌ Pending"
-                    print(f"{t['id']:>3} | {t['description']:<25} | {status:<10} | {t['created_at'][:10]}")
-                total = len(tasks)
-                done = sum(1 for t in tasks if t["completed"])
-                print(f"\n{done}/{total} tasks completed.")
+                print_tasks(tasks)
+                summary = store.summary()
+                print(f"\n{summary['completed']}/{summary['count']} tasks completed.")
         elif choice == '2':
             desc = input("Enter task description: ").strip()
             if not desc:
                 print("Task description cannot be empty.")
                 continue
             task = {
-                "id": (tasks[-1]["id"] + 1) if tasks else 1,
+                "id": store.next_id(),
                 "description": desc,
                 "completed": False,
                 "created_at": datetime.now().isoformat()
             }
+            due_at, recurrence = ask_due()
+            if due_at:
+                task["due_at"] = due_at
+            if recurrence:
+                task["recurrence"] = recurrence
+            task_tags = tags.parse_tags(input("Tags (comma-separated, blank for none): "))
+            if task_tags:
+                task["tags"] = task_tags
             tasks.append(task)
-            save_tasks(tasks, key)
+            store.save(tasks)
             print("Task added!")
         elif choice == '3':
             try:
@@ -68,7 +194,7 @@ def run_cli():
                     print("Task marked complete!")
             if not found:
                 print("Task not found.")
-            save_tasks(tasks, key)
+            store.save(tasks)
         elif choice == '4':
             try:
                 tid = int(input("Enter task id to delete: "))
@@ -78,7 +204,7 @@ def run_cli():
             orig_len = len(tasks)
             tasks = [t for t in tasks if t["id"] != tid]
             if len(tasks) < orig_len:
-                save_tasks(tasks, key)
+                store.save(tasks)
                 print("Task deleted!")
             else:
                 print("Task not found.")
@@ -99,8 +225,12 @@ def run_cli():
                     break
             else:
                 print("Task not found.")
-            save_tasks(tasks, key)
+            store.save(tasks)
         elif choice == '6':
+            view_archive(store)
+        elif choice == '7':
+            filter_by_tags(tasks)
+        elif choice == '8':
             break
         else:
             print("Invalid option.")
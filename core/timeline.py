@@ -0,0 +1,297 @@
+"""
+Point-in-time views of a store, from a change log with periodic checkpoints.
+
+Saving a hot data file with ``storage.write_records(..., timeline=reason)``
+also records what changed in a timeline directory next to it:
+
+    data/tasks.json.enc.timeline/
+        000001-20250601T091500.ckpt    every record as of that moment
+        000001.log                     changes made after checkpoint 1
+        000002-20250614T180210.ckpt
+        000002.log
+        tip                            digests of the current records
+
+Each save appends one line to the current log: its timestamp and an
+encrypted entry holding the records added or changed and the ids removed.
+They are found by comparing per-record digests with ``tip``, so an edit
+costs the changed records, not a copy of the file.  storage hands over a
+digest of each segment it wrote; segments ``tip`` already holds are not
+compared (or hashed) record by record, and the tip last written by this
+process is reused rather than decrypted again.  The log and tip are
+fsynced before they replace anything, as store files are.  After
+``[timeline] checkpoint_every`` saves the full state is written as a new
+(compressed) checkpoint and a new log starts.  Rebuilding the state at any
+moment therefore decrypts one checkpoint and replays at most one interval
+of log lines; timestamps are kept in the clear so lines after the moment
+asked for are skipped without decrypting them.
+
+Key rotation re-encrypts these files with their store (timeline_files()).
+
+as_of() returns the records the app showed at the time (the hot file's).
+Removals made by the archiver are recorded as such, so diff() can tell an
+archived record from a deleted one.  Intervals that ended more than
+``[timeline] keep_days`` ago are pruned when a checkpoint is written.
+"""
+
+import hashlib
+import json
+import os
+from datetime import date, datetime, time, timedelta
+
+from . import filelock
+from .config import get_int
+from .utils import encrypt_data, decrypt_data
+
+TIMELINE_SUFFIX = ".timeline"
+TIP_FILE = "tip"
+STAMP = "%Y%m%dT%H%M%S"
+DEFAULT_CHECKPOINT_EVERY = 100
+DEFAULT_KEEP_DAYS = 365
+ARCHIVE = "archive"
+
+
+def timeline_dir(path):
+    return str(path) + TIMELINE_SUFFIX
+
+
+def timeline_files(path):
+    """Every file of the timeline of the store at *path* (checkpoints, logs, tip)."""
+    directory = timeline_dir(path)
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in names
+            if name == TIP_FILE or name.endswith((".ckpt", ".log"))]
+
+
+def _digest(record):
+    return hashlib.blake2b(json.dumps(record, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def parse_moment(text):
+    """ISO date-time string for ``YYYY-MM-DD[THH:MM[:SS]]``; a bare date means the end of that day."""
+    text = text.strip()
+    try:
+        if len(text) == 10:
+            return datetime.combine(date.fromisoformat(text), time.max).isoformat(timespec="seconds")
+        return datetime.fromisoformat(text).isoformat(timespec="seconds")
+    except ValueError:
+        raise ValueError(f"Invalid date {text!r}: use YYYY-MM-DD or YYYY-MM-DD HH:MM.") from None
+
+
+def _moment(when):
+    if isinstance(when, datetime):
+        return when.isoformat(timespec="seconds")
+    if isinstance(when, date):
+        return datetime.combine(when, time.max).isoformat(timespec="seconds")
+    return parse_moment(when)
+
+
+def checkpoints(path):
+    """``(seq, ISO time)`` of every checkpoint of the store at *path*, oldest first."""
+    try:
+        names = os.listdir(timeline_dir(path))
+    except FileNotFoundError:
+        return []
+    found = []
+    for name in names:
+        if name.endswith(".ckpt"):
+            seq, _, stamp = name[:-len(".ckpt")].partition("-")
+            found.append((int(seq), datetime.strptime(stamp, STAMP).isoformat()))
+    return sorted(found)
+
+
+def _checkpoint_path(directory, seq, at):
+    return os.path.join(directory, f"{seq:06d}-{datetime.fromisoformat(at).strftime(STAMP)}.ckpt")
+
+
+def _log_path(directory, seq):
+    return os.path.join(directory, f"{seq:06d}.log")
+
+
+def _stamp(st):
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _write_atomic(path, data):
+    """Durably replace *path* with *data*; returns the new file's stamp."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        stamp = _stamp(os.fstat(f.fileno()))
+    with filelock.locked(path):
+        os.replace(tmp, path)
+    return stamp
+
+
+# {tip path: (stamp, tip)} of the tips this process wrote last.
+_tips = {}
+
+
+def _read_tip(directory, key):
+    path = os.path.join(directory, TIP_FILE)
+    try:
+        with open(path, "rb") as f:
+            cached = _tips.get(path)
+            if cached and cached[0] == _stamp(os.fstat(f.fileno())):
+                return dict(cached[1])
+            return decrypt_data(f.read(), key)
+    except FileNotFoundError:
+        return None
+
+
+def _write_tip(directory, tip, key):
+    path = os.path.join(directory, TIP_FILE)
+    _tips[path] = (_write_atomic(path, encrypt_data(tip, key)), tip)
+
+
+def _record_digests(records):
+    return [[r["id"], _digest(r)] for r in records]
+
+
+def _write_checkpoint(directory, seq, at, records, archived, key):
+    _write_atomic(_checkpoint_path(directory, seq, at),
+                  encrypt_data({"records": records, "archived": archived}, key))
+
+
+def record(path, records, key, reason="save", now=None, segments=None):
+    """Log the difference between *records* (just saved to *path*) and the previous save.
+
+    *segments* are the ``(digest, records)`` pairs storage.write_records()
+    wrote; without them *records* is compared as a single segment.
+    """
+    directory = timeline_dir(path)
+    now = (now or datetime.now()).isoformat(timespec="seconds")
+    if segments is None:
+        segments = [(None, records)]
+    tip = _read_tip(directory, key)
+    if tip is None:
+        os.makedirs(directory, exist_ok=True)
+        _write_checkpoint(directory, 1, now, records, [], key)
+        tip = {"seq": 1, "entries": 0, "archived": [],
+               "segments": [[digest, _record_digests(chunk)] for digest, chunk in segments]}
+        _write_tip(directory, tip, key)
+        return
+    # Tips written before segments were tracked hold one flat "digests" list.
+    old_segments = dict(tip.get("segments") or [[None, tip.pop("digests")]])
+    new_segments, changed = [], []
+    for digest, chunk in segments:
+        digests = old_segments.pop(digest) if digest is not None and digest in old_segments else None
+        if digests is None:
+            digests = _record_digests(chunk)
+            changed.extend(zip(chunk, digests))
+        new_segments.append([digest, digests])
+    # Only segments new since the tip can hold changed records, and only the
+    # tip's segments that are gone can hold removed ones.
+    old = {rid: d for digests in old_segments.values() for rid, d in digests}
+    upsert = [r for r, (_, d) in changed if old.get(r["id"]) != d]
+    present = {r["id"] for r, _ in changed}
+    removed = [rid for rid in old if rid not in present]
+    if not upsert and not removed:
+        if new_segments != tip.get("segments"):
+            _write_tip(directory, dict(tip, segments=new_segments), key)
+        return
+    entry = {"reason": reason, "upsert": upsert, "remove": removed}
+    line = now.encode("ascii") + b" " + encrypt_data(entry, key) + b"\n"
+    log_path = _log_path(directory, tip["seq"])
+    with filelock.locked(log_path), open(log_path, "ab") as f:
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+    archived = set(tip["archived"]) - present
+    if reason == ARCHIVE:
+        archived.update(removed)
+    tip.update(segments=new_segments, archived=sorted(archived), entries=tip["entries"] + 1)
+    if tip["entries"] >= get_int("timeline", "checkpoint_every", DEFAULT_CHECKPOINT_EVERY):
+        tip.update(seq=tip["seq"] + 1, entries=0)
+        _write_checkpoint(directory, tip["seq"], now, records, tip["archived"], key)
+        _prune(path, now)
+    _write_tip(directory, tip, key)
+
+
+def _prune(path, now):
+    """Drop intervals that ended before the ``keep_days`` horizon."""
+    keep_days = get_int("timeline", "keep_days", DEFAULT_KEEP_DAYS)
+    if keep_days <= 0:
+        return
+    horizon = (datetime.fromisoformat(now) - timedelta(days=keep_days)).isoformat()
+    points = checkpoints(path)
+    # Keep the last checkpoint before the horizon: states after it need it.
+    old = [(seq, at) for seq, at in points if at <= horizon][:-1]
+    directory = timeline_dir(path)
+    for seq, at in old:
+        os.remove(_checkpoint_path(directory, seq, at))
+        if os.path.exists(_log_path(directory, seq)):
+            os.remove(_log_path(directory, seq))
+
+
+def _state_at(path, key, when):
+    """``({id: record}, archived ids)`` at the ISO time *when*."""
+    points = [(seq, at) for seq, at in checkpoints(path) if at <= when]
+    if not points:
+        first = checkpoints(path)
+        if not first:
+            raise ValueError(f"No history of {path} yet; it starts with the next save.")
+        raise ValueError(f"No history of {path} at {when.replace('T', ' ')} "
+                         f"(it starts {first[0][1].replace('T', ' ')}).")
+    seq, at = points[-1]
+    directory = timeline_dir(path)
+    with open(_checkpoint_path(directory, seq, at), "rb") as f:
+        checkpoint = decrypt_data(f.read(), key)
+    state = {r["id"]: r for r in checkpoint["records"]}
+    archived = set(checkpoint["archived"])
+    try:
+        with open(_log_path(directory, seq), "rb") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        lines = []
+    for line in lines:
+        stamp, _, token = line.partition(b" ")
+        if stamp.decode("ascii") > when:
+            break
+        entry = decrypt_data(token, key)
+        for r in entry["upsert"]:
+            state[r["id"]] = r
+            archived.discard(r["id"])
+        for rid in entry["remove"]:
+            state.pop(rid, None)
+            if entry["reason"] == ARCHIVE:
+                archived.add(rid)
+    return state, archived
+
+
+def as_of(path, key, when):
+    """The records of the store at *path* as they were at *when*.
+
+    *when* is a datetime, a date (its end) or a string for parse_moment().
+    Raises ValueError for a moment before the store's timeline starts.
+    """
+    return list(_state_at(path, key, _moment(when))[0].values())
+
+
+def diff(path, key, start, end):
+    """What changed between two moments.
+
+    Returns ``{"added": [...], "removed": [...], "archived": [...],
+    "changed": [[before, after], ...]}``; removed records moved to the
+    archive in between are listed under "archived" instead.
+    """
+    before, _ = _state_at(path, key, _moment(start))
+    after, archived = _state_at(path, key, _moment(end))
+    gone = [r for rid, r in before.items() if rid not in after]
+    return {
+        "added": [r for rid, r in after.items() if rid not in before],
+        "removed": [r for r in gone if r["id"] not in archived],
+        "archived": [r for r in gone if r["id"] in archived],
+        "changed": [[before[rid], r] for rid, r in after.items() if rid in before and before[rid] != r],
+    }
+
+
+def format_changes(before, after):
+    """e.g. "description: Draft → Final draft; completed: False → True"."""
+    fields = list(before) + [k for k in after if k not in before]
+    return "; ".join(f"{k}: {before.get(k, '—')} → {after.get(k, '—')}"
+                     for k in fields if k != "id" and before.get(k) != after.get(k))
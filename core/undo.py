@@ -0,0 +1,266 @@
+"""
+Undo/redo for task and expense lists as a log of inverse operations.
+
+Instead of snapshotting the list before every change, each change records
+the one operation that reverts it:
+
+    {"op": "delete", "id": 7}                                 undoes an add
+    {"op": "insert", "index": 3, "record": {...}}             undoes a delete
+    {"op": "update", "id": 7, "set": {"completed": false}, "unset": ["due_at"]}
+                                                              undoes an edit
+
+so a step costs the size of the changed fields (a whole record only for a
+delete).  Applying an operation returns its own inverse, which is what
+moves a step between the undo and redo stacks.  The history, both stacks
+together, is capped at ``[undo] max_bytes`` of operations: the redo steps
+furthest from the present are dropped first, then the oldest undo steps.
+
+The history is kept next to the data file in an append-only journal
+(``<data file>.undo``): each step is persisted as one short appended line
+holding the encrypted operation, never as a rewrite of the list.  The
+journal survives restarts and is rewritten compactly when stale lines
+pile up.  Key rotation re-encrypts it with the data file.  An unreadable
+journal (e.g. a damaged one) is discarded and the history starts empty.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+
+from . import filelock
+from .config import get_int
+from .utils import encrypt_data, decrypt_data
+
+JOURNAL_SUFFIX = ".undo"
+DEFAULT_MAX_BYTES = 256 * 1024
+
+log = logging.getLogger(__name__)
+
+
+def journal_path(data_path):
+    return str(data_path) + JOURNAL_SUFFIX
+
+
+def _index_of(records, record_id):
+    for i, record in enumerate(records):
+        if record["id"] == record_id:
+            return i
+    return None
+
+
+def inverse_of_insert(record):
+    return {"op": "delete", "id": record["id"]}
+
+
+def inverse_of_delete(records, index):
+    return {"op": "insert", "index": index, "record": records[index]}
+
+
+def inverse_of_update(before, after):
+    """Operation restoring *before* from *after*, or None if nothing changed."""
+    changed = {k: v for k, v in before.items() if after.get(k, object()) != v}
+    added = [k for k in after if k not in before]
+    if not changed and not added:
+        return None
+    return {"op": "update", "id": before["id"], "set": changed, "unset": added}
+
+
+def apply(records, op):
+    """Apply *op* to *records* in place and return the operation reverting it.
+
+    Returns None (and changes nothing) if the record involved is gone or,
+    for an insert, already back -- e.g. archived or edited elsewhere.
+    """
+    kind = op["op"]
+    if kind == "insert":
+        record = op["record"]
+        if _index_of(records, record["id"]) is not None:
+            return None
+        index = min(op["index"], len(records))
+        records.insert(index, dict(record))
+        return inverse_of_insert(record)
+    i = _index_of(records, op["id"])
+    if i is None:
+        return None
+    if kind == "delete":
+        inverse = inverse_of_delete(records, i)
+        del records[i]
+        return inverse
+    if kind == "update":
+        before = dict(records[i])
+        records[i].update(op["set"])
+        for field in op["unset"]:
+            records[i].pop(field, None)
+        return inverse_of_update(before, records[i])
+    raise ValueError(f"Unknown undo operation {kind!r}")
+
+
+def _size(op):
+    return len(json.dumps(op, separators=(",", ":")))
+
+
+class UndoLog:
+    """Undo and redo stacks of inverse operations for one record list.
+
+    With *path*, steps are journaled there (encrypted with *key*) and the
+    history is restored from it on creation.
+    """
+
+    def __init__(self, path=None, key=None, max_bytes=None):
+        self.path = path
+        self.key = key
+        self.max_bytes = max_bytes or get_int("undo", "max_bytes", DEFAULT_MAX_BYTES)
+        self._undo = deque()  # (op, size), oldest first
+        self._redo = []
+        self.bytes = 0
+        self._lines = 0
+        if path:
+            self._load()
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    # -- recording changes -------------------------------------------------
+
+    def record(self, inverse):
+        """Remember *inverse* as the step undoing the change just made."""
+        if inverse is None:
+            return
+        self._clear_redo()
+        self._push(inverse)
+        self._append(b"R", inverse)
+
+    def inserted(self, record):
+        self.record(inverse_of_insert(record))
+
+    def deleted(self, records, index):
+        """Call *before* removing ``records[index]``."""
+        self.record(inverse_of_delete(records, index))
+
+    def updated(self, before, after):
+        """Record an edit; *before* is a copy of the record taken before it."""
+        self.record(inverse_of_update(before, after))
+
+    # -- undo / redo -------------------------------------------------------
+
+    def undo(self, records):
+        """Revert the latest step on *records*.  Returns True if anything changed.
+
+        A step that no longer applies is dropped and the next one is tried.
+        """
+        while self._undo:
+            op, size = self._undo.pop()
+            self.bytes -= size
+            inverse = apply(records, op)
+            if inverse is not None:
+                self._push_redo(inverse)
+            self._append(b"U", inverse)
+            if inverse is not None:
+                return True
+        return False
+
+    def redo(self, records):
+        """Re-apply the latest undone step.  Returns True if anything changed."""
+        while self._redo:
+            op, size = self._redo.pop()
+            self.bytes -= size
+            inverse = apply(records, op)
+            if inverse is not None:
+                self._push(inverse)
+            self._append(b"D", inverse)
+            if inverse is not None:
+                return True
+        return False
+
+    def _push(self, op):
+        size = _size(op)
+        self._undo.append((op, size))
+        self.bytes += size
+        self._trim()
+
+    def _push_redo(self, op):
+        size = _size(op)
+        self._redo.append((op, size))
+        self.bytes += size
+        self._trim()
+
+    def _clear_redo(self):
+        self.bytes -= sum(size for _, size in self._redo)
+        self._redo.clear()
+
+    def _trim(self):
+        """Drop steps until both stacks fit in max_bytes, keeping at least one."""
+        while self.bytes > self.max_bytes and len(self._undo) + len(self._redo) > 1:
+            if self._redo:
+                self.bytes -= self._redo.pop(0)[1]
+            else:
+                self.bytes -= self._undo.popleft()[1]
+
+    # -- journal -----------------------------------------------------------
+    #
+    # One line per step: "R <op>" recorded a change, "U [<op>]" undid one
+    # (with the op that redoes it), "D [<op>]" redid one (with the op that
+    # undoes it again), "P <op>" pushes straight onto the redo stack (only
+    # written by _compact).  Ops are encrypted tokens.
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        try:
+            for line in lines:
+                self._replay(line)
+        except Exception as e:
+            log.warning("Discarding unreadable undo journal %s: %s", self.path, e)
+            self._undo.clear()
+            self._redo.clear()
+            self.bytes = 0
+            self._compact()
+            return
+        self._lines = len(lines)
+
+    def _replay(self, line):
+        # Mirrors record/undo/redo without touching any records.
+        kind, _, token = line.partition(b" ")
+        op = decrypt_data(token, self.key) if token else None
+        if kind == b"R":
+            self._clear_redo()
+            self._push(op)
+        elif kind == b"U" and self._undo:
+            self.bytes -= self._undo.pop()[1]
+            if op is not None:
+                self._push_redo(op)
+        elif kind == b"D" and self._redo:
+            self.bytes -= self._redo.pop()[1]
+            if op is not None:
+                self._push(op)
+        elif kind == b"P":
+            self._push_redo(op)
+
+    def _append(self, kind, op=None):
+        if not self.path:
+            return
+        self._lines += 1
+        if self._lines > 2 * (len(self._undo) + len(self._redo)) + 32:
+            self._compact()
+            return
+        line = kind if op is None else kind + b" " + encrypt_data(op, self.key)
+        with filelock.locked(self.path), open(self.path, "ab") as f:
+            f.write(line + b"\n")
+
+    def _compact(self):
+        """Rewrite the journal as the current stacks only."""
+        lines = ([b"R " + encrypt_data(op, self.key) for op, _ in self._undo]
+                 + [b"P " + encrypt_data(op, self.key) for op, _ in self._redo])
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(line + b"\n" for line in lines))
+        with filelock.locked(self.path):
+            os.replace(tmp, self.path)
+        self._lines = len(lines)
@@ -1,23 +1,46 @@
 import os
 import json
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
+from . import keyring, metrics, profiles, compression as _compression
 
 KEY_FILE = 'key.key'
+# Compression applied before encryption: 'auto', 'none', 'zlib', 'lzma' or 'zstd'.
+COMPRESSION = 'auto'
 
+@metrics.timed("load_key")
 def load_key():
-    if not os.path.exists(KEY_FILE):
-        key = Fernet.generate_key()
-        with open(KEY_FILE, 'wb') as f:
-            f.write(key)
-    else:
-        with open(KEY_FILE, 'rb') as f:
-            key = f.read()
-    return key
-
-def encrypt_data(data, key):
-    f = Fernet(key)
-    return f.encrypt(json.dumps(data).encode())
+    """Return the active profile's key, else the newest key in the key ring."""
+    profile = profiles.active()
+    if profile is not None:
+        return profile.key
+    return keyring.ensure_keys(KEY_FILE)[-1][1]
 
+@metrics.timed("load_keyring")
+def load_keyring():
+    """Return a MultiFernet that writes with the newest key and reads with any.
+
+    With an active profile this is the profile's cached, password-derived key.
+    """
+    profile = profiles.active()
+    if profile is not None:
+        return profile.keyring
+    return keyring.multifernet(keyring.ensure_keys(KEY_FILE))
+
+def _fernet(key):
+    if isinstance(key, (Fernet, MultiFernet)):
+        return key
+    return Fernet(key)
+
+def encrypt_data(data, key, compression=None):
+    return encrypt_json(json.dumps(data).encode(), key, compression)
+
+@metrics.timed("encrypt_data")
+def encrypt_json(raw, key, compression=None):
+    """encrypt_data() for data the caller has already serialised to JSON bytes."""
+    f = _fernet(key)
+    return f.encrypt(_compression.compress(raw, compression or COMPRESSION))
+
+@metrics.timed("decrypt_data")
 def decrypt_data(enc_data, key):
-    f = Fernet(key)
-    return json.loads(f.decrypt(enc_data).decode())
\ No newline at end of file
+    f = _fernet(key)
+    return json.loads(_compression.decompress(f.decrypt(enc_data)).decode())
@@ -0,0 +1,305 @@
+"""
+Chat-bot ingestion service for TriFlow.
+
+Accepts chat messages over a local line-based socket (a stand-in for a
+messaging webhook), parses simple commands and records them as tasks or
+expenses:
+
+- "spent 4.50 coffee"  -> new expense (item "coffee", amount 4.50)
+- "todo call bank"     -> new task ("call bank")
+- "done 3"             -> mark task 3 complete
+
+Each line received is either the raw message text or a JSON object with a
+"text" field.  The service replies with one line per message once the change
+has been committed to disk.
+
+Writes go through a WriteQueue: messages arriving in a burst are applied to
+the in-memory lists and committed with a single save_tasks/save_budgets call,
+so hundreds of messages per second cost one encryption per batch instead of
+one per message.  Before each batch a list is re-read if its file changed
+since the bot last read or wrote it (the GUI or a CLI saved), so a commit
+never overwrites their changes.  If a commit fails, the lists are re-read
+from disk before the next batch, so the failed batch's changes are not
+written later by accident.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+from datetime import datetime
+
+from . import task_tracker, budget_tracker, categorize
+from .utils import load_keyring
+
+EXPENSE_RE = re.compile(r"^\s*spent\s+\$?(\d+(?:[.,]\d{1,2})?)\s+(.+?)\s*$", re.IGNORECASE)
+TASK_RE = re.compile(r"^\s*todo\s+(.+?)\s*$", re.IGNORECASE)
+DONE_RE = re.compile(r"^\s*done\s+(\d+)\s*$", re.IGNORECASE)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def parse_message(text):
+    """Parse a chat message into a (kind, payload) command tuple.
+
+    Returns None when the message is not a recognised command.
+    """
+    m = EXPENSE_RE.match(text)
+    if m:
+        return ("expense", {"item": m.group(2), "amount": float(m.group(1).replace(",", "."))})
+    m = TASK_RE.match(text)
+    if m:
+        return ("task", {"description": m.group(1)})
+    m = DONE_RE.match(text)
+    if m:
+        return ("done", {"id": int(m.group(1))})
+    return None
+
+
+class WriteQueue:
+    """Group-commit queue for chat commands.
+
+    A single writer coroutine drains the queue: it waits for the first
+    command, then keeps collecting until the queue is empty, max_batch
+    commands have been gathered or flush_interval seconds have passed.
+    The whole batch is applied in memory and persisted with one save per
+    collection, in a worker thread so encryption never blocks the loop.
+    """
+
+    STORES = {
+        "tasks": (task_tracker.data_file, task_tracker.load_tasks, task_tracker.save_tasks),
+        "budgets": (budget_tracker.data_file, budget_tracker.load_budgets, budget_tracker.save_budgets),
+    }
+    NEXT_ID = {"tasks": task_tracker.next_id, "budgets": budget_tracker.next_id}
+
+    def __init__(self, key, max_batch=1000, flush_interval=0.05):
+        self.key = key
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.tasks = self.budgets = None
+        self._stamps = {}
+        self._next_ids = {}
+        self.refresh()
+        self.commits = 0
+        self._queue = asyncio.Queue()
+        self._writer = None
+
+    def refresh(self):
+        """Re-read each list that is stale: dropped after a failed commit, or
+        saved by another process since the bot last read or wrote it."""
+        for name, (data_file, load, _) in self.STORES.items():
+            # Stat first: a save landing during the load is caught next time.
+            stamp = _file_stamp(data_file())
+            if getattr(self, name) is None or stamp != self._stamps.get(name):
+                setattr(self, name, load(self.key))
+                self._stamps[name] = stamp
+
+    def start(self):
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued, then stop the writer."""
+        if self._writer is None:
+            return
+        await self._queue.put(None)
+        await self._writer
+        self._writer = None
+
+    async def submit(self, command):
+        """Queue *command* and wait until it has been committed.
+
+        Returns a short human-readable reply for the sender.
+        """
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((command, fut))
+        return await fut
+
+    async def _collect(self):
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if not batch:
+                continue
+            commands = [cmd for cmd, _ in batch]
+            try:
+                replies = await loop.run_in_executor(None, self._process, commands)
+            except Exception as exc:
+                # Forget the uncommitted changes: the next batch re-reads the files.
+                self.tasks = self.budgets = None
+                # The traceback runs through this coroutine's frame; a sender
+                # clearing it (as assertRaises does) would close the writer.
+                exc = exc.with_traceback(None)
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            for (_, fut), reply in zip(batch, replies):
+                if not fut.done():
+                    fut.set_result(reply)
+
+    def _process(self, commands):
+        """Apply *commands* to fresh lists and commit them; returns the replies."""
+        self.refresh()
+        self._next_ids.clear()
+        replies = [self._apply(cmd) for cmd in commands]
+        dirty_tasks = any(cmd[0] in ("task", "done") for cmd in commands)
+        dirty_budgets = any(cmd[0] == "expense" for cmd in commands)
+        self._commit(dirty_tasks, dirty_budgets)
+        return replies
+
+    def _new_id(self, name):
+        """Id for a new record in list *name*; the archive is consulted once per batch."""
+        if name not in self._next_ids:
+            self._next_ids[name] = self.NEXT_ID[name](self.key, getattr(self, name))
+        self._next_ids[name] += 1
+        return self._next_ids[name] - 1
+
+    def _apply(self, command):
+        kind, payload = command
+        if kind == "task":
+            task = {
+                "id": self._new_id("tasks"),
+                "description": payload["description"],
+                "completed": False,
+                "created_at": datetime.now().isoformat()
+            }
+            self.tasks.append(task)
+            return f"Task {task['id']} added."
+        if kind == "expense":
+            expense = {
+                "id": self._new_id("budgets"),
+                "item": payload["item"],
+                "amount": payload["amount"],
+                "date": datetime.now().date().isoformat()
+            }
+            categorize.default_categorizer().categorize(expense)
+            self.budgets.append(expense)
+            return f"Expense {expense['id']} added: ${expense['amount']:.2f} {expense['item']}."
+        if kind == "done":
+            for t in self.tasks:
+                if t["id"] == payload["id"]:
+                    t["completed"] = True
+                    return f"Task {t['id']} marked complete."
+            return "Task not found."
+        return "Unknown command."
+
+    def _commit(self, dirty_tasks, dirty_budgets):
+        for name, dirty in (("tasks", dirty_tasks), ("budgets", dirty_budgets)):
+            if dirty:
+                data_file, _, save = self.STORES[name]
+                save(getattr(self, name), self.key)
+                self._stamps[name] = _file_stamp(data_file())
+        self.commits += 1
+
+
+def _message_text(line):
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            return str(json.loads(line).get("text", ""))
+        except (ValueError, AttributeError):
+            return line
+    return line
+
+
+async def _send_replies(replies, writer):
+    while True:
+        fut = await replies.get()
+        if fut is None:
+            break
+        try:
+            reply = await fut
+        except Exception as exc:
+            reply = f"Error: {exc}"
+        writer.write((reply + "\n").encode("utf-8"))
+        await writer.drain()
+
+
+async def handle_client(queue, reader, writer):
+    """Serve one socket connection: one message per line, one reply per line.
+
+    Messages are submitted without waiting for earlier ones to commit, so a
+    client pipelining a burst lands in one batch; replies keep input order.
+    """
+    loop = asyncio.get_running_loop()
+    replies = asyncio.Queue()
+    responder = asyncio.create_task(_send_replies(replies, writer))
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = parse_message(_message_text(line.decode("utf-8", errors="replace")))
+            if command is None:
+                fut = loop.create_future()
+                fut.set_result("Sorry, I didn't understand that. Try 'spent 4.50 coffee' or 'todo call bank'.")
+            else:
+                fut = asyncio.ensure_future(queue.submit(command))
+            await replies.put(fut)
+    finally:
+        await replies.put(None)
+        await responder
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, key=None):
+    key = key or load_keyring()
+    queue = WriteQueue(key)
+    queue.start()
+    server = await asyncio.start_server(lambda r, w: handle_client(queue, r, w), host, port)
+    print(f"TriFlow bot listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await queue.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TriFlow chat-bot ingestion service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+Command-line entry point for TriFlow's non-interactive modes.
+
+Usage:
+    python -m desktop.cli.triflow_cli [--profile NAME] <command> ...
+    python -m desktop.cli.triflow_cli serve [--host HOST] [--port PORT]
+    python -m desktop.cli.triflow_cli rotate-key [--resume] [--retire]
+    python -m desktop.cli.triflow_cli stats [--repeat N] [--json]
+    python -m desktop.cli.triflow_cli verify [--deep] [--all] [--repair]
+    python -m desktop.cli.triflow_cli categorize [--overwrite] [--dry-run]
+    python -m desktop.cli.triflow_cli profile list|create NAME
+    python -m desktop.cli.triflow_cli budget status [--json]
+    python -m desktop.cli.triflow_cli daemon start [--foreground] [--idle SECONDS]
+    python -m desktop.cli.triflow_cli daemon stop|status
+    python -m desktop.cli.triflow_cli timeline tasks|budgets [--as-of DATE | --diff FROM TO] [--json]
+
+With --profile, commands work on that profile's files and key (the
+password is prompted for; ``daemon stop|status`` only pick its socket).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+
+
+def _stores():
+    """(path, kind) of every hot data file used by the CLIs and both GUIs."""
+    from core import task_tracker, budget_tracker
+    from triflow_pyside6_pyside6_app.data import local_store
+    return [(task_tracker.data_file(), "tasks"), (budget_tracker.data_file(), "budgets"),
+            (str(local_store.tasks_file()), "tasks"), (str(local_store.budgets_file()), "budgets")]
+
+
+def _store_paths():
+    return [path for path, _ in _stores()]
+
+
+def rotate_key(resume=False, retire=False):
+    from core import keyring
+    from core.utils import KEY_FILE
+    if not resume:
+        version = keyring.add_key(KEY_FILE)
+        print(f"Generated key version {version}.")
+
+    def progress(done, total, path):
+        print(f"[{done}/{total}] re-encrypted {path}")
+
+    if keyring.rotate_store(KEY_FILE, keyring.store_files(_store_paths()), progress):
+        print("Rotation complete.")
+        if retire:
+            try:
+                # Listed again: files may have appeared since the rotation started.
+                retired = keyring.retire_old_keys(KEY_FILE, keyring.store_files(_store_paths()))
+            except RuntimeError as e:
+                raise SystemExit(str(e))
+            print(f"Retired {retired} old key(s).")
+    else:
+        print("Some files were being saved throughout; run rotate-key --resume to finish.")
+
+
+def stats(repeat=3, as_json=False):
+    """Time the storage hot paths against the local data files and print a summary."""
+    from core import metrics, storage
+    from core.utils import load_keyring
+    metrics.enable()
+    metrics.reset()
+    stores = [(path, kind) for path, kind in _stores() if os.path.exists(path)]
+    for _ in range(repeat):
+        key = load_keyring()
+        for path, kind in stores:
+            storage.read_records(path, key)
+            with metrics.timer("read_summary"):
+                storage.read_summary(path, key, kind)
+    data = metrics.snapshot()
+    data["files"] = {path: os.path.getsize(path) for path, _ in stores}
+    if as_json:
+        print(json.dumps(data, indent=2))
+        return
+    for path, size in data["files"].items():
+        print(f"{path}: {size:,} bytes")
+    print(metrics.format_summary(data))
+
+
+VERIFY_CACHE = "data/verify_cache.json"
+
+
+def verify(deep=False, check_all=False, repair=False):
+    """Check store integrity; with repair, rewrite damaged stores from what is recoverable."""
+    from core import storage
+    from core.utils import load_keyring
+    key = load_keyring() if deep or repair else None
+    stores = dict(_stores())
+    paths = [p for p in stores if os.path.exists(p)]
+    cache = None if check_all or deep else VERIFY_CACHE
+    if cache:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+    reports = storage.verify_stores(paths, cache, key)
+    if not reports:
+        print("No changes since the last clean check.")
+    for report in reports:
+        if report["ok"]:
+            print(f"{report['path']}: OK ({report['segments']} segments)")
+            continue
+        if report["ok"] is None:
+            print(f"{report['path']}: no manifest (older format); use --deep to decrypt-check it")
+            continue
+        print(f"{report['path']}: damaged segments {report['bad']}"
+              f"{'' if report['summary_ok'] else ', damaged summary'}")
+        if repair:
+            records, info = storage.recover(report["path"], key)
+            storage.write_records(report["path"], records, key, stores[report["path"]], timeline="repair")
+            print(f"  repaired: refilled {info['refilled']} from backups, "
+                  f"{info['lost_records']} records lost, original kept at {info['quarantined']}")
+
+
+def categorize(overwrite=False, dry_run=False):
+    """Tag stored expenses using the [categories] rules in config.ini."""
+    import time
+    from core import categorize as rules, storage
+    from core.utils import load_keyring
+    key = load_keyring()
+    categorizer = rules.default_categorizer()
+    if not categorizer.categories:
+        print("No [categories] rules in config.ini.")
+        return
+    for path, kind in _stores():
+        if kind != "budgets" or not os.path.exists(path):
+            continue
+        records = storage.read_records(path, key)
+        start = time.perf_counter()
+        tagged = rules.categorize_records(records, categorizer, overwrite)
+        elapsed = time.perf_counter() - start
+        rate = len(records) / elapsed if elapsed else 0
+        print(f"{path}: categorized {tagged} of {len(records)} expenses ({rate:,.0f} rows/s)")
+        if tagged and not dry_run:
+            storage.write_records(path, records, key, kind, timeline="categorize")
+
+
+def budget_status(as_json=False):
+    """Print each budget limit's current period, from the summary blocks alone."""
+    from core import budget_tracker
+    from core.utils import load_keyring
+    try:
+        entries = budget_tracker.load_limit_tracker(load_keyring()).status()
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if as_json:
+        print(json.dumps(entries, indent=2))
+    elif not entries:
+        print("No limits set. Add a [limits] section to config.ini.")
+    else:
+        budget_tracker.print_limit_status(entries)
+
+
+def daemon_command(action, profile_name=None, idle=None, foreground=False):
+    """Start, stop or query the warm daemon serving the interactive CLIs."""
+    from core import daemon
+    path = daemon.socket_path(profile_name or "")
+    if action == "start":
+        from core.utils import load_keyring
+        if foreground:
+            print(f"TriFlow daemon serving {path}")
+        daemon.start(load_keyring(), path, idle, foreground)
+        if not foreground:
+            print(f"TriFlow daemon started on {path}.")
+        return
+    client = daemon.connect_client(path)
+    if client is None:
+        print(f"No daemon is running on {path}.")
+        return
+    with contextlib.closing(client):
+        if action == "stop":
+            client.request("stop")
+            print("TriFlow daemon stopped.")
+            return
+        info = client.request("ping")
+    records = ", ".join(f"{count} {name}" for name, count in info["records"].items())
+    print(f"TriFlow daemon pid {info['pid']} on {path}: {records}; {info['clients']} client(s) connected.")
+
+
+def show_timeline(kind, as_of=None, diff=None, as_json=False):
+    """Print the tasks or expenses as of a past date, or what changed between two dates.
+
+    Without either, list the checkpoints the history can be rebuilt from.
+    """
+    from core import task_tracker, budget_tracker, timeline
+    from core.utils import load_keyring
+    tracker = task_tracker if kind == "tasks" else budget_tracker
+    show = task_tracker.print_tasks if kind == "tasks" else budget_tracker.print_budgets
+    key = load_keyring()
+    try:
+        if as_of:
+            result = timeline.as_of(tracker.data_file(), key, as_of)
+        elif diff:
+            result = timeline.diff(tracker.data_file(), key, *diff)
+        else:
+            result = [{"seq": seq, "at": at} for seq, at in timeline.checkpoints(tracker.data_file())]
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if as_json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif as_of and not result:
+        print(f"No {kind} at {as_of}.")
+    elif as_of:
+        show(result)
+    elif diff:
+        for section in ("added", "removed", "archived"):
+            if result[section]:
+                print(f"{section.capitalize()} ({len(result[section])}):")
+                show(result[section])
+        if result["changed"]:
+            print(f"Changed ({len(result['changed'])}):")
+            for before, after in result["changed"]:
+                print(f"{after['id']:>3} | {timeline.format_changes(before, after)}")
+        if not any(result.values()):
+            print("No changes.")
+    elif not result:
+        print(f"No history for {kind} yet; it starts with the next save.")
+    else:
+        print(f"History of {kind} from {result[0]['at'].replace('T', ' ')}, "
+              f"{len(result)} checkpoint(s), the latest at {result[-1]['at'].replace('T', ' ')}.")
+
+
+def profile(action, name=None):
+    import getpass
+    from core import profiles
+    if action == "list":
+        for existing in profiles.list_profiles():
+            print(existing)
+        return
+    password = getpass.getpass(f"New password for {name}: ")
+    if getpass.getpass("Repeat password: ") != password:
+        raise SystemExit("Passwords do not match.")
+    created = profiles.create_profile(name, password)
+    print(f"Created profile {name} in {created.path}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="triflow", description="TriFlow command-line tools")
+    parser.add_argument("--profile", help="Use this profile's data and password-derived key")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Run the headless JSON API server for mobile clients")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+
+    rotate = sub.add_parser("rotate-key", help="Add a new encryption key and re-encrypt stored data")
+    rotate.add_argument("--resume", action="store_true", help="Continue an interrupted rotation")
+    rotate.add_argument("--retire", action="store_true", help="Drop old keys once rotation completes")
+
+    stats_parser = sub.add_parser("stats", help="Measure load/decrypt timings of the local data files")
+    stats_parser.add_argument("--repeat", type=int, default=3)
+    stats_parser.add_argument("--json", action="store_true", help="Print raw metrics as JSON")
+
+    verify_parser = sub.add_parser("verify", help="Check data files for damaged segments")
+    verify_parser.add_argument("--deep", action="store_true", help="Also decrypt every segment")
+    verify_parser.add_argument("--all", action="store_true", help="Check files unchanged since the last clean check too")
+    verify_parser.add_argument("--repair", action="store_true", help="Rewrite damaged files from intact segments and backups")
+
+    categorize_parser = sub.add_parser("categorize", help="Tag expenses from the [categories] rules in config.ini")
+    categorize_parser.add_argument("--overwrite", action="store_true", help="Also re-categorize expenses that already have tags")
+    categorize_parser.add_argument("--dry-run", action="store_true", help="Report counts without saving")
+
+    profile_parser = sub.add_parser("profile", help="List or create password-protected profiles")
+    profile_parser.add_argument("action", choices=("list", "create"))
+    profile_parser.add_argument("name", nargs="?")
+
+    budget_parser = sub.add_parser("budget", help="Budget limits")
+    budget_parser.add_argument("action", choices=("status",))
+    budget_parser.add_argument("--json", action="store_true", help="Print the status as JSON")
+
+    daemon_parser = sub.add_parser("daemon", help="Keep data decrypted in a background process for fast CLI runs")
+    daemon_parser.add_argument("action", choices=("start", "stop", "status"))
+    daemon_parser.add_argument("--foreground", action="store_true", help="Serve from this process instead of detaching")
+    daemon_parser.add_argument("--idle", type=int, help="Exit after this many seconds without clients")
+
+    timeline_parser = sub.add_parser("timeline", help="View tasks or expenses as of a past date, or diff two dates")
+    timeline_parser.add_argument("kind", choices=("tasks", "budgets"))
+    moment = timeline_parser.add_mutually_exclusive_group()
+    moment.add_argument("--as-of", metavar="DATE", help="YYYY-MM-DD (end of that day) or YYYY-MM-DDTHH:MM")
+    moment.add_argument("--diff", nargs=2, metavar=("FROM", "TO"), help="Show what changed between two dates")
+    timeline_parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    args = parser.parse_args(argv)
+    if args.command == "profile" and args.action == "create" and not args.name:
+        parser.error("profile create needs a NAME")
+    if args.profile and not (args.command == "daemon" and args.action != "start"):
+        import getpass
+        from core import profiles
+        if args.command == "rotate-key":
+            parser.error("profiles have no key ring to rotate; their key comes from the password")
+        try:
+            profiles.activate(profiles.unlock(args.profile, getpass.getpass(f"Password for profile {args.profile}: ")))
+        except ValueError as e:
+            raise SystemExit(str(e))
+    if args.command == "serve":
+        from core import api_server
+        api_server.main(["--host", args.host, "--port", str(args.port)])
+    elif args.command == "rotate-key":
+        rotate_key(args.resume, args.retire)
+    elif args.command == "stats":
+        stats(args.repeat, args.json)
+    elif args.command == "verify":
+        verify(args.deep, args.all, args.repair)
+    elif args.command == "categorize":
+        categorize(args.overwrite, args.dry_run)
+    elif args.command == "profile":
+        profile(args.action, args.name)
+    elif args.command == "budget":
+        budget_status(args.json)
+    elif args.command == "timeline":
+        show_timeline(args.kind, args.as_of, args.diff, args.json)
+    elif args.command == "daemon":
+        from core.daemon import DaemonError
+        try:
+            daemon_command(args.action, args.profile, args.idle, args.foreground)
+        except DaemonError as e:
+            raise SystemExit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,109 @@
 """
-Firebase login/signup screen for TriFlow app (Phase 2).
+Profile login screen for the TriFlow app.
 
 Features:
-- Tkinter-based login form with Email + Password fields.
-- Buttons: "Login", "Sign Up", "Continue as Guest"
-- On success, launches main_gui.MainApp with current user token.
-- Shows error dialogs for failed login.
+- Tkinter-based login form with Profile + Password fields.
+- Buttons: "Login", "Create Profile", "Continue as Guest"
+- Each profile keeps its own data files, encrypted with a key derived from
+  its password (see core.profiles); guests use the shared key.key setup.
+- On success, launches main_gui.MainApp with that profile active.
+- Shows error dialogs for a wrong password or an invalid profile name.
 
 Structure:
-- Class: LoginScreen(tk.Tk or tk.Frame)
-- Uses requests to call Firebase REST endpoint (Firebase Auth API)
-- Save user session/token securely (optional: encrypted local JSON)
+- Class: ProfileForm(ttk.Frame), the form itself, reused by
+- Class: LoginScreen(tk.Tk), shown before the main window, and
+- Class: ProfileDialog(tk.Toplevel), used by MainApp to switch profiles.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-# import requests  # For Firebase REST API
-# from gui.main_gui import MainApp  # Uncomment when main_gui.py is implemented
 
-class LoginScreen(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("TriFlow Login")
-        self.geometry("350x250")
+from core import profiles
+
+class ProfileForm(ttk.Frame):
+    """Profile/password form; calls on_done(profile) (None for a guest) on success."""
+
+    def __init__(self, master, on_done):
+        super().__init__(master)
+        self.on_done = on_done
         self._create_widgets()
 
     def _create_widgets(self):
         ttk.Label(self, text="Login to TriFlow", font=("Arial", 14)).pack(pady=10)
-        self.email_var = tk.StringVar()
+        self.name_var = tk.StringVar()
         self.pw_var = tk.StringVar()
-        ttk.Label(self, text="Email:").pack()
-        ttk.Entry(self, textvariable=self.email_var).pack(fill="x", padx=30)
+        ttk.Label(self, text="Profile:").pack()
+        names = profiles.list_profiles()
+        ttk.Combobox(self, textvariable=self.name_var, values=names).pack(fill="x", padx=30)
+        if profiles.active() is not None:
+            self.name_var.set(profiles.active().name)
+        elif names:
+            self.name_var.set(names[0])
         ttk.Label(self, text="Password:").pack()
-        ttk.Entry(self, textvariable=self.pw_var, show="*").pack(fill="x", padx=30)
+        pw_entry = ttk.Entry(self, textvariable=self.pw_var, show="*")
+        pw_entry.pack(fill="x", padx=30)
+        pw_entry.bind("<Return>", lambda e: self._login())
+        pw_entry.focus_set()
         btn_frame = ttk.Frame(self)
         btn_frame.pack(pady=12)
         ttk.Button(btn_frame, text="Login", command=self._login).grid(row=0, column=0, padx=5)
-        ttk.Button(btn_frame, text="Sign Up", command=self._signup).grid(row=0, column=1, padx=5)
+        ttk.Button(btn_frame, text="Create Profile", command=self._signup).grid(row=0, column=1, padx=5)
         ttk.Button(btn_frame, text="Continue as Guest", command=self._guest).grid(row=1, column=0, columnspan=2, pady=5)
 
+    def _credentials(self):
+        name, password = self.name_var.get().strip(), self.pw_var.get()
+        self.pw_var.set("")
+        return name, password
+
     def _login(self):
-        email = self.email_var.get()
-        password = self.pw_var.get()
-        # TODO: Implement Firebase login logic here using requests
-        messagebox.showinfo("Login", f"Logging in as {email} (not implemented)")
-        # On success: self.destroy(); MainApp(user=email).mainloop()
+        name, password = self._credentials()
+        try:
+            profile = profiles.unlock(name, password)
+        except ValueError as e:
+            messagebox.showerror("Login", str(e), parent=self)
+            return
+        self.on_done(profile)
 
     def _signup(self):
-        messagebox.showinfo("Sign Up", "Sign up not implemented yet.")
+        name, password = self._credentials()
+        try:
+            profile = profiles.create_profile(name, password)
+        except ValueError as e:
+            messagebox.showerror("Create Profile", str(e), parent=self)
+            return
+        self.on_done(profile)
 
     def _guest(self):
+        self.on_done(None)
+
+class LoginScreen(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("TriFlow Login")
+        self.geometry("350x250")
+        ProfileForm(self, self._start).pack(fill="both", expand=True)
+
+    def _start(self, profile):
+        from desktop.gui.main_gui import MainApp
+        profiles.activate(profile)
+        self.destroy()
+        MainApp().mainloop()
+
+class ProfileDialog(tk.Toplevel):
+    """Modal profile switcher over an existing main window."""
+
+    def __init__(self, master, on_done):
+        super().__init__(master)
+        self.title("Switch Profile")
+        self.geometry("350x250")
+        self.transient(master)
+        self._on_done = on_done
+        ProfileForm(self, self._done).pack(fill="both", expand=True)
+        self.grab_set()
+
+    def _done(self, profile):
         self.destroy()
-        # MainApp(user=None).mainloop()  # Uncomment to launch main app as guest
+        self._on_done(profile)
 
 if __name__ == "__main__":
-    LoginScreen().mainloop()
\ No newline at end of file
+    LoginScreen().mainloop()
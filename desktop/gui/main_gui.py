@@ -3,9 +3,17 @@ Main GUI interface for the TriFlow desktop app using Tkinter.
 
 Features:
 - ttk.Notebook for tabbed layout: Tasks, Budget, Weather (placeholder).
-- TaskTab: Treeview with all tasks, add/mark/edit/delete tasks, persistent (encrypted) storage.
-- BudgetTab: Treeview with expenses, add/delete/export, show total spent, persistent (encrypted) storage.
+- TaskTab: virtual-scrolling Treeview with all tasks, add/mark/edit/delete tasks, due dates with
+  reminders, tags with tag-query filtering, persistent (encrypted) storage.
+- BudgetTab: virtual-scrolling Treeview with expenses, add/delete/export, tags, show total spent
+  and per-category totals, budget limit status with alerts, persistent (encrypted) storage.
 - WeatherTab: Placeholder for future extension.
+- Edit menu / Ctrl+Z, Ctrl+Y: undo and redo changes on the current tab, kept as a compact log of
+  inverse operations next to the data file (see core.undo).
+- View menu: a Timeline window showing the tasks or expenses as of a past date, or what changed
+  between two dates (see core.timeline and desktop.gui.timeline_dialog).
+- Profile menu: switch to another password-protected profile (or guest) without restarting;
+  the tabs are rebuilt over that profile's data.
 - Messagebox used for error and validation alerts.
 
 Tabs are implemented as their own classes, instantiated in the notebook.
@@ -15,21 +23,41 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 
-from core import task_tracker, budget_tracker
-from core.utils import load_key
+from core import task_tracker, budget_tracker, metrics, profiles, reminders, tags, categorize, limits
+from core.utils import load_keyring
+from desktop.gui.login_screen import ProfileDialog
+from desktop.gui.timeline_dialog import TimelineDialog
+from desktop.gui.virtual_tree import VirtualTreeview
+
+def _query_tags(index, query):
+    """Bitset of indexed rows matching *query*; all rows if the query is invalid."""
+    try:
+        return index.query(query)
+    except ValueError as e:
+        messagebox.showerror("Tag Query", str(e))
+        return index.all
 
 class TaskTab(ttk.Frame):
     def __init__(self, master):
         super().__init__(master)
-        self.key = load_key()
+        self.key = load_keyring()
+        task_tracker.archive_old_tasks(self.key)
         self.tasks = task_tracker.load_tasks(self.key)
+        self.history = task_tracker.load_history(self.key)
+        # Archived months are only decrypted when the user pages back
+        self.older_months = task_tracker.archived_months()
+        self.archived = []
+        # One pending `after` callback for the next due reminder
+        self.reminders = reminders.ReminderScheduler(self.tasks)
+        self._reminder_job = None
         self._create_widgets()
         self.refresh_tasks()
+        self._arm_reminders()
 
     def _create_widgets(self):
-        # Treeview for tasks
-        columns = ("Description", "Status", "Created")
-        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse", height=12)
+        # Treeview for tasks; only the visible rows exist as Tk items
+        columns = ("Description", "Status", "Created", "Due", "Tags")
+        self.tree = VirtualTreeview(self, columns=columns, height=12)
         for col in columns:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=120)
@@ -43,17 +71,123 @@ class TaskTab(ttk.Frame):
         ttk.Button(self, text="Edit Task", command=self.edit_task).grid(row=1, column=3, padx=2, pady=2)
         ttk.Button(self, text="Delete Task", command=self.delete_task).grid(row=1, column=4, padx=2, pady=2)
 
+        # Completed counter, read from the store's summary block
+        self.summary_label = ttk.Label(self, text="0/0 tasks completed.")
+        self.summary_label.grid(row=2, column=0, columnspan=3, sticky="w", padx=10, pady=6)
+        ttk.Button(self, text="Set Due", command=self.set_due).grid(row=2, column=3, padx=2, pady=6)
+        self.older_button = ttk.Button(self, text="Load Older", command=self.load_older)
+        self.older_button.grid(row=2, column=4, padx=2, pady=6)
+        self.tree.tag_configure("archived", foreground="gray")
+
+        # Tag query filter, e.g. "home AND NOT someday"
+        self.tag_query_var = tk.StringVar()
+        tag_entry = ttk.Entry(self, textvariable=self.tag_query_var, width=30)
+        tag_entry.grid(row=3, column=0, padx=10, pady=2, sticky="w")
+        tag_entry.bind("<Return>", lambda e: self.refresh_tasks())
+        ttk.Button(self, text="Filter Tags", command=self.refresh_tasks).grid(row=3, column=1, padx=2, pady=2, sticky="w")
+        ttk.Button(self, text="Edit Tags", command=self.edit_tags).grid(row=3, column=2, padx=2, pady=2)
+
         # Configure resizing
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
+    @metrics.timed("tk.refresh_tasks")
     def refresh_tasks(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
         self.tasks = task_tracker.load_tasks(self.key)
-        for t in self.tasks:
-            status = "✅ Done" if t["completed"] else "❌ Pending"
-            self.tree.insert("", "end", iid=t["id"], values=(t["description"], status, t["created_at"][:10]))
+        hot_ids = {t["id"] for t in self.tasks}
+        records = self.tasks + [t for t in self.archived if t["id"] not in hot_ids]
+        rows = []
+        for i in tags.iter_bits(_query_tags(tags.TagIndex(records), self.tag_query_var.get())):
+            t = records[i]
+            if i < len(self.tasks):
+                rows.append((str(t["id"]), (t["description"], "✅ Done" if t["completed"] else "❌ Pending",
+                                            t["created_at"][:10], reminders.format_due(t), tags.format_tags(t)), ()))
+            else:
+                rows.append((f"a{t['id']}", (t["description"], "📦 Archived", t["created_at"][:10], "",
+                                             tags.format_tags(t)), ("archived",)))
+        self.tree.set_rows(rows)
+        self.older_button.state(["!disabled"] if self.older_months else ["disabled"])
+        summary = task_tracker.read_summary(self.key)
+        self.summary_label.config(text=f"{summary['completed']}/{summary['count']} tasks completed.")
+
+    def load_older(self):
+        if not self.older_months:
+            return
+        month = self.older_months.pop(0)
+        self.archived.extend(task_tracker.load_archived_tasks(self.key, month))
+        self.refresh_tasks()
+
+    def edit_tags(self):
+        tid = self._selected_id("tag")
+        if tid is None:
+            return
+        task = next((t for t in self.tasks if t["id"] == tid), None)
+        if task is None:
+            messagebox.showerror("Error", "Task not found.")
+            return
+        text = tk.simpledialog.askstring("Edit Tags", "Tags (comma-separated):", initialvalue=tags.format_tags(task))
+        if text is None:
+            return
+        before = dict(task)
+        task.pop("tags", None)
+        if tags.parse_tags(text):
+            task["tags"] = tags.parse_tags(text)
+        self.history.updated(before, task)
+        task_tracker.save_tasks(self.tasks, self.key)
+        self.refresh_tasks()
+
+    def undo(self):
+        """Revert the latest change; returns False if there was nothing to undo."""
+        return self._history_step(self.history.undo)
+
+    def redo(self):
+        return self._history_step(self.history.redo)
+
+    def _history_step(self, step):
+        if not step(self.tasks):
+            return False
+        task_tracker.save_tasks(self.tasks, self.key)
+        self.reminders.load(self.tasks)
+        self._arm_reminders()
+        self.refresh_tasks()
+        return True
+
+    def destroy(self):
+        # Don't leave a reminder for this profile's tasks pending after a switch
+        if self._reminder_job is not None:
+            self.after_cancel(self._reminder_job)
+            self._reminder_job = None
+        super().destroy()
+
+    def _arm_reminders(self):
+        if self._reminder_job is not None:
+            self.after_cancel(self._reminder_job)
+        delay = self.reminders.delay_seconds(datetime.now())
+        self._reminder_job = None if delay is None else self.after(int(delay * 1000) + 1, self._fire_reminders)
+
+    def _reschedule(self, task):
+        self.reminders.update(task)
+        self._arm_reminders()
+
+    def _fire_reminders(self):
+        self._reminder_job = None
+        due, changed = reminders.fire_due(self.reminders, self.tasks, datetime.now())
+        if changed:
+            task_tracker.save_tasks(self.tasks, self.key)
+            self.refresh_tasks()
+        self._arm_reminders()
+        if due:
+            messagebox.showinfo("Reminder", "\n".join(f"⏰ {t['description']}" for t in due))
+
+    def _selected_id(self, action):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showerror("Selection Error", f"Please select a task to {action}.")
+            return None
+        if selected[0].startswith("a"):
+            messagebox.showinfo("Archived", "Archived tasks are read-only.")
+            return None
+        return int(selected[0])
 
     def add_task(self):
         desc = self.new_task_var.get().strip()
@@ -61,40 +195,76 @@ class TaskTab(ttk.Frame):
             messagebox.showerror("Input Error", "Task description cannot be empty.")
             return
         task = {
-            "id": (self.tasks[-1]["id"] + 1) if self.tasks else 1,
+            "id": task_tracker.next_id(self.key, self.tasks),
             "description": desc,
             "completed": False,
             "created_at": datetime.now().isoformat()
         }
         self.tasks.append(task)
+        self.history.inserted(task)
         task_tracker.save_tasks(self.tasks, self.key)
         self.new_task_var.set("")
         self.refresh_tasks()
 
     def mark_complete(self):
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showerror("Selection Error", "Please select a task to mark complete.")
+        tid = self._selected_id("mark complete")
+        if tid is None:
             return
-        tid = int(selected[0])
         found = False
         for t in self.tasks:
             if t["id"] == tid:
+                before = dict(t)
                 t["completed"] = True
+                self.history.updated(before, t)
                 found = True
                 break
         if found:
             task_tracker.save_tasks(self.tasks, self.key)
+            self.reminders.cancel(tid)
+            self._arm_reminders()
             self.refresh_tasks()
         else:
             messagebox.showerror("Error", "Task not found.")
 
+    def set_due(self):
+        tid = self._selected_id("set a due date for")
+        if tid is None:
+            return
+        task = next((t for t in self.tasks if t["id"] == tid), None)
+        if task is None:
+            messagebox.showerror("Error", "Task not found.")
+            return
+        due_text = tk.simpledialog.askstring("Due Date", "Due (YYYY-MM-DD [HH:MM], blank to clear):",
+                                             initialvalue=reminders.format_due(task).rstrip(" ↻"))
+        if due_text is None:
+            return
+        repeat = ""
+        if due_text.strip():
+            repeat = tk.simpledialog.askstring("Repeat", "Repeat (daily/weekly/monthly, blank for none):",
+                                               initialvalue=task.get("recurrence") or "")
+            if repeat is None:
+                return
+        try:
+            due_at, recurrence = reminders.parse_due(due_text), reminders.parse_recurrence(repeat)
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+        before = dict(task)
+        task.pop("due_at", None)
+        task.pop("recurrence", None)
+        if due_at:
+            task["due_at"] = due_at
+        if recurrence:
+            task["recurrence"] = recurrence
+        self.history.updated(before, task)
+        task_tracker.save_tasks(self.tasks, self.key)
+        self._reschedule(task)
+        self.refresh_tasks()
+
     def edit_task(self):
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showerror("Selection Error", "Please select a task to edit.")
+        tid = self._selected_id("edit")
+        if tid is None:
             return
-        tid = int(selected[0])
         for t in self.tasks:
             if t["id"] == tid:
                 new_desc = tk.simpledialog.askstring("Edit Task", "Enter new description:", initialvalue=t["description"])
@@ -103,22 +273,25 @@ class TaskTab(ttk.Frame):
                     if not new_desc:
                         messagebox.showerror("Input Error", "Task description cannot be empty.")
                         return
+                    before = dict(t)
                     t["description"] = new_desc
+                    self.history.updated(before, t)
                     task_tracker.save_tasks(self.tasks, self.key)
                     self.refresh_tasks()
                 return
         messagebox.showerror("Error", "Task not found.")
 
     def delete_task(self):
-        selected = self.tree.selection()
-        if not selected:
-            messagebox.showerror("Selection Error", "Please select a task to delete.")
+        tid = self._selected_id("delete")
+        if tid is None:
             return
-        tid = int(selected[0])
-        orig_len = len(self.tasks)
-        self.tasks = [t for t in self.tasks if t["id"] != tid]
-        if len(self.tasks) < orig_len:
+        index = next((i for i, t in enumerate(self.tasks) if t["id"] == tid), None)
+        if index is not None:
+            self.history.deleted(self.tasks, index)
+            del self.tasks[index]
             task_tracker.save_tasks(self.tasks, self.key)
+            self.reminders.cancel(tid)
+            self._arm_reminders()
             self.refresh_tasks()
         else:
             messagebox.showerror("Error", "Task not found.")
@@ -126,14 +299,19 @@ class TaskTab(ttk.Frame):
 class BudgetTab(ttk.Frame):
     def __init__(self, master):
         super().__init__(master)
-        self.key = load_key()
+        self.key = load_keyring()
+        budget_tracker.archive_old_budgets(self.key)
         self.budgets = budget_tracker.load_budgets(self.key)
+        self.history = budget_tracker.load_history(self.key)
+        self.limit_tracker = budget_tracker.load_limit_tracker(self.key)
+        self.older_months = budget_tracker.archived_months()
+        self.archived = []
         self._create_widgets()
         self.refresh_budgets()
 
     def _create_widgets(self):
-        columns = ("Item", "Amount", "Date")
-        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse", height=12)
+        columns = ("Item", "Amount", "Date", "Tags")
+        self.tree = VirtualTreeview(self, columns=columns, height=12)
         for col in columns:
             self.tree.heading(col, text=col)
             if col == "Amount":
@@ -154,19 +332,66 @@ class BudgetTab(ttk.Frame):
         # Total spent label
         self.total_label = ttk.Label(self, text="Total Spent: $0.00", font=("Arial", 11, "bold"))
         self.total_label.grid(row=2, column=0, columnspan=3, sticky="w", padx=10, pady=6)
+        self.older_button = ttk.Button(self, text="Load Older", command=self.load_older)
+        self.older_button.grid(row=2, column=4, padx=2, pady=6)
+        self.tree.tag_configure("archived", foreground="gray")
+
+        # Tags for the next expense, and a tag query filter
+        self.tags_var = tk.StringVar()
+        self.tag_query_var = tk.StringVar()
+        ttk.Label(self, text="Tags (blank: auto):").grid(row=3, column=0, padx=10, pady=2, sticky="w")
+        ttk.Entry(self, textvariable=self.tags_var, width=18).grid(row=3, column=1, padx=2, pady=2, sticky="w")
+        ttk.Button(self, text="Edit Tags", command=self.edit_tags).grid(row=3, column=2, padx=2, pady=2)
+        tag_entry = ttk.Entry(self, textvariable=self.tag_query_var, width=18)
+        tag_entry.grid(row=4, column=0, padx=10, pady=2, sticky="w")
+        tag_entry.bind("<Return>", lambda e: self.refresh_budgets())
+        ttk.Button(self, text="Filter Tags", command=self.refresh_budgets).grid(row=4, column=1, padx=2, pady=2, sticky="w")
+        self.category_label = ttk.Label(self, text="", wraplength=700)
+        self.category_label.grid(row=5, column=0, columnspan=5, sticky="w", padx=10, pady=4)
+        # Current period of each limit in config.ini
+        self.limits_label = ttk.Label(self, text="", wraplength=700)
+        self.limits_label.grid(row=6, column=0, columnspan=5, sticky="w", padx=10, pady=4)
 
         # Configure resizing
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
+    @metrics.timed("tk.refresh_budgets")
     def refresh_budgets(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
         self.budgets = budget_tracker.load_budgets(self.key)
-        for b in self.budgets:
-            self.tree.insert("", "end", iid=b["id"], values=(b["item"], f"${b['amount']:.2f}", b["date"]))
-        total = sum(b["amount"] for b in self.budgets)
-        self.total_label.config(text=f"Total Spent: ${total:.2f}")
+        hot_ids = {b["id"] for b in self.budgets}
+        records = self.budgets + [b for b in self.archived if b["id"] not in hot_ids]
+        index = tags.TagIndex(records)
+        mask = _query_tags(index, self.tag_query_var.get())
+        rows = []
+        for i in tags.iter_bits(mask):
+            b = records[i]
+            values = (b["item"], f"${b['amount']:.2f}", b["date"], tags.format_tags(b))
+            if i < len(self.budgets):
+                rows.append((str(b["id"]), values, ()))
+            else:
+                rows.append((f"a{b['id']}", values, ("archived",)))
+        self.tree.set_rows(rows)
+        totals = index.totals([b["amount"] for b in records], mask)
+        self.category_label.config(
+            text="By category: " + "  ·  ".join(f"{tag} ${total:.2f}" for tag, total in totals.items())
+            if totals else "")
+        self.older_button.state(["!disabled"] if self.older_months else ["disabled"])
+        summary = budget_tracker.read_summary(self.key)
+        self.total_label.config(text=f"Total Spent: ${summary['total_spent']:.2f}")
+        self.limits_label.config(text="\n".join(("⚠ " if e["level"] != "ok" else "") + limits.format_entry(e)
+                                                 for e in self.limit_tracker.status()))
+
+    def _alert(self, entries):
+        if entries:
+            messagebox.showwarning("Budget Limit", "\n".join(limits.format_entry(e) for e in entries))
+
+    def load_older(self):
+        if not self.older_months:
+            return
+        month = self.older_months.pop(0)
+        self.archived.extend(budget_tracker.load_archived_budgets(self.key, month))
+        self.refresh_budgets()
 
     def add_expense(self):
         item = self.item_var.get().strip()
@@ -179,31 +404,85 @@ class BudgetTab(ttk.Frame):
             messagebox.showerror("Input Error", "Amount must be a valid number.")
             return
         expense = {
-            "id": (self.budgets[-1]["id"] + 1) if self.budgets else 1,
+            "id": budget_tracker.next_id(self.key, self.budgets),
             "item": item,
             "amount": amount,
             "date": datetime.now().date().isoformat()
         }
+        if tags.parse_tags(self.tags_var.get()):
+            expense["tags"] = tags.parse_tags(self.tags_var.get())
+        else:
+            categorize.default_categorizer().categorize(expense)
         self.budgets.append(expense)
+        self.history.inserted(expense)
         budget_tracker.save_budgets(self.budgets, self.key)
         self.item_var.set("")
         self.amount_var.set("")
+        self.tags_var.set("")
+        alerts = self.limit_tracker.add(expense)
         self.refresh_budgets()
+        self._alert(alerts)
+
+    def edit_tags(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showerror("Selection Error", "Please select an expense to tag.")
+            return
+        if selected[0].startswith("a"):
+            messagebox.showinfo("Archived", "Archived expenses are read-only.")
+            return
+        expense = next((b for b in self.budgets if b["id"] == int(selected[0])), None)
+        if expense is None:
+            messagebox.showerror("Error", "Expense not found.")
+            return
+        text = tk.simpledialog.askstring("Edit Tags", "Tags (comma-separated):", initialvalue=tags.format_tags(expense))
+        if text is None:
+            return
+        before = dict(expense)
+        expense.pop("tags", None)
+        if tags.parse_tags(text):
+            expense["tags"] = tags.parse_tags(text)
+        self.history.updated(before, expense)
+        budget_tracker.save_budgets(self.budgets, self.key)
+        # Re-count under the new categories
+        alerts = self.limit_tracker.replace(before, expense)
+        self.refresh_budgets()
+        self._alert(alerts)
 
     def delete_expense(self):
         selected = self.tree.selection()
         if not selected:
             messagebox.showerror("Selection Error", "Please select an expense to delete.")
             return
+        if selected[0].startswith("a"):
+            messagebox.showinfo("Archived", "Archived expenses are read-only.")
+            return
         eid = int(selected[0])
-        orig_len = len(self.budgets)
-        self.budgets = [b for b in self.budgets if b["id"] != eid]
-        if len(self.budgets) < orig_len:
+        index = next((i for i, b in enumerate(self.budgets) if b["id"] == eid), None)
+        if index is not None:
+            self.history.deleted(self.budgets, index)
+            self.limit_tracker.remove(self.budgets.pop(index))
             budget_tracker.save_budgets(self.budgets, self.key)
             self.refresh_budgets()
         else:
             messagebox.showerror("Error", "Expense not found.")
 
+    def undo(self):
+        """Revert the latest change; returns False if there was nothing to undo."""
+        return self._history_step(self.history.undo)
+
+    def redo(self):
+        return self._history_step(self.history.redo)
+
+    def _history_step(self, step):
+        if not step(self.budgets):
+            return False
+        budget_tracker.save_budgets(self.budgets, self.key)
+        # Cheap: rebuilt from the summary block that was just written
+        self.limit_tracker = budget_tracker.load_limit_tracker(self.key)
+        self.refresh_budgets()
+        return True
+
     def export_expenses(self):
         if not self.budgets:
             messagebox.showinfo("Export", "No expenses to export.")
@@ -219,12 +498,32 @@ class WeatherTab(ttk.Frame):
 class MainApp(tk.Tk):
     def __init__(self):
         super().__init__()
-        self.title("TriFlow")
         self.geometry("750x500")
+        self.notebook = None
+        menubar = tk.Menu(self)
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=lambda: self._history("undo"))
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=lambda: self._history("redo"))
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        self.bind_all("<Control-z>", lambda e: self._history("undo"))
+        self.bind_all("<Control-y>", lambda e: self._history("redo"))
+        view_menu = tk.Menu(menubar, tearoff=0)
+        view_menu.add_command(label="Timeline...", command=self.show_timeline)
+        menubar.add_cascade(label="View", menu=view_menu)
+        profile_menu = tk.Menu(menubar, tearoff=0)
+        profile_menu.add_command(label="Switch Profile...", command=self.switch_profile)
+        profile_menu.add_command(label="Lock", command=self.lock_profile)
+        menubar.add_cascade(label="Profile", menu=profile_menu)
+        self.config(menu=menubar)
         self._create_widgets()
 
     def _create_widgets(self):
-        notebook = ttk.Notebook(self)
+        # Rebuilt on every profile switch: the tabs load the active profile's data
+        if self.notebook is not None:
+            self.notebook.destroy()
+        profile = profiles.active()
+        self.title(f"TriFlow - {profile.name}" if profile else "TriFlow")
+        notebook = self.notebook = ttk.Notebook(self)
         notebook.pack(fill="both", expand=True)
 
         self.task_tab = TaskTab(notebook)
@@ -235,6 +534,30 @@ class MainApp(tk.Tk):
         notebook.add(self.budget_tab, text="Budget")
         notebook.add(self.weather_tab, text="Weather")
 
+    def _history(self, action):
+        """Undo or redo on the selected tab, if it keeps a history."""
+        tab = self.nametowidget(self.notebook.select())
+        if hasattr(tab, action) and not getattr(tab, action)():
+            self.bell()
+
+    def show_timeline(self):
+        """Timeline of the selected tab's data (tasks unless the Budget tab is selected)."""
+        tab = self.nametowidget(self.notebook.select())
+        TimelineDialog(self, "Budget" if tab is self.budget_tab else "Tasks")
+
+    def switch_profile(self):
+        ProfileDialog(self, self._use_profile)
+
+    def _use_profile(self, profile):
+        profiles.activate(profile)
+        self._create_widgets()
+
+    def lock_profile(self):
+        """Forget the active profile's key and fall back to guest data."""
+        if profiles.active() is not None:
+            profiles.lock(profiles.active())
+            self._create_widgets()
+
 if __name__ == "__main__":
     app = MainApp()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Timeline window for the TriFlow Tk app.
+
+Features:
+- Shows the tasks or expenses as they were at the end of a past day, or
+  what changed between two days (added, removed, archived, changed), rebuilt
+  from each data file's change log and checkpoints (see core.timeline).
+- Warns when a day is before the data's history starts.
+
+Structure:
+- Class: DateField(ttk.Frame), year/month/day spinboxes (Tk has no date picker).
+- Class: TimelineDialog(tk.Toplevel), opened from MainApp's View menu.
+"""
+
+import calendar
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import date, timedelta
+
+from core import task_tracker, budget_tracker, reminders, tags, timeline
+from core.utils import load_keyring
+from desktop.gui.virtual_tree import VirtualTreeview
+
+def _task_values(t):
+    return (t["description"], "✅ Done" if t["completed"] else "❌ Pending",
+            t["created_at"][:10], reminders.format_due(t), tags.format_tags(t))
+
+def _budget_values(b):
+    return (b["item"], f"${b['amount']:.2f}", b["date"], tags.format_tags(b))
+
+class DateField(ttk.Frame):
+    def __init__(self, master, value):
+        super().__init__(master)
+        self.year = tk.StringVar(value=str(value.year))
+        self.month = tk.StringVar(value=str(value.month))
+        self.day = tk.StringVar(value=str(value.day))
+        self.spinboxes = [
+            ttk.Spinbox(self, from_=2000, to=9999, textvariable=self.year, width=5),
+            ttk.Spinbox(self, from_=1, to=12, textvariable=self.month, width=3),
+            ttk.Spinbox(self, from_=1, to=31, textvariable=self.day, width=3),
+        ]
+        for spinbox in self.spinboxes:
+            spinbox.pack(side="left")
+
+    def get(self):
+        """The picked date; a day past the month's end means its last day."""
+        try:
+            year, month, day = (int(var.get()) for var in (self.year, self.month, self.day))
+            return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+        except ValueError:
+            raise ValueError("Invalid date: pick a year, month and day.") from None
+
+    def set_enabled(self, enabled):
+        for spinbox in self.spinboxes:
+            spinbox.state(["!disabled"] if enabled else ["disabled"])
+
+class TimelineDialog(tk.Toplevel):
+    """Tasks or expenses as of a past date, or what changed between two dates."""
+
+    KINDS = {
+        "Tasks": (("Description", "Status", "Created", "Due", "Tags"), _task_values,
+                  task_tracker.load_tasks_as_of, task_tracker.diff_tasks),
+        "Budget": (("Item", "Amount", "Date", "Tags"), _budget_values,
+                   budget_tracker.load_budgets_as_of, budget_tracker.diff_budgets),
+    }
+    CHANGE_COLUMNS = ("Change", "ID", "Record", "Details")
+
+    def __init__(self, master, kind="Tasks"):
+        super().__init__(master)
+        self.title("Timeline")
+        self.geometry("750x450")
+        self.transient(master)
+        self.key = load_keyring()
+        self.tree = None
+        self._create_widgets(kind)
+
+    def _create_widgets(self, kind):
+        bar = ttk.Frame(self)
+        bar.pack(fill="x", padx=10, pady=6)
+        self.kind_var = tk.StringVar(value=kind)
+        kind_box = ttk.Combobox(bar, textvariable=self.kind_var, values=list(self.KINDS),
+                                state="readonly", width=8)
+        kind_box.pack(side="left")
+        kind_box.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+        ttk.Label(bar, text="As of:").pack(side="left", padx=(10, 2))
+        self.as_of = DateField(bar, date.today())
+        self.as_of.pack(side="left")
+        self.compare_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(bar, text="Changes since:", variable=self.compare_var,
+                        command=lambda: self.since.set_enabled(self.compare_var.get())
+                        ).pack(side="left", padx=(10, 2))
+        self.since = DateField(bar, date.today() - timedelta(days=7))
+        self.since.set_enabled(False)
+        self.since.pack(side="left")
+        ttk.Button(bar, text="Show", command=self.refresh).pack(side="left", padx=10)
+        self.summary_label = ttk.Label(self, text="")
+        self.summary_label.pack(side="bottom", anchor="w", padx=10, pady=6)
+
+    def _set_rows(self, columns, rows):
+        # Columns differ between a kind's records and the change list
+        if self.tree is not None:
+            self.tree.destroy()
+        self.tree = VirtualTreeview(self, columns=columns, height=14)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=120)
+        self.tree.pack(fill="both", expand=True, padx=10)
+        self.tree.set_rows(rows)
+
+    def refresh(self):
+        columns, values, as_of, diff = self.KINDS[self.kind_var.get()]
+        try:
+            end = self.as_of.get()
+            if self.compare_var.get():
+                self._show_diff(diff(self.key, self.since.get(), end))
+                return
+            records = as_of(self.key, end)
+        except ValueError as e:
+            messagebox.showwarning("Timeline", str(e), parent=self)
+            return
+        self._set_rows(columns, [(str(r["id"]), values(r), ()) for r in records])
+        self.summary_label.config(text=f"{len(records)} records at the end of {end.isoformat()}.")
+
+    def _show_diff(self, result):
+        rows = [(section.capitalize(), r, "") for section in ("added", "removed", "archived")
+                for r in result[section]]
+        rows += [("Changed", after, timeline.format_changes(before, after))
+                 for before, after in result["changed"]]
+        self._set_rows(self.CHANGE_COLUMNS, [
+            (f"{i}", (change, str(r["id"]), r.get("description") or r.get("item", ""), details), ())
+            for i, (change, r, details) in enumerate(rows)])
+        self.summary_label.config(text=", ".join(f"{len(result[s])} {s}"
+                                                 for s in ("added", "removed", "archived", "changed")))
@@ -0,0 +1,187 @@
+"""
+Virtual-scrolling wrapper around ttk.Treeview for very long lists.
+
+A plain Treeview creates a Tcl item for every row, so inserting 100k rows
+takes seconds and a lot of memory.  VirtualTreeview keeps the full dataset
+as a Python list and only ever holds as many Treeview items as fit on
+screen, plus one buffer row for a partially visible last line ("slots").
+Scrolling re-fills the slots with the rows of the new
+window instead of inserting or deleting items, and the scrollbar is driven
+by the full dataset size.
+
+Rows are (iid, values, tags) tuples where iid is the record id as a string.
+Selection is tracked by that id, so it survives scrolling and reloads, and
+selection() returns record ids just like a regular Treeview keyed by id.
+
+Structure:
+- Class: VirtualTreeview(ttk.Frame)
+- Supports the Treeview calls used by the tabs: heading(), column(),
+  tag_configure(), selection(), selection_set(), plus set_rows().
+"""
+
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+# Extra slots beyond the fully visible rows, so a partially shown last line
+# is filled instead of blank.
+BUFFER_ROWS = 1
+
+
+class VirtualTreeview(ttk.Frame):
+    def __init__(self, master, columns, height=12, **tree_kwargs):
+        super().__init__(master)
+        self.rows = []
+        self.first = 0
+        self.selected_iid = None
+        self._slots = []
+        # Rows fully visible in the viewport; there are page + BUFFER_ROWS slots.
+        self.page = height
+        self._index_by_iid = {}
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse",
+                                 height=height, **tree_kwargs)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._wheel_steps(-1))
+        self.tree.bind("<Button-5>", lambda e: self._wheel_steps(1))
+        for keysym, step in (("Up", -1), ("Down", 1)):
+            self.tree.bind(f"<{keysym}>", lambda e, s=step: self._move_selection(s))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self.page))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self.page))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self.rows)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self.rows)))
+        self._build_slots()
+
+    # Treeview pass-throughs
+    def heading(self, column, **kwargs):
+        return self.tree.heading(column, **kwargs)
+
+    def column(self, column, **kwargs):
+        return self.tree.column(column, **kwargs)
+
+    def tag_configure(self, tagname, **kwargs):
+        return self.tree.tag_configure(tagname, **kwargs)
+
+    def selection(self):
+        return (self.selected_iid,) if self.selected_iid is not None else ()
+
+    def selection_set(self, iid):
+        self.selected_iid = str(iid) if iid is not None else None
+        index = self._index_by_iid.get(self.selected_iid)
+        if index is not None and not self.first <= index < self.first + self.page:
+            self.scroll_to(index - self.page // 2)
+        else:
+            self._render()
+
+    # Data
+    def set_rows(self, rows):
+        """Replace the dataset.  Keeps the scroll position and selected id."""
+        self.rows = rows
+        self._index_by_iid = {row[0]: i for i, row in enumerate(rows)}
+        if self.selected_iid not in self._index_by_iid:
+            self.selected_iid = None
+        self.scroll_to(self.first)
+
+    # Scrolling
+    def scroll_to(self, first):
+        self.first = max(0, min(first, len(self.rows) - self.page))
+        self._render()
+
+    def scroll_by(self, delta):
+        self.scroll_to(self.first + delta)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.rows)))
+        elif action == "scroll":
+            step = self.page if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas.
+        steps = -int(event.delta / 120) if abs(event.delta) >= 120 else -event.delta
+        return self._wheel_steps(steps)
+
+    def _wheel_steps(self, steps):
+        self.scroll_by(steps * 3)
+        # Keep the inner Treeview from scrolling its slots itself.
+        return "break"
+
+    def _on_resize(self, event):
+        row_height = DEFAULT_ROW_HEIGHT
+        top = DEFAULT_ROW_HEIGHT
+        if self._slots:
+            bbox = self.tree.bbox(self._slots[0])
+            if bbox:
+                top, row_height = bbox[1], bbox[3]
+        page = max(1, (event.height - top) // max(1, row_height))
+        if page != self.page:
+            self.page = page
+            self._build_slots()
+            self.scroll_to(self.first)
+
+    # Rendering
+    def _build_slots(self):
+        self.tree.delete(*self.tree.get_children())
+        self._slots = [self.tree.insert("", "end", iid=f"slot{i}") for i in range(self.page + BUFFER_ROWS)]
+
+    def _render(self):
+        select_slot = None
+        window = self.rows[self.first:self.first + len(self._slots)]
+        for i, slot in enumerate(self._slots):
+            if i < len(window):
+                iid, values, tags = window[i]
+                self.tree.item(slot, values=values, tags=tags)
+                if iid == self.selected_iid:
+                    select_slot = slot
+            else:
+                self.tree.item(slot, values=(), tags=("empty",))
+        if select_slot is not None:
+            self.tree.selection_set(select_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        self.tree.yview_moveto(0)
+        total = len(self.rows)
+        if total > self.page:
+            self.scrollbar.set(self.first / total, (self.first + self.page) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _slot_row(self, slot):
+        try:
+            index = self.first + self._slots.index(slot)
+        except ValueError:
+            return None
+        return index if index < len(self.rows) else None
+
+    def _on_select(self, _event):
+        selected = self.tree.selection()
+        if not selected:
+            return
+        index = self._slot_row(selected[0])
+        if index is None:
+            # Clicked an empty slot below the last row.
+            self.tree.selection_remove(selected[0])
+            return
+        self.selected_iid = self.rows[index][0]
+
+    def _move_selection(self, step):
+        if not self.rows:
+            return "break"
+        current = self._index_by_iid.get(self.selected_iid, self.first - (1 if step > 0 else -1))
+        index = max(0, min(len(self.rows) - 1, current + step))
+        self.selected_iid = self.rows[index][0]
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + self.page:
+            self.scroll_to(index - self.page + 1)
+        else:
+            self._render()
+        self.tree.event_generate("<<TreeviewSelect>>")
+        return "break"
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import shutil
+import unittest
+from unittest import mock
+from pathlib import Path
+from core import api_server, timeline
+from triflow_pyside6_pyside6_app.data import local_store
+
+class TestApiServer(unittest.TestCase):
+    def setUp(self):
+        self.originals = (local_store.TASKS_FILE, local_store.BUDGETS_FILE)
+        local_store.TASKS_FILE = Path("data/test_api_tasks.enc")
+        local_store.BUDGETS_FILE = Path("data/test_api_budgets.enc")
+        self._cleanup()
+
+    def tearDown(self):
+        self._cleanup()
+        local_store.TASKS_FILE, local_store.BUDGETS_FILE = self.originals
+
+    def _cleanup(self):
+        for path in (local_store.TASKS_FILE, local_store.BUDGETS_FILE):
+            if path.exists():
+                path.unlink()
+            shutil.rmtree(timeline.timeline_dir(path), ignore_errors=True)
+
+    def test_etag_and_delta_feed(self):
+        async def run():
+            state = api_server.ApiState()
+            call = lambda *args: api_server.dispatch(state, *args)
+            status, headers, _, _ = await call("GET", "/tasks", {}, b"")
+            self.assertEqual(status, 200)
+            status, _, _, _ = await call("GET", "/tasks", {"if-none-match": headers["ETag"]}, b"")
+            self.assertEqual(status, 304)
+            await call("POST", "/tasks", {}, json.dumps({"description": "Buy milk"}).encode())
+            await call("POST", "/expenses", {}, json.dumps({"item": "Tea", "amount": 2}).encode())
+            status, _, _, _ = await call("GET", "/tasks", {"if-none-match": headers["ETag"]}, b"")
+            self.assertEqual(status, 200)
+            status, _, payload, _ = await call("GET", f"/changes?since={state.generation}.1", {}, b"")
+            changes = payload()["changes"]
+            self.assertEqual([c["collection"] for c in changes], ["expenses"])
+            cursor = payload()["cursor"]
+            status, _, _, _ = await call("GET", f"/changes?since={cursor}", {}, b"")
+            self.assertEqual(status, 304)
+            # After a restart the sequence starts over: old cursors get a snapshot
+            restarted = api_server.ApiState()
+            status, _, payload, _ = await api_server.dispatch(restarted, "GET", f"/changes?since={cursor}", {}, b"")
+            self.assertEqual(status, 200)
+            self.assertTrue(payload()["reset"])
+            self.assertEqual([t["description"] for t in payload()["tasks"]], ["Buy milk"])
+
+        asyncio.run(run())
+        self.assertEqual(local_store.load_tasks()[0]["description"], "Buy milk")
+
+    def test_failed_save_changes_nothing(self):
+        async def run():
+            state = api_server.ApiState()
+            call = lambda *args: api_server.dispatch(state, *args)
+            await call("POST", "/tasks", {}, json.dumps({"description": "Buy milk"}).encode())
+            seq = state.seq
+            with mock.patch.object(local_store, "_write_encrypted", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    await call("POST", "/tasks", {}, json.dumps({"description": "Buy tea"}).encode())
+                with self.assertRaises(OSError):
+                    await call("PATCH", "/tasks/1", {}, json.dumps({"completed": True}).encode())
+                with self.assertRaises(OSError):
+                    await call("DELETE", "/tasks/1", {}, b"")
+            self.assertEqual(state.seq, seq)
+            self.assertEqual(state.collections["tasks"].records, local_store.load_tasks())
+            self.assertFalse(state.collections["tasks"].records[0]["completed"])
+
+        asyncio.run(run())
+
+    def test_rejects_non_finite_amounts(self):
+        async def run():
+            state = api_server.ApiState()
+            for amount in ("nan", "inf", "-Infinity"):
+                with self.assertRaises(api_server.HttpError) as ctx:
+                    await api_server.dispatch(state, "POST", "/expenses", {},
+                                              json.dumps({"item": "Tea", "amount": amount}).encode())
+                self.assertEqual(ctx.exception.status, 400)
+            self.assertEqual(state.collections["expenses"].records, [])
+
+        asyncio.run(run())
+
+    def test_malformed_content_length(self):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b"POST /tasks HTTP/1.1\r\nContent-Length: ten\r\n\r\n")
+            with self.assertRaises(api_server.HttpError) as ctx:
+                await api_server._read_request(reader)
+            self.assertEqual(ctx.exception.status, 400)
+
+        asyncio.run(run())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import unittest
+from datetime import date
+from core import archive, storage
+from core.utils import load_key
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.key = load_key()
+        self.test_file = "data/test_archive/budgets.json.enc"
+        shutil.rmtree("data/test_archive", ignore_errors=True)
+
+    def tearDown(self):
+        shutil.rmtree("data/test_archive", ignore_errors=True)
+
+    def test_old_expenses_move_to_month_segments(self):
+        budgets = [
+            {"id": 1, "item": "Rent", "amount": 800.0, "date": "2024-01-01"},
+            {"id": 2, "item": "Coffee", "amount": 2.5, "date": "2024-02-15"},
+            {"id": 3, "item": "Lunch", "amount": 9.0, "date": "2025-06-01"},
+        ]
+        storage.write_records(self.test_file, budgets, self.key, "budgets")
+        moved = archive.archive_records(self.test_file, self.key, "budgets", today=date(2025, 6, 10))
+        self.assertEqual(moved, 2)
+        self.assertEqual([b["id"] for b in storage.read_records(self.test_file, self.key)], [3])
+        self.assertEqual(archive.list_months(self.test_file), ["2024-02", "2024-01"])
+        self.assertEqual(archive.load_month(self.test_file, self.key, "2024-01")[0]["item"], "Rent")
+        summary = archive.combined_summary(self.test_file, self.key, "budgets")
+        self.assertEqual((summary["count"], summary["total_spent"]), (3, 811.5))
+        self.assertEqual(archive.search_history(self.test_file, self.key, "coff", "item")[0]["id"], 2)
+
+    def test_pending_and_newest_tasks_stay_hot(self):
+        tasks = [
+            {"id": 1, "description": "Old pending", "completed": False, "created_at": "2024-01-01T09:00:00"},
+            {"id": 2, "description": "Old done", "completed": True, "created_at": "2024-01-02T09:00:00"},
+            {"id": 3, "description": "Newest done", "completed": True, "created_at": "2024-01-03T09:00:00"},
+        ]
+        storage.write_records(self.test_file, tasks, self.key, "tasks")
+        archive.archive_records(self.test_file, self.key, "tasks", today=date(2025, 1, 1))
+        self.assertEqual([t["id"] for t in storage.read_records(self.test_file, self.key)], [1, 3])
+        self.assertEqual(archive.archive_records(self.test_file, self.key, "tasks", today=date(2025, 1, 1)), 0)
+
+    def test_new_ids_skip_archived_ones(self):
+        budgets = [
+            {"id": 1, "item": "Rent", "amount": 800.0, "date": "2024-01-01"},
+            {"id": 2, "item": "Coffee", "amount": 2.5, "date": "2024-02-15"},
+            {"id": 3, "item": "Lunch", "amount": 9.0, "date": "2025-06-01"},
+        ]
+        storage.write_records(self.test_file, budgets, self.key, "budgets")
+        archive.archive_records(self.test_file, self.key, "budgets", today=date(2025, 6, 10))
+        # Deleting the only hot expense leaves nothing to count from.
+        storage.write_records(self.test_file, [], self.key, "budgets")
+        summary = archive.combined_summary(self.test_file, self.key, "budgets")
+        self.assertEqual(archive.next_id(summary), 3)
+        self.assertEqual(archive.next_id(summary, [{"id": 7}]), 8)
+
+if __name__ == "__main__":
+    unittest.main()
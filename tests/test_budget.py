@@ -1,6 +1,7 @@
 import unittest
 import os
-from core import budget_tracker
+import shutil
+from core import budget_tracker, timeline
 from core.utils import load_key, encrypt_data, decrypt_data
 
 class TestBudgetTracker(unittest.TestCase):
@@ -15,6 +16,7 @@ class TestBudgetTracker(unittest.TestCase):
     def tearDown(self):
         if os.path.exists(self.test_file):
             os.remove(self.test_file)
+        shutil.rmtree(timeline.timeline_dir(self.test_file), ignore_errors=True)
         budget_tracker.DATA_FILE = self.original_data_file
 
     def test_add_and_load_expense(self):
@@ -0,0 +1,45 @@
+import unittest
+from core import categorize
+
+class TestCategorize(unittest.TestCase):
+    def setUp(self):
+        self.categorizer = categorize.Categorizer([
+            ("food", categorize.parse_patterns("lunch, coffee, grocer*, /piz+a/")),
+            ("transport", categorize.parse_patterns("bus, train, /uber|taxi/")),
+            ("coffee-shop", categorize.parse_patterns("coffee")),
+        ])
+
+    def test_pattern_kinds(self):
+        classify = self.categorizer.classify
+        self.assertEqual(classify("Coffee"), "food")  # first listed category wins
+        self.assertEqual(classify("  Groceries "), "food")
+        self.assertEqual(classify("Pizzza night"), "food")
+        self.assertEqual(classify("Uber home"), "transport")
+        self.assertEqual(classify("Bus ticket"), "transport")
+        self.assertIsNone(classify("Business"))  # "bus" needs a whole word
+        self.assertIsNone(classify("Rent"))
+        # The earliest match in the item decides.
+        self.assertEqual(classify("Train lunch"), "transport")
+
+    def test_parse_patterns_keeps_commas_in_regex(self):
+        self.assertEqual(categorize.parse_patterns(" a, b* ,/x{1,2}y/, c"), ["a", "b*", "/x{1,2}y/", "c"])
+
+    def test_categorize_records(self):
+        records = [
+            {"item": "Lunch", "amount": 9.0},
+            {"item": "Taxi", "amount": 20.0, "tags": ["reimbursed"]},
+            {"item": "Rent", "amount": 800.0},
+        ]
+        self.assertEqual(categorize.categorize_records(records, self.categorizer), 1)
+        self.assertEqual(records[0]["tags"], ["food"])
+        self.assertEqual(records[1]["tags"], ["reimbursed"])
+        self.assertNotIn("tags", records[2])
+        self.assertEqual(categorize.categorize_records(records, self.categorizer, overwrite=True), 2)
+        self.assertEqual(records[1]["tags"], ["transport", "reimbursed"])
+
+    def test_bad_regex_is_reported(self):
+        with self.assertRaises(ValueError):
+            categorize.Categorizer([("food", ["/(/"])])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from core import compression
+from core.utils import load_key, encrypt_data, decrypt_data
+from cryptography.fernet import Fernet
+
+class TestCompression(unittest.TestCase):
+    def test_round_trip_each_algorithm(self):
+        raw = b'[{"id": 1, "item": "Coffee"}]' * 50
+        for algo in compression.available_algorithms():
+            packed = compression.compress(raw, algo)
+            self.assertEqual(compression.algorithm_of(packed), algo)
+            self.assertEqual(compression.decompress(packed), raw)
+
+    def test_auto_skips_small_payloads(self):
+        self.assertEqual(compression.algorithm_of(compression.compress(b"[]")), "none")
+        self.assertEqual(compression.algorithm_of(compression.compress(b"[1]" * 1000)), "zlib")
+
+    def test_legacy_uncompressed_token_still_decrypts(self):
+        key = load_key()
+        legacy = Fernet(key).encrypt(b'[{"id": 1}]')
+        self.assertEqual(decrypt_data(legacy, key), [{"id": 1}])
+
+    def test_compressed_token_is_smaller(self):
+        key = load_key()
+        data = [{"id": i, "item": "Groceries", "amount": 12.5, "date": "2025-01-01"} for i in range(500)]
+        self.assertLess(len(encrypt_data(data, key)), len(encrypt_data(data, key, compression="none")) / 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import date
+from unittest import mock
+from core import daemon, limits, profiles, task_tracker, budget_tracker
+from core.utils import load_key
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.key = load_key()
+        self.dir = tempfile.mkdtemp()
+        self.sock = os.path.join(self.dir, "triflow.sock")
+        self.saved = task_tracker.DATA_FILE, budget_tracker.DATA_FILE
+        # In the temp dir, so rolling backups and timelines go there too
+        task_tracker.DATA_FILE = os.path.join(self.dir, "tasks.json.enc")
+        budget_tracker.DATA_FILE = os.path.join(self.dir, "budgets.json.enc")
+        self.local = daemon.LocalCollection(task_tracker.DATA_FILE, "tasks", self.key)
+        self.local.save([{"id": 1, "description": "Write report", "completed": False,
+                          "created_at": "2025-01-01T00:00:00"}])
+
+    def tearDown(self):
+        task_tracker.DATA_FILE, budget_tracker.DATA_FILE = self.saved
+        shutil.rmtree(self.dir)
+
+    def start(self, idle_seconds=60):
+        ready = threading.Event()
+        thread = threading.Thread(target=asyncio.run, args=(
+            daemon.serve(self.key, self.sock, idle_seconds, ready.set),))
+        thread.start()
+        self.assertTrue(ready.wait(10))
+        client = daemon.connect_client(self.sock)
+        self.assertIsNotNone(client)
+        return thread, client
+
+    def stop(self, thread, client):
+        client.request("stop")
+        client.close()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.sock))
+
+    def test_serves_and_writes_through(self):
+        thread, client = self.start()
+        tasks = daemon.RemoteCollection(client, "tasks")
+        records = tasks.load()
+        self.assertEqual(records[0]["description"], "Write report")
+        records.append({"id": 2, "description": "Send it", "completed": False,
+                        "created_at": "2025-01-02T00:00:00"})
+        tasks.save(records)
+        self.assertEqual(self.local.load(), records)
+        self.assertEqual(tasks.summary()["count"], 2)
+        self.assertEqual(tasks.next_id(), 3)
+        # A write by another process is picked up on the next request.
+        self.local.save(records[:1])
+        self.assertEqual(tasks.load(), records[:1])
+        with self.assertRaises(daemon.DaemonError):
+            tasks.limit_status()
+        self.assertEqual(client.request("ping")["records"], {"tasks": 1, "budgets": 0})
+        self.stop(thread, client)
+
+    def test_budget_limits_and_idle_shutdown(self):
+        thread, client = self.start(idle_seconds=1)
+        budgets = daemon.RemoteCollection(client, "budgets")
+        self.assertEqual(budgets.load(), [])
+        self.assertEqual(budgets.limit_status(), daemon.LocalCollection(
+            budget_tracker.data_file(), "budgets", self.key).limit_status())
+        client.close()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(daemon.connect_client(self.sock))
+
+    def test_saved_expense_counts_once_towards_limits(self):
+        daily = ([limits.Limit("daily", None, 50.0)], 0.8)
+        today = date.today().isoformat()
+        with mock.patch.object(limits, "load_limits", return_value=daily):
+            thread, client = self.start()
+            for store in (daemon.LocalCollection(budget_tracker.data_file(), "budgets", self.key),
+                          daemon.RemoteCollection(client, "budgets")):
+                lunch = {"id": 1, "item": "Lunch", "amount": 30.0, "date": today}
+                store.save([lunch])
+                self.assertEqual(store.limit_add(lunch), [])
+                self.assertEqual(store.limit_status()[0]["spent"], 30.0)
+                dinner = {"id": 2, "item": "Dinner", "amount": 25.0, "date": today}
+                store.save([lunch, dinner])
+                self.assertEqual([e["level"] for e in store.limit_add(dinner)], ["exceeded"])
+                store.save([dinner])
+                store.limit_remove(lunch)
+                self.assertEqual(store.limit_status()[0]["spent"], 25.0)
+                store.save([])
+            self.stop(thread, client)
+
+    def test_socket_follows_profile(self):
+        self.assertEqual(daemon.PROFILES_DIR, profiles.PROFILES_DIR)
+        self.assertEqual(daemon.PROFILE_ENV, profiles.PROFILE_ENV)
+        self.assertEqual(daemon.socket_path(""), daemon.SOCKET_FILE)
+        profile = profiles.Profile("alice", os.path.join(profiles.PROFILES_DIR, "alice"), bytearray(load_key()))
+        self.assertEqual(daemon.socket_path("alice"), profile.data_path(daemon.SOCKET_FILE))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import unittest
+from datetime import date
+from unittest import mock
+from core import archive, keyring, storage, undo
+from core.utils import encrypt_data, decrypt_data
+
+class TestKeyring(unittest.TestCase):
+    def setUp(self):
+        os.makedirs("data", exist_ok=True)
+        self.key_file = "data/test_key.key"
+        self.paths = ["data/test_rot_a.enc", "data/test_rot_b.enc"]
+        self._cleanup()
+
+    def tearDown(self):
+        self._cleanup()
+
+    def _cleanup(self):
+        for path in [self.key_file, self.key_file + keyring.ROTATION_STATE_SUFFIX] + self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree("data/test_rotation", ignore_errors=True)
+
+    def ring(self):
+        return keyring.multifernet(keyring.ensure_keys(self.key_file))
+
+    def test_legacy_single_key_is_version_one(self):
+        with open(self.key_file, "wb") as f:
+            f.write(b"bLQ3dXKbZ8k0YH6y2kXc3n0o1dL9cVv2Gm7Q3T5gk0A=")
+        self.assertEqual(keyring.read_keys(self.key_file)[0][0], 1)
+
+    def test_rotation_keeps_data_readable_and_resumes(self):
+        old_ring = keyring.multifernet(keyring.ensure_keys(self.key_file))
+        for i, path in enumerate(self.paths):
+            with open(path, "wb") as f:
+                f.write(encrypt_data([{"id": i}], old_ring))
+        keyring.add_key(self.key_file)
+        ring = keyring.multifernet(keyring.ensure_keys(self.key_file))
+        self.assertEqual(decrypt_data(open(self.paths[0], "rb").read(), ring), [{"id": 0}])
+
+        seen = []
+        stop = keyring.threading.Event()
+
+        def progress(done, total, path):
+            seen.append(path)
+            stop.set()
+
+        self.assertFalse(keyring.rotate_store(self.key_file, self.paths, progress, stop))
+        self.assertTrue(keyring.rotate_store(self.key_file, self.paths, progress))
+        self.assertEqual(seen, self.paths)
+
+        keyring.retire_old_keys(self.key_file)
+        newest = keyring.multifernet(keyring.ensure_keys(self.key_file))
+        for i, path in enumerate(self.paths):
+            self.assertEqual(decrypt_data(open(path, "rb").read(), newest), [{"id": i}])
+
+    def test_rotation_covers_archived_months(self):
+        store = "data/test_rotation/budgets.json.enc"
+        budgets = [{"id": 1, "item": "Rent", "amount": 800.0, "date": "2024-01-01"},
+                   {"id": 2, "item": "Lunch", "amount": 9.0, "date": "2025-06-01"}]
+        storage.write_records(store, budgets, self.ring(), "budgets")
+        archive.archive_records(store, self.ring(), "budgets", today=date(2025, 6, 10))
+        keyring.add_key(self.key_file)
+        # A rotation that missed the archive must not let the old key go.
+        self.assertTrue(keyring.rotate_store(self.key_file, [store]))
+        with self.assertRaises(RuntimeError):
+            keyring.retire_old_keys(self.key_file, keyring.store_files([store]))
+        keyring.add_key(self.key_file)
+        self.assertTrue(keyring.rotate_store(self.key_file, keyring.store_files([store])))
+        keyring.retire_old_keys(self.key_file, keyring.store_files([store]))
+        self.assertEqual(len(keyring.ensure_keys(self.key_file)), 1)
+        self.assertEqual(archive.load_month(store, self.ring(), "2024-01")[0]["item"], "Rent")
+
+    def test_rotation_covers_backups_and_undo_journal(self):
+        store = "data/test_rotation/tasks.json.enc"
+        task = {"id": 1, "description": "Draft", "completed": False, "created_at": "2025-06-01T00:00:00"}
+        storage.write_records(store, [], self.ring(), "tasks")
+        storage.write_records(store, [task], self.ring(), "tasks")  # the first version becomes a backup
+        history = undo.UndoLog(undo.journal_path(store), self.ring())
+        history.inserted(task)
+        history.undo([task])
+        keyring.add_key(self.key_file)
+        self.assertTrue(keyring.rotate_store(self.key_file, keyring.store_files([store])))
+        keyring.retire_old_keys(self.key_file, keyring.store_files([store]))
+        self.assertEqual(storage.read_records(storage.backup_paths(store)[0], self.ring()), [])
+        history = undo.UndoLog(undo.journal_path(store), self.ring())
+        self.assertTrue(history.can_redo())
+
+    def test_save_during_rotation_is_kept(self):
+        store = "data/test_rotation/tasks.json.enc"
+        task = {"id": 1, "description": "Draft", "completed": False, "created_at": "2025-06-01T00:00:00"}
+        storage.write_records(store, [], self.ring(), "tasks")
+        keyring.add_key(self.key_file)
+        old_ring = keyring.multifernet(keyring.ensure_keys(self.key_file)[:1])
+        rewrite = storage.rewrite_tokens
+        rewrite_calls = []
+
+        def save_meanwhile(data, fn):
+            # An app that still has the old ring saves while its file is rotated.
+            rewrite_calls.append(data)
+            if len(rewrite_calls) == 1:
+                storage.write_records(store, [task], old_ring, "tasks")
+            return rewrite(data, fn)
+
+        with mock.patch.object(storage, "rewrite_tokens", save_meanwhile):
+            self.assertTrue(keyring.rotate_store(self.key_file, [store]))
+        self.assertEqual(len(rewrite_calls), 2)
+        keyring.retire_old_keys(self.key_file, [store])
+        self.assertEqual(storage.read_records(store, self.ring()), [task])
+
+    def test_busy_file_stays_pending(self):
+        for path in self.paths:
+            with open(path, "wb") as f:
+                f.write(encrypt_data([], self.ring()))
+        keyring.add_key(self.key_file)
+        rotate = keyring._rotate_file
+        with mock.patch.object(keyring, "RETRY_DELAY", 0), \
+                mock.patch.object(keyring, "_rotate_file",
+                                  side_effect=lambda path, fernet: path != self.paths[0] and rotate(path, fernet)):
+            self.assertFalse(keyring.rotate_store(self.key_file, self.paths))
+        self.assertEqual(keyring._load_state(self.key_file)["pending"], self.paths[:1])
+        self.assertTrue(keyring.rotate_store(self.key_file, self.paths))
+        keyring.retire_old_keys(self.key_file, self.paths)
+
+if __name__ == "__main__":
+    unittest.main()
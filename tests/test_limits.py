@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+from core import config, limits, storage
+from core.utils import load_key
+
+TODAY = date(2025, 6, 18)  # a Wednesday
+
+class TestLimits(unittest.TestCase):
+    def setUp(self):
+        self.limits, self.warn = limits.parse_limits(
+            [("warn_percent", "80"), ("daily", "50"), ("weekly", "100"), ("monthly.food", "200")])
+        self.budgets = [
+            {"id": 1, "item": "Rent", "amount": 800.0, "date": "2025-05-31"},
+            {"id": 2, "item": "Lunch", "amount": 30.0, "date": "2025-06-02", "tags": ["food"]},
+            {"id": 3, "item": "Train", "amount": 40.0, "date": "2025-06-16"},
+            {"id": 4, "item": "Dinner", "amount": 45.0, "date": "2025-06-18", "tags": ["food"]},
+        ]
+
+    def spent(self, tracker, today=TODAY):
+        return [e["spent"] for e in tracker.status(today)]
+
+    def test_current_period_totals(self):
+        tracker = limits.LimitTracker.from_records(self.limits, self.budgets, self.warn, TODAY)
+        self.assertEqual(self.spent(tracker), [45.0, 85.0, 75.0])
+        self.assertEqual([e["level"] for e in tracker.status(TODAY)], ["warning", "warning", "ok"])
+        self.assertEqual(tracker.status(TODAY)[1]["start"], "2025-06-16")
+        for bad in [("yearly", "1")], [("daily", "lots")], [("monthly.food", "nan")], [("warn_percent", "")]:
+            with self.assertRaises(ValueError):
+                limits.parse_limits(bad)
+
+    def test_default_section_is_not_a_limit(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "config.ini")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("[DEFAULT]\ntheme = dark\n\n[limits]\ndaily = 50\n")
+            with mock.patch.object(config, "CONFIG_FILE", path):
+                self.assertEqual(limits.load_limits()[0], [limits.Limit("daily", None, 50.0)])
+
+    def test_add_remove_and_alerts(self):
+        tracker = limits.LimitTracker.from_records(self.limits, self.budgets, self.warn, TODAY)
+        snack = {"id": 5, "item": "Snack", "amount": 10.0, "date": "2025-06-18", "tags": ["food"]}
+        alerts = tracker.add(snack, TODAY)
+        self.assertEqual([(a["period"], a["level"]) for a in alerts], [("daily", "exceeded")])
+        self.assertEqual(self.spent(tracker), [55.0, 95.0, 85.0])
+        tracker.remove(snack, TODAY)
+        self.assertEqual(self.spent(tracker), [45.0, 85.0, 75.0])
+        # Re-tagging counts the expense under its new category only.
+        retagged = dict(self.budgets[3], tags=["treat"])
+        self.assertEqual(tracker.replace(self.budgets[3], retagged, TODAY), [])
+        self.assertEqual(self.spent(tracker), [45.0, 85.0, 30.0])
+
+    def test_rollover_resums_from_day_totals(self):
+        tracker = limits.LimitTracker.from_records(self.limits, self.budgets, self.warn, TODAY)
+        tracker.add({"id": 5, "item": "Book", "amount": 12.0, "date": "2025-06-19"}, TODAY)
+        self.assertEqual(self.spent(tracker, date(2025, 6, 19)), [12.0, 97.0, 75.0])
+        self.assertEqual(self.spent(tracker, date(2025, 6, 23)), [0.0, 0.0, 75.0])
+        self.assertEqual(self.spent(tracker, date(2025, 7, 1)), [0.0, 0.0, 0.0])
+
+    def test_tracker_from_summary_block(self):
+        path = "data/test_limits.json.enc"
+        self.addCleanup(lambda: os.path.exists(path) and os.remove(path))
+        today = date.today()
+        records = [{"id": 1, "item": "Lunch", "amount": 12.5, "date": today.isoformat(), "tags": ["food"]}]
+        storage.write_records(path, records, load_key(), "budgets")
+        tracker = limits.load_tracker(path, load_key(), today)
+        direct = limits.LimitTracker.from_records(tracker.limits, records, tracker.warn, today)
+        self.assertEqual(tracker.status(today), direct.status(today))
+
+if __name__ == "__main__":
+    unittest.main()
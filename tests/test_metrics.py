@@ -0,0 +1,36 @@
+import unittest
+from core import metrics
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = metrics.enabled()
+        metrics.reset()
+
+    def tearDown(self):
+        if not self.was_enabled:
+            metrics.disable()
+        metrics.reset()
+
+    def test_disabled_hooks_record_nothing(self):
+        metrics.disable()
+        work = metrics.timed("work")(lambda x: x * 2)
+        self.assertEqual(work(2), 4)
+        with metrics.timer("block"):
+            metrics.count("bytes_read", 10)
+        self.assertEqual(metrics.snapshot(), {"timers": {}, "counters": {}})
+
+    def test_enabled_hooks_record_timings_and_counters(self):
+        metrics.enable()
+        work = metrics.timed("work")(lambda: None)
+        work()
+        work()
+        with metrics.timer("block"):
+            metrics.count("bytes_read", 10)
+        data = metrics.snapshot()
+        self.assertEqual(data["timers"]["work"]["calls"], 2)
+        self.assertEqual(data["timers"]["block"]["calls"], 1)
+        self.assertEqual(data["counters"], {"bytes_read": 10})
+        self.assertIn("work", metrics.format_summary(data))
+
+if __name__ == "__main__":
+    unittest.main()
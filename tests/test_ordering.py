@@ -0,0 +1,26 @@
+import unittest
+from core import ordering
+
+class TestOrdering(unittest.TestCase):
+    def test_chunked_sort_matches_stable_sort(self):
+        keys = [(i * 7919) % 13 for i in range(1000)]
+        for reverse in (False, True):
+            expected = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+            self.assertEqual(ordering.compute_order(keys, reverse=reverse, chunk=64), expected)
+
+    def test_filter_then_sort_returns_positions(self):
+        records = [{"item": "Rent", "amount": 800.0}, {"item": "Coffee", "amount": 2.5},
+                   {"item": "coffee beans", "amount": 12.0}]
+        haystacks = [ordering.search_text((r["item"], r["amount"])) for r in records]
+        rows = ordering.filter_rows(haystacks, " COFFEE ")
+        self.assertEqual(rows, [1, 2])
+        keys = ordering.sort_keys(records, lambda r: r["amount"])
+        self.assertEqual(ordering.compute_order(keys, rows, reverse=True), [2, 1])
+        self.assertIsNone(ordering.filter_rows(haystacks, ""))
+        self.assertEqual(ordering.filter_rows(haystacks, "coffee", rows=[0, 2]), [2])
+        self.assertEqual(ordering.compute_order(None, [2, 0]), [2, 0])
+        with self.assertRaises(ValueError):
+            ordering.compute_order(None)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from core import profiles, task_tracker, utils
+
+# Cheap scrypt parameters so the tests stay fast.
+FAST = {"kdf": "scrypt", "n": 1024, "r": 8, "p": 1}
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        profiles.lock_all()
+        shutil.rmtree(self.root)
+
+    def test_create_unlock_and_wrong_password(self):
+        created = profiles.create_profile("alice", "secret", self.root, FAST)
+        self.assertEqual(profiles.list_profiles(self.root), ["alice"])
+        unlocked = profiles.unlock("alice", "secret", self.root)
+        self.assertEqual(unlocked.key, created.key)
+        with self.assertRaises(ValueError):
+            profiles.unlock("alice", "wrong", self.root)
+        with self.assertRaises(ValueError):
+            profiles.unlock("bob", "secret", self.root)
+        with self.assertRaises(ValueError):
+            profiles.create_profile("alice", "again", self.root, FAST)
+        for bad in ("../x", "", ".."):
+            with self.assertRaises(ValueError):
+                profiles.profile_dir(bad, self.root)
+
+    def test_derived_keys_are_cached_for_the_session(self):
+        profiles.create_profile("alice", "secret", self.root, FAST)
+        with mock.patch.object(profiles, "_derive", wraps=profiles._derive) as derive:
+            profiles.unlock("alice", "secret", self.root)
+            profiles.unlock("alice", "secret", self.root)
+            self.assertEqual(derive.call_count, 0)
+            profiles.lock_all()
+            profiles.unlock("alice", "secret", self.root)
+            self.assertEqual(derive.call_count, 1)
+
+    def test_active_profile_redirects_files_and_key(self):
+        profile = profiles.create_profile("alice", "secret", self.root, FAST)
+        profiles.activate(profile)
+        try:
+            self.assertEqual(task_tracker.data_file(), os.path.join(self.root, "alice", task_tracker.DATA_FILE))
+            self.assertIs(utils.load_keyring(), profile.keyring)
+            task_tracker.save_tasks([{"id": 1, "description": "mine", "completed": False,
+                                      "created_at": "2025-01-01T00:00:00"}], utils.load_keyring())
+            self.assertEqual(task_tracker.load_tasks(utils.load_keyring())[0]["description"], "mine")
+        finally:
+            profiles.lock(profile)
+        self.assertIsNone(profiles.active())
+        self.assertEqual(task_tracker.data_file(), task_tracker.DATA_FILE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from datetime import datetime
+from core import reminders
+
+def task(tid, due=None, completed=False, recurrence=None):
+    t = {"id": tid, "description": f"t{tid}", "completed": completed, "created_at": "2025-01-01T00:00:00"}
+    if due:
+        t["due_at"] = due
+    if recurrence:
+        t["recurrence"] = recurrence
+    return t
+
+class TestReminders(unittest.TestCase):
+    def test_scheduler_pops_in_due_order_and_tracks_edits(self):
+        tasks = [task(1, "2025-03-01T09:00:00"), task(2, "2025-01-01T09:00:00"),
+                 task(3, "2025-02-01T09:00:00", completed=True), task(4)]
+        sched = reminders.ReminderScheduler(tasks)
+        self.assertEqual(len(sched), 2)
+        self.assertEqual(sched.next_due(), datetime(2025, 1, 1, 9))
+        tasks[0]["due_at"] = "2024-12-31T09:00:00"
+        sched.update(tasks[0])
+        sched.update(task(5, "2025-01-15T09:00:00"))
+        sched.cancel(2)
+        self.assertEqual(sched.pop_due(datetime(2025, 1, 20)), [1, 5])
+        self.assertIsNone(sched.next_due())
+        self.assertEqual(sched.delay_seconds(datetime(2025, 1, 20)), None)
+        sched.update(task(6, "2025-01-20T00:00:10"))
+        self.assertEqual(sched.delay_seconds(datetime(2025, 1, 20)), 10.0)
+
+    def test_recurring_tasks_advance_past_now(self):
+        self.assertEqual(reminders.next_occurrence("2025-01-31T09:00:00", "monthly", datetime(2025, 2, 1)),
+                         "2025-02-28T09:00:00")
+        self.assertEqual(reminders.next_occurrence("2025-01-01T09:00:00", "weekly", datetime(2025, 1, 20)),
+                         "2025-01-22T09:00:00")
+        tasks = [task(1, "2025-01-01T09:00:00", recurrence="daily"), task(2, "2025-01-01T08:00:00")]
+        sched = reminders.ReminderScheduler(tasks)
+        due, changed = reminders.fire_due(sched, tasks, datetime(2025, 1, 3, 10))
+        self.assertEqual([t["id"] for t in due], [1, 2])
+        self.assertTrue(changed)
+        self.assertEqual(tasks[0]["due_at"], "2025-01-04T09:00:00")
+        self.assertEqual(sched.next_due(), datetime(2025, 1, 4, 9))
+
+    def test_parse_due(self):
+        self.assertEqual(reminders.parse_due("2025-06-01"), "2025-06-01T09:00:00")
+        self.assertEqual(reminders.parse_due("2025-06-01 17:30"), "2025-06-01T17:30:00")
+        self.assertIsNone(reminders.parse_due("  "))
+        with self.assertRaises(ValueError):
+            reminders.parse_due("tomorrow")
+        with self.assertRaises(ValueError):
+            reminders.parse_recurrence("hourly")
+
+if __name__ == "__main__":
+    unittest.main()
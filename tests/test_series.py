@@ -0,0 +1,36 @@
+import unittest
+from core import series
+
+class TestSeries(unittest.TestCase):
+    def test_incremental_updates_match_rebuild(self):
+        records = [{"amount": 5.0, "date": "2025-01-01"}, {"amount": 3.0, "date": "2025-01-03"},
+                   {"amount": 2.0, "date": "2025-01-03"}]
+        spend = series.SpendSeries(records)
+        days, cum = spend.cumulative()
+        self.assertEqual(cum, [5.0, 10.0])
+        spend.add({"amount": 1.0, "date": "2025-01-02"})
+        spend.add({"amount": 4.0, "date": "2025-01-10"})
+        spend.remove({"amount": 5.0, "date": "2025-01-01"})
+        rebuilt = series.SpendSeries(records[1:] + [{"amount": 1.0, "date": "2025-01-02"},
+                                                    {"amount": 4.0, "date": "2025-01-10"}])
+        self.assertEqual(spend.cumulative(), rebuilt.cumulative())
+        self.assertEqual(spend.cumulative()[1], [1.0, 6.0, 10.0])
+        # 2025-01-02 is a Thursday; the 10th falls in the following week.
+        self.assertEqual(spend.per_period("week")[1], [6.0, 4.0])
+        self.assertEqual(spend.per_period("month")[1], [10.0])
+
+    def test_downsampling_keeps_endpoints_and_spikes(self):
+        xs = list(range(1000))
+        ys = [1.0] * 1000
+        ys[537] = 100.0
+        mx, my = series.min_max(xs, ys, 50)
+        self.assertLessEqual(len(mx), 100)
+        self.assertIn(100.0, my)
+        lx, ly = series.lttb(xs, ys, 40)
+        self.assertEqual(len(lx), 40)
+        self.assertEqual((lx[0], lx[-1]), (0, 999))
+        self.assertIn(537, lx)
+        self.assertEqual(series.lttb(xs[:10], ys[:10], 40), (xs[:10], ys[:10]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import unittest
+from core import keyring, storage
+from core.utils import load_key, encrypt_data
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.key = load_key()
+        self.test_file = "data/test_storage/budgets.json.enc"
+        shutil.rmtree("data/test_storage", ignore_errors=True)
+        os.makedirs("data/test_storage")
+
+    def tearDown(self):
+        shutil.rmtree("data/test_storage", ignore_errors=True)
+
+    def _write_segmented(self, budgets):
+        original = storage.SEGMENT_RECORDS
+        storage.SEGMENT_RECORDS = 10
+        try:
+            storage.write_records(self.test_file, budgets, self.key, "budgets")
+        finally:
+            storage.SEGMENT_RECORDS = original
+
+    def _damage_line(self, index):
+        with open(self.test_file, "rb") as f:
+            lines = f.read().split(b"\n")
+        lines[index] = lines[index][:40] + (b"A" if lines[index][40:41] != b"A" else b"B") + lines[index][41:]
+        with open(self.test_file, "wb") as f:
+            f.write(b"\n".join(lines))
+
+    def test_summary_is_maintained_on_write(self):
+        budgets = [
+            {"id": 1, "item": "Coffee", "amount": 2.5, "date": "2025-01-03"},
+            {"id": 4, "item": "Rent", "amount": 800.0, "date": "2025-01-01"},
+        ]
+        storage.write_records(self.test_file, budgets, self.key, "budgets")
+        storage.write_records(self.test_file, budgets, self.key, "budgets")
+        summary = storage.read_summary(self.test_file, self.key, "budgets")
+        self.assertEqual(summary["count"], 2)
+        self.assertEqual(summary["total_spent"], 802.5)
+        self.assertEqual(summary["max_id"], 4)
+        self.assertEqual((summary["min_date"], summary["max_date"]), ("2025-01-01", "2025-01-03"))
+        self.assertEqual(summary["data_version"], 2)
+        self.assertEqual(storage.read_records(self.test_file, self.key), budgets)
+
+    def test_segments_round_trip_in_process_pool(self):
+        budgets = [{"id": i, "item": "Tea", "amount": 1.0, "date": "2025-01-01"} for i in range(1, 26)]
+        original = storage.SEGMENT_RECORDS
+        storage.SEGMENT_RECORDS = 10
+        try:
+            storage.write_records(self.test_file, budgets, self.key, "budgets", parallel=True)
+        finally:
+            storage.SEGMENT_RECORDS = original
+        with open(self.test_file, "rb") as f:
+            self.assertEqual(len(f.read().splitlines()), 3 + 3)
+        self.assertEqual(storage.read_records(self.test_file, self.key, parallel=True), budgets)
+        self.assertEqual(storage.read_records(self.test_file, self.key, parallel=False), budgets)
+
+    def test_damaged_segment_is_refilled_from_backup(self):
+        budgets = [{"id": i, "item": "Tea", "amount": 1.0, "date": "2025-01-01"} for i in range(1, 26)]
+        self._write_segmented(budgets)
+        self._write_segmented(budgets)  # the first version becomes a backup
+        self._damage_line(4)  # second records segment
+        report = storage.verify(self.test_file)
+        self.assertEqual((report["ok"], report["bad"]), (False, [1]))
+        self.assertEqual(storage.read_records(self.test_file, self.key), budgets)
+        self.assertEqual(len(os.listdir("data/test_storage/quarantine")), 1)
+
+    def test_damaged_segment_without_backup_loses_only_that_segment(self):
+        budgets = [{"id": i, "item": "Tea", "amount": 1.0, "date": "2025-01-01"} for i in range(1, 26)]
+        self._write_segmented(budgets)
+        self._damage_line(3)  # first records segment
+        records, report = storage.recover(self.test_file, self.key)
+        self.assertEqual([r["id"] for r in records], list(range(11, 26)))
+        self.assertEqual((report["bad"], report["lost_records"]), ([0], 10))
+
+    def test_rewrite_keeps_damaged_segments_byte_for_byte(self):
+        budgets = [{"id": i, "item": "Tea", "amount": 1.0, "date": "2025-01-01"} for i in range(1, 26)]
+        self._write_segmented(budgets)
+        self._damage_line(3)
+        with open(self.test_file, "rb") as f:
+            damaged = f.read().split(b"\n")[3]
+        with open(self.test_file, "rb") as f:
+            rotated = storage.rewrite_tokens(f.read(), keyring.multifernet([(1, self.key)]).rotate)
+        self.assertIn(damaged, rotated.split(b"\n"))
+        with open(self.test_file, "wb") as f:
+            f.write(rotated)
+        records, report = storage.recover(self.test_file, self.key)
+        self.assertEqual([r["id"] for r in records], list(range(11, 26)))
+        self.assertEqual(report["bad"], [0])
+
+    def test_verify_cache_skips_unchanged_files(self):
+        storage.write_records(self.test_file, [], self.key, "budgets")
+        cache = "data/test_storage/verify.json"
+        self.assertEqual(len(storage.verify_stores([self.test_file], cache)), 1)
+        self.assertEqual(storage.verify_stores([self.test_file], cache), [])
+
+    def test_legacy_single_token_file(self):
+        tasks = [{"id": 1, "description": "Old", "completed": True, "created_at": "2024-05-01T10:00:00"}]
+        with open(self.test_file, "wb") as f:
+            f.write(encrypt_data(tasks, self.key))
+        self.assertEqual(storage.read_records(self.test_file, self.key), tasks)
+        summary = storage.read_summary(self.test_file, self.key, "tasks")
+        self.assertEqual((summary["completed"], summary["count"]), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from core import tags
+
+class TestTags(unittest.TestCase):
+    def setUp(self):
+        self.budgets = [
+            {"id": 1, "item": "Lunch", "amount": 9.0, "tags": ["food", "weekday"]},
+            {"id": 2, "item": "Client dinner", "amount": 60.0, "tags": ["food", "weekday", "reimbursed"]},
+            {"id": 3, "item": "Brunch", "amount": 20.0, "tags": ["food"]},
+            {"id": 4, "item": "Train", "amount": 4.5, "tags": ["travel", "weekday"]},
+            {"id": 5, "item": "Rent", "amount": 800.0},
+        ]
+        self.index = tags.TagIndex(self.budgets)
+
+    def ids(self, query):
+        return [b["id"] for b in self.index.select(self.budgets, query)]
+
+    def test_queries_are_set_operations(self):
+        self.assertEqual(self.ids("food AND weekday NOT reimbursed"), [1])
+        self.assertEqual(self.ids("food weekday"), [1, 2])
+        self.assertEqual(self.ids("travel OR reimbursed"), [2, 4])
+        self.assertEqual(self.ids("NOT (food OR travel)"), [5])
+        self.assertEqual(self.ids("Food"), [1, 2, 3])
+        self.assertEqual(self.ids(""), [1, 2, 3, 4, 5])
+        self.assertEqual(self.ids("unknown"), [])
+        for bad in ("food AND", "(food", "OR food"):
+            with self.assertRaises(ValueError):
+                self.index.query(bad)
+
+    def test_category_totals_and_incremental_add(self):
+        amounts = [b["amount"] for b in self.budgets]
+        self.assertEqual(self.index.totals(amounts), {"food": 89.0, "weekday": 73.5, "reimbursed": 60.0,
+                                                      "travel": 4.5})
+        self.assertEqual(self.index.totals(amounts, self.index.query("NOT reimbursed")),
+                         {"food": 29.0, "weekday": 13.5, "travel": 4.5})
+        extra = {"id": 6, "item": "Taxi", "amount": 15.0, "tags": tags.parse_tags("Travel, late night,travel")}
+        self.assertEqual(extra["tags"], ["travel", "late-night"])
+        self.budgets.append(extra)
+        self.index.add(extra)
+        self.assertEqual(self.index.bitmaps, tags.TagIndex(self.budgets).bitmaps)
+        self.assertEqual(self.ids("travel"), [4, 6])
+
+if __name__ == "__main__":
+    unittest.main()
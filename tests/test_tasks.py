@@ -1,6 +1,7 @@
 import unittest
 import os
-from core import task_tracker
+import shutil
+from core import task_tracker, timeline
 from core.utils import load_key, encrypt_data, decrypt_data
 
 class TestTaskTracker(unittest.TestCase):
@@ -15,6 +16,7 @@ class TestTaskTracker(unittest.TestCase):
     def tearDown(self):
         if os.path.exists(self.test_file):
             os.remove(self.test_file)
+        shutil.rmtree(timeline.timeline_dir(self.test_file), ignore_errors=True)
         task_tracker.DATA_FILE = self.original_data_file
 
     def test_add_and_load_task(self):
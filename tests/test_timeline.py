@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime
+from unittest import mock
+from core import keyring, storage, timeline
+from core.utils import load_key
+
+def at(day, hour=12):
+    return datetime(2025, 6, day, hour)
+
+class TestTimeline(unittest.TestCase):
+    def setUp(self):
+        self.key = load_key()
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "tasks.json.enc")
+        self.tasks = [{"id": 1, "description": "Pay rent", "completed": False},
+                      {"id": 2, "description": "Draft", "completed": False}]
+        timeline.record(self.path, self.tasks, self.key, now=at(1))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def save(self, records, when, reason="save"):
+        timeline.record(self.path, [dict(r) for r in records], self.key, reason, now=when)
+
+    def test_as_of(self):
+        self.save(self.tasks + [{"id": 3, "description": "Call mum", "completed": False}], at(2))
+        self.save([dict(self.tasks[0], completed=True), self.tasks[1]], at(3))
+        self.assertEqual([t["id"] for t in timeline.as_of(self.path, self.key, date(2025, 6, 1))], [1, 2])
+        self.assertEqual([t["id"] for t in timeline.as_of(self.path, self.key, "2025-06-02")], [1, 2, 3])
+        # A time before the day's save still sees the previous state
+        self.assertEqual(len(timeline.as_of(self.path, self.key, "2025-06-02 09:00")), 2)
+        self.assertTrue(timeline.as_of(self.path, self.key, at(4))[0]["completed"])
+        with self.assertRaises(ValueError):
+            timeline.as_of(self.path, self.key, "2025-05-31")
+
+    def test_diff_tells_archived_from_removed(self):
+        self.save([self.tasks[1]], at(2), timeline.ARCHIVE)
+        self.save([dict(self.tasks[1], description="Final draft")], at(3))
+        self.save([], at(4))
+        result = timeline.diff(self.path, self.key, "2025-06-01", "2025-06-03")
+        self.assertEqual([r["id"] for r in result["archived"]], [1])
+        self.assertEqual(result["removed"], [])
+        self.assertEqual(timeline.format_changes(*result["changed"][0]), "description: Draft → Final draft")
+        result = timeline.diff(self.path, self.key, "2025-06-03", "2025-06-04")
+        self.assertEqual([r["id"] for r in result["removed"]], [2])
+
+    def test_checkpoints_bound_replay(self):
+        with mock.patch.object(timeline, "get_int", lambda section, option, default: 3 if option == "checkpoint_every" else 0):
+            for day in range(2, 9):
+                self.save([dict(self.tasks[0], description=f"Rent {day}")], at(day))
+        self.assertEqual([seq for seq, _ in timeline.checkpoints(self.path)], [1, 2, 3])
+        with open(os.path.join(timeline.timeline_dir(self.path), "000003.log"), "rb") as f:
+            self.assertEqual(len(f.read().splitlines()), 1)
+        self.assertEqual(timeline.as_of(self.path, self.key, at(6))[0]["description"], "Rent 6")
+        self.assertEqual(timeline.as_of(self.path, self.key, at(8))[0]["description"], "Rent 8")
+
+    def test_unchanged_save_is_not_logged(self):
+        self.save(self.tasks, at(2))
+        self.assertFalse(os.path.exists(os.path.join(timeline.timeline_dir(self.path), "000001.log")))
+
+    def test_parse_moment(self):
+        self.assertEqual(timeline.parse_moment("2025-06-01"), "2025-06-01T23:59:59")
+        self.assertEqual(timeline.parse_moment("2025-06-01 09:30"), "2025-06-01T09:30:00")
+        with self.assertRaises(ValueError):
+            timeline.parse_moment("June 1st")
+
+    def test_history_survives_key_rotation(self):
+        key_file = os.path.join(self.dir, "key.key")
+        self.key = keyring.multifernet(keyring.ensure_keys(key_file))
+        shutil.rmtree(timeline.timeline_dir(self.path))
+        self.save(self.tasks, at(1))
+        self.save(self.tasks[:1], at(2))
+        keyring.add_key(key_file)
+        self.assertTrue(keyring.rotate_store(key_file, keyring.store_files([self.path])))
+        keyring.retire_old_keys(key_file, keyring.store_files([self.path]))
+        self.key = keyring.multifernet(keyring.ensure_keys(key_file))
+        self.assertEqual(len(timeline.as_of(self.path, self.key, "2025-06-01")), 2)
+        self.assertEqual([r["id"] for r in timeline.diff(self.path, self.key, at(1), at(2))["removed"]], [2])
+
+    def test_unchanged_segments_are_not_rehashed(self):
+        path = os.path.join(self.dir, "budgets.json.enc")
+        budgets = [{"id": i, "item": f"Item {i}", "amount": 1.0, "date": "2025-06-01"} for i in range(1, 7)]
+        digest = mock.Mock(side_effect=timeline._digest)
+        with mock.patch.object(storage, "SEGMENT_RECORDS", 2), mock.patch.object(timeline, "_digest", digest):
+            storage.write_records(path, budgets, self.key, "budgets", timeline="save")
+            self.assertEqual(digest.call_count, 6)
+            digest.reset_mock()
+            budgets[3] = dict(budgets[3], amount=2.0)
+            storage.write_records(path, budgets, self.key, "budgets", timeline="save")
+            self.assertEqual(digest.call_count, 2)
+            digest.reset_mock()
+            timeline._tips.clear()  # as in a fresh process
+            storage.write_records(path, budgets[:5], self.key, "budgets", timeline="save")
+            self.assertEqual(digest.call_count, 1)
+        self.assertEqual(timeline.as_of(path, self.key, datetime.now()), budgets[:5])
+
+    def test_reads_tips_without_segments(self):
+        directory = timeline.timeline_dir(self.path)
+        tip = {"seq": 1, "entries": 0, "archived": [],
+               "digests": [[t["id"], timeline._digest(t)] for t in self.tasks]}
+        with open(os.path.join(directory, timeline.TIP_FILE), "wb") as f:
+            f.write(timeline.encrypt_data(tip, self.key))
+        timeline._tips.clear()
+        self.save(self.tasks[:1], at(2))
+        self.assertEqual([r["id"] for r in timeline.diff(self.path, self.key, at(1), at(2))["removed"]], [2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+from core import undo
+from core.utils import load_key
+
+class TestUndo(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "tasks.enc.undo")
+        self.key = load_key()
+        self.tasks = [{"id": i, "description": f"task {i}", "completed": False} for i in (1, 2, 3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_steps_store_only_changed_fields(self):
+        log = undo.UndoLog()
+        before = dict(self.tasks[0])
+        self.tasks[0]["completed"] = True
+        self.tasks[0]["due_at"] = "2025-06-01T09:00:00"
+        log.updated(before, self.tasks[0])
+        self.assertEqual(log._undo[-1][0], {"op": "update", "id": 1, "set": {"completed": False},
+                                            "unset": ["due_at"]})
+        self.assertTrue(log.undo(self.tasks))
+        self.assertEqual(self.tasks[0], before)
+        self.assertTrue(log.redo(self.tasks))
+        self.assertTrue(self.tasks[0]["completed"])
+        self.assertEqual(self.tasks[0]["due_at"], "2025-06-01T09:00:00")
+
+    def test_delete_and_add_round_trip_through_the_journal(self):
+        log = undo.UndoLog(self.path, self.key)
+        log.deleted(self.tasks, 1)
+        del self.tasks[1]
+        new = {"id": 4, "description": "task 4", "completed": False}
+        self.tasks.append(new)
+        log.inserted(new)
+        self.assertTrue(log.undo(self.tasks))
+        # A restart restores both stacks from the journal.
+        log = undo.UndoLog(self.path, self.key)
+        self.assertTrue(log.undo(self.tasks))
+        self.assertEqual([t["id"] for t in self.tasks], [1, 2, 3])
+        self.assertFalse(log.undo(self.tasks))
+        log = undo.UndoLog(self.path, self.key)
+        self.assertTrue(log.redo(self.tasks))
+        self.assertTrue(log.redo(self.tasks))
+        self.assertEqual([t["id"] for t in self.tasks], [1, 3, 4])
+        self.assertFalse(log.redo(self.tasks))
+        # A new change clears what could still be redone.
+        log.undo(self.tasks)
+        log.inserted({"id": 5})
+        self.assertFalse(log.can_redo())
+
+    def test_history_is_capped_by_bytes(self):
+        log = undo.UndoLog(self.path, self.key, max_bytes=200)
+        for i in range(50):
+            record = {"id": 10 + i, "description": "x" * 20}
+            self.tasks.append(record)
+            log.inserted(record)
+        self.assertLessEqual(log.bytes, 200)
+        kept = len(log._undo)
+        self.assertLess(kept, 50)
+        # Only the newest steps can be undone; the oldest adds stay.
+        while log.undo(self.tasks):
+            pass
+        self.assertEqual(len(self.tasks), 3 + 50 - kept)
+        self.assertEqual(self.tasks[-1]["id"], 10 + 50 - kept - 1)
+
+    def test_redo_steps_count_towards_the_cap(self):
+        log = undo.UndoLog(self.path, self.key, max_bytes=300)
+        for i in range(10):
+            record = {"id": 10 + i, "description": "x" * 20}
+            self.tasks.append(record)
+            log.inserted(record)
+        undone = 0
+        while log.undo(self.tasks):
+            undone += 1
+        # Redoing an add needs the whole record; the steps furthest back went.
+        self.assertLessEqual(log.bytes, 300)
+        self.assertLess(len(log._redo), undone)
+        self.assertEqual(log.bytes, sum(size for _, size in log._redo))
+        redoable = len(log._redo)
+        log = undo.UndoLog(self.path, self.key, max_bytes=300)
+        self.assertEqual(len(log._redo), redoable)
+        while log.redo(self.tasks):
+            pass
+        self.assertEqual(self.tasks[-1]["id"], 10 + 10 - undone + redoable - 1)
+
+    def test_stale_steps_are_skipped(self):
+        log = undo.UndoLog()
+        log.inserted(self.tasks[2])
+        log.updated({"id": 9, "description": "gone"}, {"id": 9, "description": "edited"})
+        # Task 9 no longer exists (archived elsewhere): skip to the next step.
+        self.assertTrue(log.undo(self.tasks))
+        self.assertEqual([t["id"] for t in self.tasks], [1, 2])
+
+    def test_unreadable_journal_starts_empty(self):
+        with open(self.path, "wb") as f:
+            f.write(b"R not-a-token\n")
+        self.assertFalse(undo.UndoLog(self.path, self.key).can_undo())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import shutil
+import unittest
+from unittest import mock
+from core import whatsbot, task_tracker, budget_tracker, storage, timeline
+from core.utils import load_key
+
+class TestWhatsbot(unittest.TestCase):
+    def setUp(self):
+        self.key = load_key()
+        self.originals = (task_tracker.DATA_FILE, budget_tracker.DATA_FILE)
+        task_tracker.DATA_FILE = "data/test_bot_tasks.json.enc"
+        budget_tracker.DATA_FILE = "data/test_bot_budgets.json.enc"
+        self._cleanup()
+
+    def tearDown(self):
+        self._cleanup()
+        task_tracker.DATA_FILE, budget_tracker.DATA_FILE = self.originals
+
+    def _cleanup(self):
+        for path in (task_tracker.DATA_FILE, budget_tracker.DATA_FILE):
+            for leftover in [path] + storage.backup_paths(path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            shutil.rmtree(timeline.timeline_dir(path), ignore_errors=True)
+
+    def test_parse_message(self):
+        self.assertEqual(whatsbot.parse_message("spent 4.50 coffee"), ("expense", {"item": "coffee", "amount": 4.5}))
+        self.assertEqual(whatsbot.parse_message("TODO call bank"), ("task", {"description": "call bank"}))
+        self.assertEqual(whatsbot.parse_message("done 3"), ("done", {"id": 3}))
+        self.assertIsNone(whatsbot.parse_message("hello"))
+
+    def test_burst_is_committed_in_one_batch(self):
+        async def run():
+            queue = whatsbot.WriteQueue(self.key, flush_interval=0.2)
+            queue.start()
+            commands = [whatsbot.parse_message(f"spent {i}.00 item{i}") for i in range(200)]
+            commands.append(whatsbot.parse_message("todo call bank"))
+            replies = await asyncio.gather(*(queue.submit(c) for c in commands))
+            await queue.stop()
+            return queue, replies
+
+        queue, replies = asyncio.run(run())
+        self.assertEqual(queue.commits, 1)
+        self.assertEqual(replies[-1], "Task 1 added.")
+        self.assertEqual(len(budget_tracker.load_budgets(self.key)), 200)
+        self.assertEqual(task_tracker.load_tasks(self.key)[0]["description"], "call bank")
+
+    def test_picks_up_outside_saves_and_drops_failed_batches(self):
+        async def run():
+            queue = whatsbot.WriteQueue(self.key, flush_interval=0)
+            queue.start()
+            # The GUI saves a task while the bot is running.
+            task_tracker.save_tasks([{"id": 1, "description": "from the GUI", "completed": False,
+                                      "created_at": "2025-01-01T00:00:00"}], self.key)
+            self.assertEqual(await queue.submit(whatsbot.parse_message("todo call bank")), "Task 2 added.")
+            with mock.patch.object(storage, "write_records", side_effect=OSError("disk full")):
+                with self.assertRaises(OSError):
+                    await queue.submit(whatsbot.parse_message("todo lost"))
+            await queue.submit(whatsbot.parse_message("done 1"))
+            await queue.stop()
+
+        asyncio.run(run())
+        tasks = task_tracker.load_tasks(self.key)
+        self.assertEqual([t["description"] for t in tasks], ["from the GUI", "call bank"])
+        self.assertTrue(tasks[0]["completed"])
+
+if __name__ == "__main__":
+    unittest.main()
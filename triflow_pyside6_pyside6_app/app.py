@@ -7,12 +7,23 @@ are stored in encrypted JSON files using Fernet encryption, via
 functions in ``data/local_store.py``.
 
 Features:
-  - **Tasks tab** – list tasks in a table, add new tasks, mark them
-    complete, edit descriptions, and delete tasks.  Each task
-    persists to disk.
-  - **Budget tab** – list expenses in a table, add a new expense
-    (item and amount), delete expenses, and export to a JSON file.
+  - **Tasks tab** – list tasks in a sortable, filterable table, add new
+    tasks, mark them complete, edit descriptions and tags, set due dates
+    with reminders, and delete tasks.  Each task persists to disk.
+  - **Budget tab** – list expenses in a sortable, filterable table, add a
+    new expense (item, amount and tags), delete expenses, see totals per
+    category, budget limits (with alerts) and a spending chart, and
+    export to a JSON file.
   - **Weather tab** – placeholder for future weather integration.
+  - **Undo/redo** – Ctrl+Z / Ctrl+Y (Edit menu) revert and re-apply
+    changes on the current tab from a compact log of inverse operations
+    (see ``core/undo.py``).
+  - **Profiles** – a login dialog picks a password-protected profile (or
+    guest) at start-up when profiles exist, and the Profile menu switches
+    profiles without restarting; see ``profile_dialog.py``.
+  - **Timeline** – View > Timeline shows tasks or expenses as of a past
+    date picked from a calendar, or what changed since another date,
+    rebuilt from each file's change log (see ``core/timeline.py``).
 
 The code is deliberately kept simple so you can extend it easily.  For
 example, you might add theme support, i18n, or hook this GUI up to
@@ -23,15 +34,21 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QDate, Qt, QTimer, Signal
+from PySide6.QtGui import QKeySequence
 from PySide6.QtWidgets import (
     QApplication,
+    QCheckBox,
+    QComboBox,
+    QDateEdit,
+    QDialog,
     QMainWindow,
     QWidget,
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
     QLineEdit,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QLabel,
@@ -48,28 +65,132 @@ if str(BASE_DIR / "data") not in sys.path:
     sys.path.insert(0, str(BASE_DIR / "data"))
 if str(BASE_DIR / "core") not in sys.path:
     sys.path.insert(0, str(BASE_DIR / "core"))
-
+# The shared ``core`` package is the repository root's; it has to come
+# before BASE_DIR, whose own ``core`` only mirrors utils.
+REPO_DIR = BASE_DIR.parent
+if str(REPO_DIR) in sys.path:
+    sys.path.remove(str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR))
+
+from core import categorize, limits, metrics, profiles, reminders, tags, timeline
 from data import local_store
+from profile_dialog import ProfileDialog
+from record_model import Column, RecordTableModel
+from spend_chart import SpendChart
+
+TASK_COLUMNS = [
+    Column("Description", lambda t, archived: t["description"], lambda t: t["description"].casefold()),
+    Column("Status",
+           lambda t, archived: "📦 Archived" if archived else ("✅ Done" if t["completed"] else "❌ Pending"),
+           lambda t: t["completed"]),
+    Column("Created", lambda t, archived: t["created_at"][:10], lambda t: t["created_at"]),
+    # Tasks without a due date sort after every dated one.
+    Column("Due", lambda t, archived: "" if archived else reminders.format_due(t),
+           lambda t: t.get("due_at") or "\uffff"),
+    Column("Tags", lambda t, archived: tags.format_tags(t), tags.format_tags),
+]
+
+BUDGET_COLUMNS = [
+    Column("Item", lambda b, archived: b["item"], lambda b: b["item"].casefold()),
+    Column("Amount", lambda b, archived: f"${b['amount']:.2f}", lambda b: b["amount"]),
+    Column("Date", lambda b, archived: b["date"], lambda b: b["date"]),
+    Column("Tags", lambda b, archived: tags.format_tags(b), tags.format_tags),
+]
+
+
+def _record_table(columns: list[Column]) -> tuple[QTableView, RecordTableModel]:
+    """A sortable single-selection table view over a :class:`RecordTableModel`."""
+    view = QTableView()
+    model = RecordTableModel(columns, view)
+    view.setModel(model)
+    view.setSelectionBehavior(QTableView.SelectRows)
+    view.setSelectionMode(QTableView.SingleSelection)
+    view.horizontalHeader().setStretchLastSection(True)
+    view.verticalHeader().hide()
+    # Start unsorted (insertion order) until a header is clicked.
+    view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+    view.setSortingEnabled(True)
+    return view, model
+
+
+def _filter_bar(model: RecordTableModel, placeholder: str) -> QHBoxLayout:
+    """Text filter plus tag query boxes above a record table."""
+    bar = QHBoxLayout()
+    box = QLineEdit()
+    box.setPlaceholderText(placeholder)
+    box.setClearButtonEnabled(True)
+    box.textChanged.connect(model.set_filter)
+    bar.addWidget(box)
+    tag_box = QLineEdit()
+    tag_box.setPlaceholderText("Tags, e.g. food AND NOT reimbursed")
+    tag_box.setClearButtonEnabled(True)
+
+    def apply_tags(text: str) -> None:
+        try:
+            model.set_tag_query(text)
+            tag_box.setStyleSheet("")
+        except ValueError as e:
+            tag_box.setStyleSheet("color: red;")
+            tag_box.setToolTip(str(e))
+
+    tag_box.textChanged.connect(apply_tags)
+    bar.addWidget(tag_box)
+    return bar
+
+
+def _ask_tags(parent: QWidget, title: str, current: list[str] | None = None) -> list[str] | None:
+    """Prompt for comma-separated tags; None if cancelled."""
+    text, ok = QInputDialog.getText(parent, title, "Tags (comma-separated):", text=", ".join(current or ()))
+    return tags.parse_tags(text) if ok else None
+
+
+def _set_tags(record: dict, new_tags: list[str]) -> None:
+    if new_tags:
+        record["tags"] = new_tags
+    else:
+        record.pop("tags", None)
+
+
+def _selected_record(view: QTableView, model: RecordTableModel) -> dict | None:
+    idxs = view.selectionModel().selectedRows()
+    return model.record_at(idxs[0].row()) if idxs else None
+
+
+def _select_id(view: QTableView, model: RecordTableModel, record_id: int | None) -> None:
+    row = model.row_of_id(record_id) if record_id is not None else None
+    if row is not None:
+        view.selectRow(row)
 
 
 class TaskTab(QWidget):
     """Tab for managing tasks."""
 
+    # Emitted after the table is reloaded so summaries can be refreshed.
+    changed = Signal()
+
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
+        local_store.archive_old_tasks()
         self.tasks = local_store.load_tasks()
+        self.history = local_store.load_task_history()
+        # Archived months are decrypted only when the user pages back.
+        self.older_months = local_store.archived_task_months()
+        self.archived: list[dict] = []
+        # A single one-shot timer armed for the next due reminder.
+        self.reminders = reminders.ReminderScheduler(self.tasks)
+        self.reminder_timer = QTimer(self)
+        self.reminder_timer.setSingleShot(True)
+        self.reminder_timer.timeout.connect(self._fire_reminders)
         self._build_ui()
         self.refresh_table()
+        self._arm_reminders()
 
     def _build_ui(self) -> None:
         layout = QVBoxLayout(self)
 
-        # Table to display tasks
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["Description", "Status", "Created"])
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.horizontalHeader().setStretchLastSection(True)
+        # Table to display tasks; click a header to sort
+        self.table, self.model = _record_table(TASK_COLUMNS)
+        layout.addLayout(_filter_bar(self.model, "Filter tasks…"))
         layout.addWidget(self.table)
 
         # Entry and buttons
@@ -80,34 +201,47 @@ class TaskTab(QWidget):
         add_btn = QPushButton("Add Task")
         comp_btn = QPushButton("Mark Complete")
         edit_btn = QPushButton("Edit Task")
+        due_btn = QPushButton("Set Due…")
+        tags_btn = QPushButton("Tags…")
         del_btn = QPushButton("Delete Task")
+        self.older_btn = QPushButton("Load Older")
         form_layout.addWidget(add_btn)
         form_layout.addWidget(comp_btn)
         form_layout.addWidget(edit_btn)
+        form_layout.addWidget(due_btn)
+        form_layout.addWidget(tags_btn)
         form_layout.addWidget(del_btn)
+        form_layout.addWidget(self.older_btn)
         layout.addLayout(form_layout)
 
         # Button handlers
         add_btn.clicked.connect(self.add_task)
         comp_btn.clicked.connect(self.mark_complete)
         edit_btn.clicked.connect(self.edit_task)
+        due_btn.clicked.connect(self.set_due)
+        tags_btn.clicked.connect(self.edit_tags)
         del_btn.clicked.connect(self.delete_task)
+        self.older_btn.clicked.connect(self.load_older)
 
+    @metrics.timed("qt.refresh_tasks")
     def refresh_table(self) -> None:
-        """Reload tasks from storage and update the table."""
+        """Reload tasks from storage and update the table, keeping the selection."""
+        selected = self._selected_task()
         self.tasks = local_store.load_tasks()
-        self.table.setRowCount(len(self.tasks))
-        for row, task in enumerate(self.tasks):
-            desc_item = QTableWidgetItem(task["description"])
-            status_text = "✅ Done" if task["completed"] else "❌ Pending"
-            status_item = QTableWidgetItem(status_text)
-            created_item = QTableWidgetItem(task["created_at"][:10])
-            desc_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            status_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            created_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.table.setItem(row, 0, desc_item)
-            self.table.setItem(row, 1, status_item)
-            self.table.setItem(row, 2, created_item)
+        hot_ids = {t["id"] for t in self.tasks}
+        # Archived rows are shown greyed out and cannot be selected.
+        self.model.set_records(self.tasks, [t for t in self.archived if t["id"] not in hot_ids])
+        _select_id(self.table, self.model, selected["id"] if selected else None)
+        self.older_btn.setEnabled(bool(self.older_months))
+        self.changed.emit()
+
+    def load_older(self) -> None:
+        """Load the next archived month below the current rows."""
+        if not self.older_months:
+            return
+        month = self.older_months.pop(0)
+        self.archived.extend(local_store.load_archived_tasks(month))
+        self.refresh_table()
 
     def add_task(self) -> None:
         desc = self.new_entry.text().strip()
@@ -115,31 +249,52 @@ class TaskTab(QWidget):
             QMessageBox.warning(self, "Input Error", "Task description cannot be empty.")
             return
         new_task = {
-            "id": (self.tasks[-1]["id"] + 1) if self.tasks else 1,
+            "id": local_store.next_task_id(self.tasks),
             "description": desc,
             "completed": False,
             "created_at": datetime.now().isoformat(),
         }
         self.tasks.append(new_task)
+        self.history.inserted(new_task)
         local_store.save_tasks(self.tasks)
         self.new_entry.clear()
         self.refresh_table()
 
-    def _selected_task(self) -> tuple[int, dict] | None:
-        idxs = self.table.selectionModel().selectedRows()
-        if not idxs:
-            return None
-        row = idxs[0].row()
-        return row, self.tasks[row]
+    def _arm_reminders(self) -> None:
+        delay = self.reminders.delay_seconds(datetime.now())
+        if delay is None:
+            self.reminder_timer.stop()
+        else:
+            self.reminder_timer.start(int(delay * 1000) + 1)
+
+    def _reschedule(self, task: dict) -> None:
+        """Update the reminder heap after *task* was completed or its due date changed."""
+        self.reminders.update(task)
+        self._arm_reminders()
+
+    def _fire_reminders(self) -> None:
+        due, changed = reminders.fire_due(self.reminders, self.tasks, datetime.now())
+        if changed:
+            local_store.save_tasks(self.tasks)
+            self.refresh_table()
+        self._arm_reminders()
+        if due:
+            QMessageBox.information(self, "Reminder", "\n".join(f"⏰ {t['description']}" for t in due))
+
+    def _selected_task(self) -> dict | None:
+        """The selected task, looked up by id so sorting/filtering can't misroute it."""
+        return _selected_record(self.table, self.model)
 
     def mark_complete(self) -> None:
         sel = self._selected_task()
         if not sel:
             QMessageBox.warning(self, "Selection Error", "Please select a task to mark complete.")
             return
-        row, task = sel
-        task["completed"] = True
+        before = dict(sel)
+        sel["completed"] = True
+        self.history.updated(before, sel)
         local_store.save_tasks(self.tasks)
+        self._reschedule(sel)
         self.refresh_table()
 
     def edit_task(self) -> None:
@@ -147,72 +302,186 @@ class TaskTab(QWidget):
         if not sel:
             QMessageBox.warning(self, "Selection Error", "Please select a task to edit.")
             return
-        row, task = sel
-        new_desc, ok = QInputDialog.getText(self, "Edit Task", "Enter new description:", text=task["description"])
+        new_desc, ok = QInputDialog.getText(self, "Edit Task", "Enter new description:", text=sel["description"])
         if ok:
             new_desc = new_desc.strip()
             if not new_desc:
                 QMessageBox.warning(self, "Input Error", "Task description cannot be empty.")
                 return
-            task["description"] = new_desc
+            before = dict(sel)
+            sel["description"] = new_desc
+            self.history.updated(before, sel)
             local_store.save_tasks(self.tasks)
             self.refresh_table()
 
+    def edit_tags(self) -> None:
+        sel = self._selected_task()
+        if not sel:
+            QMessageBox.warning(self, "Selection Error", "Please select a task to tag.")
+            return
+        new_tags = _ask_tags(self, "Task Tags", sel.get("tags"))
+        if new_tags is None:
+            return
+        before = dict(sel)
+        _set_tags(sel, new_tags)
+        self.history.updated(before, sel)
+        local_store.save_tasks(self.tasks)
+        self.refresh_table()
+
+    def set_due(self) -> None:
+        """Set, change or clear the selected task's due date and recurrence."""
+        sel = self._selected_task()
+        if not sel:
+            QMessageBox.warning(self, "Selection Error", "Please select a task to set a due date for.")
+            return
+        due_text, ok = QInputDialog.getText(self, "Due Date", "Due (YYYY-MM-DD [HH:MM], blank to clear):",
+                                            text=reminders.format_due(sel).rstrip(" ↻"))
+        if not ok:
+            return
+        repeat = ""
+        if due_text.strip():
+            repeat, ok = QInputDialog.getItem(self, "Repeat", "Repeat:", ["none", *reminders.RECURRENCES],
+                                              editable=False)
+            if not ok:
+                return
+        try:
+            due_at = reminders.parse_due(due_text)
+            recurrence = reminders.parse_recurrence("" if repeat == "none" else repeat)
+        except ValueError as e:
+            QMessageBox.warning(self, "Input Error", str(e))
+            return
+        before = dict(sel)
+        sel.pop("due_at", None)
+        sel.pop("recurrence", None)
+        if due_at:
+            sel["due_at"] = due_at
+        if recurrence:
+            sel["recurrence"] = recurrence
+        self.history.updated(before, sel)
+        local_store.save_tasks(self.tasks)
+        self._reschedule(sel)
+        self.refresh_table()
+
     def delete_task(self) -> None:
         sel = self._selected_task()
         if not sel:
             QMessageBox.warning(self, "Selection Error", "Please select a task to delete.")
             return
-        row, task = sel
-        self.tasks.pop(row)
+        self.history.deleted(self.tasks, self.tasks.index(sel))
+        self.tasks.remove(sel)
         local_store.save_tasks(self.tasks)
+        self.reminders.cancel(sel["id"])
+        self._arm_reminders()
         self.refresh_table()
 
+    def undo(self) -> bool:
+        """Revert the latest change; False if there was nothing to undo."""
+        return self._history_step(self.history.undo)
+
+    def redo(self) -> bool:
+        return self._history_step(self.history.redo)
+
+    def _history_step(self, step) -> bool:
+        if not step(self.tasks):
+            return False
+        local_store.save_tasks(self.tasks)
+        self.reminders.load(self.tasks)
+        self._arm_reminders()
+        self.refresh_table()
+        return True
+
 
 class BudgetTab(QWidget):
     """Tab for managing budgets/expenses."""
 
+    changed = Signal()
+
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
+        local_store.archive_old_budgets()
         self.budgets = local_store.load_budgets()
+        self.history = local_store.load_budget_history()
+        self.limit_tracker = local_store.load_limit_tracker()
+        self.older_months = local_store.archived_budget_months()
+        self.archived: list[dict] = []
         self._build_ui()
         self.refresh_table()
+        self.chart.set_records(self.budgets)
 
     def _build_ui(self) -> None:
         layout = QVBoxLayout(self)
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["Item", "Amount", "Date"])
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
-        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table, self.model = _record_table(BUDGET_COLUMNS)
+        layout.addLayout(_filter_bar(self.model, "Filter expenses…"))
         layout.addWidget(self.table)
+        # Per-category totals of the rows matching the tag query.
+        self.category_label = QLabel()
+        self.category_label.setWordWrap(True)
+        layout.addWidget(self.category_label)
+        self.model.reordered.connect(self.update_categories)
+        # Current period of each limit in config.ini.
+        self.limits_label = QLabel()
+        self.limits_label.setWordWrap(True)
+        layout.addWidget(self.limits_label)
+        # Built once from all loaded expenses, then updated per add/delete.
+        self.chart = SpendChart()
+        layout.addWidget(self.chart)
 
         form_layout = QHBoxLayout()
         add_btn = QPushButton("Add Expense")
+        tags_btn = QPushButton("Tags…")
         del_btn = QPushButton("Delete")
         export_btn = QPushButton("Export")
+        self.older_btn = QPushButton("Load Older")
         form_layout.addWidget(add_btn)
+        form_layout.addWidget(tags_btn)
         form_layout.addWidget(del_btn)
         form_layout.addWidget(export_btn)
+        form_layout.addWidget(self.older_btn)
         layout.addLayout(form_layout)
 
         add_btn.clicked.connect(self.add_expense)
+        tags_btn.clicked.connect(self.edit_tags)
         del_btn.clicked.connect(self.delete_expense)
         export_btn.clicked.connect(self.export_expenses)
+        self.older_btn.clicked.connect(self.load_older)
 
+    @metrics.timed("qt.refresh_budgets")
     def refresh_table(self) -> None:
+        selected = self._selected_expense()
         self.budgets = local_store.load_budgets()
-        self.table.setRowCount(len(self.budgets))
-        for row, exp in enumerate(self.budgets):
-            item_item = QTableWidgetItem(exp["item"])
-            amt_item = QTableWidgetItem(f"${exp['amount']:.2f}")
-            date_item = QTableWidgetItem(exp["date"])
-            item_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            amt_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            date_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.table.setItem(row, 0, item_item)
-            self.table.setItem(row, 1, amt_item)
-            self.table.setItem(row, 2, date_item)
+        hot_ids = {b["id"] for b in self.budgets}
+        self.model.set_records(self.budgets, [b for b in self.archived if b["id"] not in hot_ids])
+        _select_id(self.table, self.model, selected["id"] if selected else None)
+        self.update_categories()
+        self.update_limits()
+        self.older_btn.setEnabled(bool(self.older_months))
+        self.changed.emit()
+
+    def update_categories(self) -> None:
+        """Show spend per category (tag), computed from the model's tag index."""
+        amounts = [b["amount"] for b in self.model.records]
+        totals = self.model.tag_index.totals(amounts, self.model.tag_mask())
+        self.category_label.setText(
+            "By category: " + "  ·  ".join(f"{tag} ${total:.2f}" for tag, total in totals.items())
+            if totals else "")
+
+    def update_limits(self) -> None:
+        """Show each limit's current period; limits at risk are marked."""
+        self.limits_label.setText("\n".join(("⚠ " if e["level"] != "ok" else "") + limits.format_entry(e)
+                                            for e in self.limit_tracker.status()))
+
+    def _alert(self, entries: list[dict]) -> None:
+        if entries:
+            QMessageBox.warning(self, "Budget Limit", "\n".join(limits.format_entry(e) for e in entries))
+
+    def load_older(self) -> None:
+        """Load the next archived month below the current rows."""
+        if not self.older_months:
+            return
+        month = self.older_months.pop(0)
+        self.archived.extend(local_store.load_archived_budgets(month))
+        self.refresh_table()
+        self.chart.set_records(self.model.records)
 
     def add_expense(self) -> None:
         item, ok_item = QInputDialog.getText(self, "Add Expense", "Item:")
@@ -226,31 +495,75 @@ class BudgetTab(QWidget):
         except ValueError:
             QMessageBox.warning(self, "Input Error", "Amount must be a valid number.")
             return
+        # Pre-fill the tags with the category the rules suggest.
+        suggested = categorize.default_categorizer().classify(item)
+        new_tags = _ask_tags(self, "Add Expense", [suggested] if suggested else None)
+        if new_tags is None:
+            return
         exp = {
-            "id": (self.budgets[-1]["id"] + 1) if self.budgets else 1,
+            "id": local_store.next_budget_id(self.budgets),
             "item": item.strip(),
             "amount": amount,
             "date": datetime.now().date().isoformat(),
         }
+        _set_tags(exp, new_tags)
         self.budgets.append(exp)
+        self.history.inserted(exp)
         local_store.save_budgets(self.budgets)
+        self.chart.add_expense(exp)
+        alerts = self.limit_tracker.add(exp)
         self.refresh_table()
+        self._alert(alerts)
 
-    def _selected_expense_row(self) -> int | None:
-        idxs = self.table.selectionModel().selectedRows()
-        if not idxs:
-            return None
-        return idxs[0].row()
+    def _selected_expense(self) -> dict | None:
+        return _selected_record(self.table, self.model)
+
+    def edit_tags(self) -> None:
+        exp = self._selected_expense()
+        if exp is None:
+            QMessageBox.warning(self, "Selection Error", "Please select an expense to tag.")
+            return
+        new_tags = _ask_tags(self, "Expense Tags", exp.get("tags"))
+        if new_tags is None:
+            return
+        before = dict(exp)
+        _set_tags(exp, new_tags)
+        self.history.updated(before, exp)
+        local_store.save_budgets(self.budgets)
+        # Re-count the expense under its new categories.
+        alerts = self.limit_tracker.replace(before, exp)
+        self.refresh_table()
+        self._alert(alerts)
 
     def delete_expense(self) -> None:
-        row = self._selected_expense_row()
-        if row is None:
+        exp = self._selected_expense()
+        if exp is None:
             QMessageBox.warning(self, "Selection Error", "Please select an expense to delete.")
             return
-        self.budgets.pop(row)
+        self.history.deleted(self.budgets, self.budgets.index(exp))
+        self.budgets.remove(exp)
         local_store.save_budgets(self.budgets)
+        self.chart.remove_expense(exp)
+        self.limit_tracker.remove(exp)
         self.refresh_table()
 
+    def undo(self) -> bool:
+        """Revert the latest change; False if there was nothing to undo."""
+        return self._history_step(self.history.undo)
+
+    def redo(self) -> bool:
+        return self._history_step(self.history.redo)
+
+    def _history_step(self, step) -> bool:
+        if not step(self.budgets):
+            return False
+        local_store.save_budgets(self.budgets)
+        # Rebuilt from the summary block just written; no full re-sum.
+        self.limit_tracker = local_store.load_limit_tracker()
+        self.refresh_table()
+        self.chart.set_records(self.model.records)
+        return True
+
     def export_expenses(self) -> None:
         if not self.budgets:
             QMessageBox.information(self, "Export", "No expenses to export.")
@@ -270,21 +583,216 @@ class WeatherTab(QWidget):
         layout.addWidget(msg)
 
 
+class MetricsPanel(QWidget):
+    """Debug tab showing live latencies and counters from :mod:`core.metrics`.
+
+    Only added when metrics are enabled (``TRIFLOW_METRICS=1``).
+    """
+
+    COLUMNS = ["Timer", "Calls", "Mean ms", "p50 ms", "p95 ms", "Max ms"]
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+        self.counters = QLabel()
+        layout.addWidget(self.counters)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self._reset)
+        layout.addWidget(reset_btn)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self) -> None:
+        if not self.isVisible():
+            return
+        data = metrics.snapshot()
+        timers = sorted(data["timers"].items())
+        self.table.setRowCount(len(timers))
+        for row, (name, t) in enumerate(timers):
+            values = [name, str(t["calls"]), f"{t['mean_ms']:.3f}", f"{t['p50_ms']:.3f}",
+                      f"{t['p95_ms']:.3f}", f"{t['max_ms']:.3f}"]
+            for col, text in enumerate(values):
+                self.table.setItem(row, col, QTableWidgetItem(text))
+        self.counters.setText("   ".join(f"{k}: {v:,}" for k, v in sorted(data["counters"].items())))
+
+    def _reset(self) -> None:
+        metrics.reset()
+        self.refresh()
+
+
+def _date_picker(value: QDate) -> QDateEdit:
+    picker = QDateEdit(value)
+    picker.setCalendarPopup(True)
+    picker.setDisplayFormat("yyyy-MM-dd")
+    picker.setMaximumDate(QDate.currentDate())
+    return picker
+
+
+class TimelineDialog(QDialog):
+    """Tasks or expenses as of a past date, or what changed between two dates."""
+
+    KINDS = {
+        "tasks": ("Tasks", TASK_COLUMNS, local_store.tasks_as_of, local_store.tasks_diff),
+        "budgets": ("Budget", BUDGET_COLUMNS, local_store.budgets_as_of, local_store.budgets_diff),
+    }
+
+    def __init__(self, kind: str = "tasks", parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Timeline")
+        self.resize(750, 450)
+        layout = QVBoxLayout(self)
+        bar = QHBoxLayout()
+        self.kind_box = QComboBox()
+        for name, (label, *_) in self.KINDS.items():
+            self.kind_box.addItem(label, name)
+        self.kind_box.setCurrentIndex(list(self.KINDS).index(kind))
+        self.kind_box.currentIndexChanged.connect(self._build_table)
+        bar.addWidget(self.kind_box)
+        bar.addWidget(QLabel("As of:"))
+        self.as_of = _date_picker(QDate.currentDate())
+        bar.addWidget(self.as_of)
+        self.compare = QCheckBox("Changes since:")
+        bar.addWidget(self.compare)
+        self.since = _date_picker(QDate.currentDate().addDays(-7))
+        self.since.setEnabled(False)
+        self.compare.toggled.connect(self.since.setEnabled)
+        bar.addWidget(self.since)
+        show_btn = QPushButton("Show")
+        show_btn.clicked.connect(self.refresh)
+        bar.addWidget(show_btn)
+        layout.addLayout(bar)
+        self.changes = QTableWidget(0, 4)
+        self.changes.setHorizontalHeaderLabels(["Change", "ID", "Record", "Details"])
+        self.changes.horizontalHeader().setStretchLastSection(True)
+        self.changes.verticalHeader().hide()
+        layout.addWidget(self.changes)
+        self.view = None
+        self._build_table()
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+
+    def _build_table(self) -> None:
+        """(Re)create the record table for the selected kind's columns."""
+        if self.view is not None:
+            self.view.deleteLater()
+        _, columns, *_ = self.KINDS[self.kind_box.currentData()]
+        self.view, self.model = _record_table(columns)
+        self.layout().insertWidget(1, self.view)
+        self.changes.hide()
+
+    def refresh(self) -> None:
+        _, _, as_of, diff = self.KINDS[self.kind_box.currentData()]
+        end = self.as_of.date().toPython()
+        try:
+            if self.compare.isChecked():
+                self._show_diff(diff(self.since.date().toPython(), end))
+            else:
+                records = as_of(end)
+                self.model.set_records(records)
+                self.changes.hide()
+                self.view.show()
+                self.summary.setText(f"{len(records)} records at the end of {end.isoformat()}.")
+        except ValueError as e:
+            QMessageBox.warning(self, "Timeline", str(e))
+
+    def _show_diff(self, result: dict) -> None:
+        rows = [(section.capitalize(), r, "") for section in ("added", "removed", "archived")
+                for r in result[section]]
+        rows += [("Changed", after, timeline.format_changes(before, after))
+                 for before, after in result["changed"]]
+        self.changes.setRowCount(len(rows))
+        for row, (change, record, details) in enumerate(rows):
+            label = record.get("description") or record.get("item", "")
+            for col, text in enumerate((change, str(record["id"]), label, details)):
+                self.changes.setItem(row, col, QTableWidgetItem(text))
+        self.changes.resizeColumnsToContents()
+        self.view.hide()
+        self.changes.show()
+        self.summary.setText(", ".join(f"{len(result[s])} {s}" for s in ("added", "removed", "archived", "changed")))
+
+
 class MainWindow(QMainWindow):
     """Main window hosting the tabbed interface."""
 
     def __init__(self) -> None:
         super().__init__()
-        self.setWindowTitle("TriFlow (PySide6)")
+        edit = self.menuBar().addMenu("&Edit")
+        undo_action = edit.addAction("Undo", lambda: self._history("undo"))
+        undo_action.setShortcut(QKeySequence.Undo)
+        redo_action = edit.addAction("Redo", lambda: self._history("redo"))
+        redo_action.setShortcuts([QKeySequence("Ctrl+Y"), QKeySequence("Ctrl+Shift+Z")])
+        view = self.menuBar().addMenu("&View")
+        view.addAction("Timeline...", self.show_timeline)
+        menu = self.menuBar().addMenu("&Profile")
+        menu.addAction("Switch Profile...", self.switch_profile)
+        menu.addAction("Lock", self.lock_profile)
+        self._build_tabs()
+
+    def _build_tabs(self) -> None:
+        """(Re)create the tabs over the active profile's data."""
+        profile = profiles.active()
+        self.setWindowTitle(f"TriFlow (PySide6) - {profile.name}" if profile else "TriFlow (PySide6)")
         tabs = QTabWidget()
-        tabs.addTab(TaskTab(), "Tasks")
-        tabs.addTab(BudgetTab(), "Budget")
+        task_tab = TaskTab()
+        budget_tab = BudgetTab()
+        tabs.addTab(task_tab, "Tasks")
+        tabs.addTab(budget_tab, "Budget")
         tabs.addTab(WeatherTab(), "Weather")
+        if metrics.enabled():
+            tabs.addTab(MetricsPanel(), "Debug")
+        # Replacing the central widget deletes the previous profile's tabs
+        # (and their reminder timers).
         self.setCentralWidget(tabs)
+        task_tab.changed.connect(self.update_status)
+        budget_tab.changed.connect(self.update_status)
+        self.update_status()
+
+    def _history(self, action: str) -> None:
+        """Undo or redo on the current tab, if it keeps a history."""
+        tab = self.centralWidget().currentWidget()
+        if hasattr(tab, action) and not getattr(tab, action)():
+            self.statusBar().showMessage(f"Nothing to {action}.", 2000)
+
+    def show_timeline(self) -> None:
+        """Open the timeline for the current tab's records."""
+        kind = "budgets" if isinstance(self.centralWidget().currentWidget(), BudgetTab) else "tasks"
+        TimelineDialog(kind, self).exec()
+
+    def switch_profile(self) -> None:
+        dialog = ProfileDialog(self)
+        if dialog.exec():
+            profiles.activate(dialog.profile)
+            self._build_tabs()
+
+    def lock_profile(self) -> None:
+        """Forget the active profile's key and fall back to guest data."""
+        if profiles.active() is not None:
+            profiles.lock(profiles.active())
+            self._build_tabs()
+
+    def update_status(self) -> None:
+        """Show task and spending totals from the stores' summary blocks."""
+        tasks = local_store.read_task_summary()
+        budgets = local_store.read_budget_summary()
+        self.statusBar().showMessage(
+            f"{tasks['completed']}/{tasks['count']} tasks completed  ·  "
+            f"Total spent: ${budgets['total_spent']:.2f}"
+        )
 
 
 def main() -> None:
     app = QApplication(sys.argv)
+    if profiles.list_profiles():
+        dialog = ProfileDialog()
+        if not dialog.exec():
+            return
+        profiles.activate(dialog.profile)
     win = MainWindow()
     win.resize(800, 600)
     win.show()
@@ -4,6 +4,10 @@ Core package for the PySide6 version of TriFlow.
 This package exposes common helpers for encryption, configuration,
 models, and other shared functionality.  Currently it only
 initialises the encryption utilities module.
+
+Everything else (``keyring``, ``storage``, ...) lives in the repository's
+top-level ``core`` package, which app.py puts first on ``sys.path``; the
+utilities here import what they need from it by name.
 """
 
 from . import utils  # noqa: F401  # re-export for convenience
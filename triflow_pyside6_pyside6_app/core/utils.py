@@ -3,53 +3,83 @@ Utility functions for encryption and decryption of task and budget data.
 
 This module mirrors the behaviour of the original ``core/utils.py`` from
 the Tkinter implementation.  It uses Fernet symmetric encryption to
-protect the JSON payloads saved to disk.  A unique encryption key is
-generated once and stored in ``key.key``.  Subsequent calls to
-``load_key`` will reuse the same key so that previously saved data can
-be decrypted.
+protect the JSON payloads saved to disk.  Keys live in a versioned key
+ring stored in ``key.key`` (see :mod:`core.keyring`): new data is
+encrypted with the newest key, while ``load_keyring`` returns a
+MultiFernet able to decrypt data written under any older key.  When a
+profile is unlocked (see :mod:`core.profiles`), its password-derived key
+is used instead of the ring.
+
+Payloads are compressed before encryption (see :mod:`core.compression`);
+the algorithm is recorded in a header so older uncompressed files still
+load.
 """
 
 import json
-import os
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
+
+from core import keyring, metrics, profiles, compression as _compression
 
 # Name of the file storing the encryption key
 KEY_FILE = "key.key"
+# Compression applied before encryption: "auto", "none", "zlib", "lzma" or "zstd"
+COMPRESSION = "auto"
 
 
+@metrics.timed("load_key")
 def load_key() -> bytes:
-    """Load an existing encryption key or generate a new one.
+    """Load the newest encryption key, generating a key ring if needed.
 
     If the key file does not exist, a new key is generated and
-    persisted.  The key is returned as bytes.
+    persisted.  The key is returned as bytes.  With an active profile,
+    the profile's derived key is returned instead.
+    """
+    profile = profiles.active()
+    if profile is not None:
+        return profile.key
+    return keyring.ensure_keys(KEY_FILE)[-1][1]
+
+
+@metrics.timed("load_keyring")
+def load_keyring() -> MultiFernet:
+    """Return a MultiFernet over every key in the ring.
+
+    It encrypts with the newest key and decrypts tokens produced by
+    any key still in the ring.  With an active profile, the profile's
+    cached key is returned without touching the key file.
     """
-    if not os.path.exists(KEY_FILE):
-        key = Fernet.generate_key()
-        with open(KEY_FILE, "wb") as f:
-            f.write(key)
+    profile = profiles.active()
+    if profile is not None:
+        return profile.keyring
+    return keyring.multifernet(keyring.ensure_keys(KEY_FILE))
+
+
+def _fernet(key: "bytes | Fernet | MultiFernet") -> "Fernet | MultiFernet":
+    if isinstance(key, (Fernet, MultiFernet)):
         return key
-    else:
-        with open(KEY_FILE, "rb") as f:
-            return f.read()
+    return Fernet(key)
 
 
-def encrypt_data(data: list[dict], key: bytes) -> bytes:
+@metrics.timed("encrypt_data")
+def encrypt_data(data: list[dict], key: "bytes | MultiFernet", compression: str | None = None) -> bytes:
     """Encrypt a Python list of dictionaries using Fernet.
 
-    The list is first JSON‑serialised before encryption.  The caller
-    must provide the key.
+    The list is first JSON‑serialised and compressed (``COMPRESSION``
+    unless *compression* is given) before encryption.  The caller
+    must provide the key (raw key bytes or a ``load_keyring`` result).
     """
-    f = Fernet(key)
-    payload = json.dumps(data).encode("utf-8")
+    f = _fernet(key)
+    payload = _compression.compress(json.dumps(data).encode("utf-8"), compression or COMPRESSION)
     return f.encrypt(payload)
 
 
-def decrypt_data(enc_data: bytes, key: bytes) -> list[dict]:
+@metrics.timed("decrypt_data")
+def decrypt_data(enc_data: bytes, key: "bytes | MultiFernet") -> list[dict]:
     """Decrypt an encrypted payload back into a list of dictionaries.
 
     If decryption fails or the payload does not decode to valid JSON,
     an exception will be raised.
     """
-    f = Fernet(key)
-    payload = f.decrypt(enc_data)
+    f = _fernet(key)
+    payload = _compression.decompress(f.decrypt(enc_data))
     return json.loads(payload.decode("utf-8"))
\ No newline at end of file
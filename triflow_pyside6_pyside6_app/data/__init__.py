@@ -11,6 +11,14 @@ from .local_store import (
     save_tasks,
     load_budgets,
     save_budgets,
+    read_task_summary,
+    read_budget_summary,
+    archive_old_tasks,
+    archive_old_budgets,
+    archived_task_months,
+    archived_budget_months,
+    load_archived_tasks,
+    load_archived_budgets,
     export_budgets,
 )
 
@@ -19,5 +27,13 @@ __all__ = [
     "save_tasks",
     "load_budgets",
     "save_budgets",
+    "read_task_summary",
+    "read_budget_summary",
+    "archive_old_tasks",
+    "archive_old_budgets",
+    "archived_task_months",
+    "archived_budget_months",
+    "load_archived_tasks",
+    "load_archived_budgets",
     "export_budgets",
 ]
\ No newline at end of file
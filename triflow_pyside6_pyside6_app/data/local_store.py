@@ -4,8 +4,9 @@ Local storage helpers for TriFlow (PySide6).
 This module persists tasks and budgets to encrypted files on disk.
 It uses Fernet symmetric encryption via the :mod:`core.utils` module
 to protect user data.  The file names are deliberately simple and
-live in the current working directory.  You can modify these paths
-to suit your environment.
+live in the current working directory, or in the active profile's
+directory when a profile is unlocked (see :mod:`core.profiles`).  You
+can modify these paths to suit your environment.
 
 Functions:
     load_tasks() -> list[dict]
@@ -20,6 +21,43 @@ Functions:
     save_budgets(budgets: list[dict]) -> None
         Save a list of budget dictionaries to disk, encrypting them.
 
+    read_task_summary() -> dict
+        Counters for all tasks (count, completed, max id, ...) read
+        from the summary blocks without decrypting the tasks.
+
+    read_budget_summary() -> dict
+        Counters for all expenses (count, total spent, date range,
+        ...) read from the summary blocks.
+
+    next_task_id(tasks) / next_budget_id(budgets) -> int
+        Id for a new record: past every saved id, archived ones
+        included, and every id in the (possibly unsaved) list.
+
+    archive_old_tasks() / archive_old_budgets() -> int
+        Move completed tasks / expenses older than the archive horizon
+        into monthly encrypted segments (see :mod:`core.archive`).
+
+    load_limit_tracker() -> LimitTracker
+        Running totals for the budget limits in config.ini, built from
+        summary blocks only (see :mod:`core.limits`).
+
+    load_task_history() / load_budget_history() -> UndoLog
+        Undo/redo log of each file, journaled next to it (see
+        :mod:`core.undo`).
+
+    archived_task_months() / archived_budget_months() -> list[str]
+        Archived months (``YYYY-MM``), newest first.
+
+    load_archived_tasks(month) / load_archived_budgets(month) -> list[dict]
+        Decrypt one archived month on demand.
+
+    tasks_as_of(when) / budgets_as_of(when) -> list[dict]
+        The records as they were at a past date or time, rebuilt from
+        the file's change log and checkpoints (see :mod:`core.timeline`).
+
+    tasks_diff(start, end) / budgets_diff(start, end) -> dict
+        Records added, removed, archived and changed between two dates.
+
     export_budgets(budgets: list[dict]) -> None
         Export budgets to a plain JSON file for the user.  This file
         is not encrypted and is intended for sharing or archiving.
@@ -31,37 +69,47 @@ import json
 from pathlib import Path
 from typing import List
 
-from core.utils import load_key, encrypt_data, decrypt_data
+from core import storage, archive, limits, profiles, timeline, undo
+from core.utils import load_keyring
 
 # Files used to store encrypted payloads
 TASKS_FILE = Path("tasks.enc")
 BUDGETS_FILE = Path("budgets.enc")
 
 
+def tasks_file() -> Path:
+    """Path of the tasks file, inside the active profile's directory if any."""
+    return Path(profiles.data_path(TASKS_FILE))
+
+
+def budgets_file() -> Path:
+    """Path of the budgets file, inside the active profile's directory if any."""
+    return Path(profiles.data_path(BUDGETS_FILE))
+
+
 def _read_encrypted(path: Path) -> List[dict]:
     """Read an encrypted JSON list from *path*.
 
-    If the file does not exist, returns an empty list.
+    If the file does not exist, returns an empty list.  Damaged segments
+    are recovered by :func:`core.storage.read_records` (intact segments
+    load, a copy of the damaged file is quarantined), so corruption never
+    turns into an empty list that the next save would write back.  A
+    wrong key still raises ``InvalidToken``.
     """
     if not path.exists():
         return []
-    key = load_key()
-    data = path.read_bytes()
-    try:
-        return decrypt_data(data, key)
-    except Exception:
-        # If decryption fails, return empty list rather than raising.
-        return []
+    key = load_keyring()
+    return storage.read_records(path, key)
 
 
-def _write_encrypted(path: Path, records: List[dict]) -> None:
+def _write_encrypted(path: Path, records: List[dict], kind: str) -> None:
     """Encrypt *records* and write them to *path*.
 
-    Creates parent directories as needed.
+    The file's summary block is refreshed for *kind* (``"tasks"`` or
+    ``"budgets"``).  Creates parent directories as needed.
     """
-    key = load_key()
-    enc = encrypt_data(records, key)
-    path.write_bytes(enc)
+    key = load_keyring()
+    storage.write_records(path, records, key, kind, timeline="save")
 
 
 def load_tasks() -> List[dict]:
@@ -71,12 +119,22 @@ def load_tasks() -> List[dict]:
     ``completed`` (bool), and ``created_at`` (ISO string).  If no
     tasks file exists, an empty list is returned.
     """
-    return _read_encrypted(TASKS_FILE)
+    return _read_encrypted(tasks_file())
 
 
 def save_tasks(tasks: List[dict]) -> None:
     """Save the list of tasks to disk, encrypting them."""
-    _write_encrypted(TASKS_FILE, tasks)
+    _write_encrypted(tasks_file(), tasks, "tasks")
+
+
+def read_task_summary() -> dict:
+    """Return the tasks summary (``count``, ``completed``, ``max_id``, ...).
+
+    Only the small summary blocks (hot file plus one per archived
+    month) are decrypted, so this is cheap enough to call from status
+    bars on every change.
+    """
+    return archive.combined_summary(tasks_file(), load_keyring(), "tasks")
 
 
 def load_budgets() -> List[dict]:
@@ -86,12 +144,95 @@ def load_budgets() -> List[dict]:
     and ``date`` (ISO string).  If no budgets file exists, an empty
     list is returned.
     """
-    return _read_encrypted(BUDGETS_FILE)
+    return _read_encrypted(budgets_file())
 
 
 def save_budgets(budgets: List[dict]) -> None:
     """Save the list of budgets/expenses to disk, encrypting them."""
-    _write_encrypted(BUDGETS_FILE, budgets)
+    _write_encrypted(budgets_file(), budgets, "budgets")
+
+
+def read_budget_summary() -> dict:
+    """Return the budgets summary (``count``, ``total_spent``, ...)."""
+    return archive.combined_summary(budgets_file(), load_keyring(), "budgets")
+
+
+def next_task_id(tasks: List[dict]) -> int:
+    """Id for a new task, never one an archived task already has."""
+    return archive.next_id(read_task_summary(), tasks)
+
+
+def next_budget_id(budgets: List[dict]) -> int:
+    """Id for a new expense, never one an archived expense already has."""
+    return archive.next_id(read_budget_summary(), budgets)
+
+
+def archive_old_tasks() -> int:
+    """Move completed tasks older than the archive horizon out of the tasks file.
+
+    Returns the number of tasks archived.
+    """
+    return archive.archive_records(tasks_file(), load_keyring(), "tasks")
+
+
+def archive_old_budgets() -> int:
+    """Move expenses older than the archive horizon out of the budgets file."""
+    return archive.archive_records(budgets_file(), load_keyring(), "budgets")
+
+
+def load_limit_tracker() -> limits.LimitTracker:
+    """Return the budget limit tracker, built without decrypting expenses."""
+    return limits.load_tracker(budgets_file(), load_keyring())
+
+
+def load_task_history() -> undo.UndoLog:
+    """Return the undo/redo log for the tasks file."""
+    return undo.UndoLog(undo.journal_path(tasks_file()), load_keyring())
+
+
+def load_budget_history() -> undo.UndoLog:
+    """Return the undo/redo log for the budgets file."""
+    return undo.UndoLog(undo.journal_path(budgets_file()), load_keyring())
+
+
+def archived_task_months() -> List[str]:
+    """Return the months with archived tasks, newest first."""
+    return archive.list_months(tasks_file())
+
+
+def archived_budget_months() -> List[str]:
+    """Return the months with archived expenses, newest first."""
+    return archive.list_months(budgets_file())
+
+
+def load_archived_tasks(month: str) -> List[dict]:
+    """Load the archived tasks for *month* (``YYYY-MM``)."""
+    return archive.load_month(tasks_file(), load_keyring(), month)
+
+
+def load_archived_budgets(month: str) -> List[dict]:
+    """Load the archived expenses for *month* (``YYYY-MM``)."""
+    return archive.load_month(budgets_file(), load_keyring(), month)
+
+
+def tasks_as_of(when) -> List[dict]:
+    """Return the tasks as they were at *when* (a date, datetime or ISO string)."""
+    return timeline.as_of(tasks_file(), load_keyring(), when)
+
+
+def budgets_as_of(when) -> List[dict]:
+    """Return the expenses as they were at *when*."""
+    return timeline.as_of(budgets_file(), load_keyring(), when)
+
+
+def tasks_diff(start, end) -> dict:
+    """Return the tasks added, removed, archived and changed between two moments."""
+    return timeline.diff(tasks_file(), load_keyring(), start, end)
+
+
+def budgets_diff(start, end) -> dict:
+    """Return the expenses added, removed, archived and changed between two moments."""
+    return timeline.diff(budgets_file(), load_keyring(), start, end)
 
 
 def export_budgets(budgets: List[dict]) -> None:
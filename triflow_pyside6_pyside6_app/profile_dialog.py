@@ -0,0 +1,82 @@
+"""
+Profile login dialog for the PySide6 app.
+
+Each profile keeps its own data files, encrypted with a key derived from
+its password (see :mod:`core.profiles`).  The dialog unlocks an existing
+profile, creates a new one, or continues as a guest on the shared
+``key.key`` data.  Derived keys are cached for the session, so switching
+back to a profile unlocked earlier does not repeat the key derivation.
+"""
+
+from __future__ import annotations
+
+from PySide6.QtWidgets import (
+    QComboBox,
+    QDialog,
+    QFormLayout,
+    QHBoxLayout,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
+)
+
+from core import profiles
+
+
+class ProfileDialog(QDialog):
+    """Pick and unlock a profile; on accept, :attr:`profile` holds the result (None for a guest)."""
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("TriFlow Login")
+        self.profile: profiles.Profile | None = None
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.name_box = QComboBox()
+        self.name_box.setEditable(True)
+        self.name_box.addItems(profiles.list_profiles())
+        if profiles.active() is not None:
+            self.name_box.setCurrentText(profiles.active().name)
+        form.addRow("Profile:", self.name_box)
+        self.password = QLineEdit()
+        self.password.setEchoMode(QLineEdit.Password)
+        self.password.returnPressed.connect(self.login)
+        form.addRow("Password:", self.password)
+        layout.addLayout(form)
+        buttons = QHBoxLayout()
+        for text, slot in (("Login", self.login), ("Create Profile", self.create),
+                           ("Continue as Guest", self.guest)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+        self.password.setFocus()
+
+    def _credentials(self) -> tuple[str, str]:
+        name, password = self.name_box.currentText().strip(), self.password.text()
+        self.password.clear()
+        return name, password
+
+    def login(self) -> None:
+        name, password = self._credentials()
+        try:
+            self.profile = profiles.unlock(name, password)
+        except ValueError as e:
+            QMessageBox.warning(self, "Login", str(e))
+            return
+        self.accept()
+
+    def create(self) -> None:
+        name, password = self._credentials()
+        try:
+            self.profile = profiles.create_profile(name, password)
+        except ValueError as e:
+            QMessageBox.warning(self, "Create Profile", str(e))
+            return
+        self.accept()
+
+    def guest(self) -> None:
+        self.profile = None
+        self.accept()
@@ -0,0 +1,256 @@
+"""
+Sortable, filterable table model for task and expense records.
+
+:class:`RecordTableModel` shows a list of record dicts through a
+permutation (``order``) of row positions instead of reordering the records
+themselves.  Sorting and filtering only compute a new permutation:
+
+  - Sort keys are computed once per record and column and cached until the
+    records are replaced, so repeated header clicks only re-sort.
+  - For tables of at least ``ASYNC_MIN_ROWS`` rows, keys, filters and sorts
+    run on a ``QThreadPool`` worker (see :mod:`core.ordering`).  The
+    finished permutation is swapped in with a single layout change, and
+    results made stale by a newer request are dropped.
+  - A tag query (see :mod:`core.tags`) narrows the rows through a bitmap
+    index built once per set_records(); the text filter then only scans
+    the matching rows.
+  - Persistent indexes (and therefore the view's selection) follow their
+    record across a swap, and callers select rows by record id via
+    :meth:`row_of_id` rather than by row index.
+
+Archived records are shown greyed out and cannot be selected.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, NamedTuple
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QRunnable,
+    QThreadPool,
+    Qt,
+    Signal,
+)
+from PySide6.QtGui import QColor
+
+from core import metrics, ordering, tags
+
+# Below this many rows sorting is fast enough to do on the GUI thread.
+ASYNC_MIN_ROWS = 20000
+
+
+class Column(NamedTuple):
+    """A table column: header, display text and sort key of a record."""
+
+    header: str
+    text: Callable[[dict, bool], str]
+    key: Callable[[dict], Any]
+
+
+class _OrderSignals(QObject):
+    # generation, sort column, permutation, sort keys used
+    finished = Signal(int, int, object, object)
+
+
+class _OrderJob(QRunnable):
+    """Compute a permutation off the GUI thread.
+
+    Works only on snapshots handed over by the model (the records list is
+    never mutated after set_records(), new data means new lists), so no
+    locking is needed.  The result is posted through *signals*, which lives
+    in the GUI thread.
+    """
+
+    def __init__(self, signals: _OrderSignals, generation: int, column: int,
+                 plan: Callable[[], tuple[list[int], Any]]) -> None:
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.column = column
+        self.plan = plan
+
+    def run(self) -> None:
+        with metrics.timer("qt.sort_worker"):
+            order, keys = self.plan()
+        self.signals.finished.emit(self.generation, self.column, order, keys)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Table model over hot and archived records, viewed through a permutation."""
+
+    # Emitted after a sort/filter result has been swapped in.
+    reordered = Signal()
+
+    def __init__(self, columns: list[Column], parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.columns = columns
+        self.records: list[dict] = []
+        self.archived_from = 0
+        self.order: list[int] = []
+        self._texts: list[tuple[str, ...]] = []
+        self._haystacks: list[str] = []
+        self._keys: dict[int, list] = {}
+        self._index_by_id: dict[int, int] = {}
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._filter = ""
+        self._tag_query = ""
+        self.tag_index = tags.TagIndex()
+        self._generation = 0
+        self._signals = _OrderSignals(self)
+        self._signals.finished.connect(self._order_ready)
+
+    # Data
+    def set_records(self, records: list[dict], archived: list[dict] = ()) -> None:
+        """Replace the rows: hot *records* followed by read-only *archived* ones.
+
+        The current sort and filter are re-applied; for large tables the
+        rows first appear in insertion order until the worker finishes.
+        """
+        self.beginResetModel()
+        self.records = list(records) + list(archived)
+        self.archived_from = len(records)
+        self._texts = [tuple(col.text(r, i >= self.archived_from) for col in self.columns)
+                       for i, r in enumerate(self.records)]
+        self._haystacks = [ordering.search_text(texts) for texts in self._texts]
+        self.tag_index = tags.TagIndex(self.records)
+        self._keys = {}
+        self._index_by_id = {r["id"]: i for i, r in enumerate(records)}
+        self._generation += 1
+        self.order = list(range(len(self.records)))
+        sync = self._can_order_now()
+        if sync:
+            self.order, keys = self._plan()()
+            self._remember_keys(self._sort_column, keys)
+        self.endResetModel()
+        if not sync:
+            self._reorder()
+
+    def record_at(self, row: int) -> dict | None:
+        """The hot record shown at *row*, or None for archived/invalid rows."""
+        if not 0 <= row < len(self.order):
+            return None
+        position = self.order[row]
+        return self.records[position] if position < self.archived_from else None
+
+    def row_of_id(self, record_id: int) -> int | None:
+        """Current row of the hot record with *record_id* (None if hidden)."""
+        position = self._index_by_id.get(record_id)
+        if position is None:
+            return None
+        try:
+            return self.order.index(position)
+        except ValueError:
+            return None
+
+    # Sorting and filtering
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        self._sort_column = column
+        self._sort_order = order
+        self._reorder()
+
+    def set_filter(self, text: str) -> None:
+        self._filter = text
+        self._reorder()
+
+    def set_tag_query(self, text: str) -> None:
+        """Show only rows matching a tag query; raises ValueError if it is malformed."""
+        self.tag_index.query(text)
+        self._tag_query = text
+        self._reorder()
+
+    def tag_mask(self) -> int:
+        """Bitset (over ``records`` positions) of rows matching the tag query."""
+        return self.tag_index.query(self._tag_query)
+
+    def _can_order_now(self) -> bool:
+        return len(self.records) < ASYNC_MIN_ROWS
+
+    def _plan(self) -> Callable[[], tuple[list[int], Any]]:
+        """Snapshot everything a reorder needs into a thread-safe closure."""
+        column, reverse, text = self._sort_column, self._sort_order == Qt.DescendingOrder, self._filter
+        records, haystacks = self.records, self._haystacks
+        cached = self._keys.get(column)
+        key_fn = self.columns[column].key if 0 <= column < len(self.columns) else None
+        mask = self.tag_mask() if self._tag_query.strip() else None
+
+        def plan() -> tuple[list[int], Any]:
+            keys = cached
+            if keys is None and key_fn is not None:
+                keys = ordering.sort_keys(records, key_fn)
+            rows = list(tags.iter_bits(mask)) if mask is not None else None
+            rows = ordering.filter_rows(haystacks, text, rows)
+            return ordering.compute_order(keys, rows if rows is not None else range(len(records)), reverse), keys
+
+        return plan
+
+    def _reorder(self) -> None:
+        self._generation += 1
+        column = self._sort_column
+        if self._can_order_now():
+            order, keys = self._plan()()
+            self._remember_keys(column, keys)
+            self._apply_order(order)
+            return
+        QThreadPool.globalInstance().start(_OrderJob(self._signals, self._generation, column, self._plan()))
+
+    def _order_ready(self, generation: int, column: int, order: list[int], keys: Any) -> None:
+        if generation != self._generation:
+            return  # superseded by a newer sort, filter or reload
+        self._remember_keys(column, keys)
+        self._apply_order(order)
+
+    def _remember_keys(self, column: int, keys: Any) -> None:
+        if keys is not None:
+            self._keys[column] = keys
+
+    def _apply_order(self, order: list[int]) -> None:
+        """Swap in *order*, moving persistent indexes with their records."""
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        new = []
+        for index in old:
+            row = index.row()
+            position = self.order[row] if 0 <= row < len(self.order) else None
+            try:
+                new.append(self.index(order.index(position), index.column()))
+            except ValueError:
+                new.append(QModelIndex())
+        self.order = order
+        self.changePersistentIndexList(old, new)
+        self.layoutChanged.emit()
+        self.reordered.emit()
+
+    # QAbstractTableModel interface
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.order)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.columns[section].header
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        position = self.order[index.row()]
+        if role == Qt.DisplayRole:
+            return self._texts[position][index.column()]
+        if role == Qt.ForegroundRole and position >= self.archived_from:
+            return QColor("gray")
+        if role == Qt.UserRole:
+            return self.records[position]["id"]
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if self.order[index.row()] >= self.archived_from:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
@@ -0,0 +1,123 @@
+"""
+Spending chart for the Budget tab, drawn with ``QPainter``.
+
+The chart is fed by a :class:`core.series.SpendSeries`, which holds spend
+already aggregated per day.  Before painting, the selected series
+(cumulative, or spend per day/week/month) is downsampled to about one
+point per horizontal pixel -- LTTB for the smooth cumulative line, min/max
+bucketing for per-period spend so spikes stay visible -- and the result is
+cached until the data, mode or width changes.  Adding or deleting an
+expense updates the series in place instead of rebuilding it.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PySide6.QtWidgets import QComboBox, QHBoxLayout, QLabel, QVBoxLayout, QWidget
+
+from core import metrics, series
+
+MODES = {
+    "Cumulative": None,
+    "Per day": "day",
+    "Per week": "week",
+    "Per month": "month",
+}
+MARGIN = 40
+
+
+class SpendPlot(QWidget):
+    """The plotting area: draws the current series as a downsampled line."""
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.series = series.SpendSeries()
+        self.period: str | None = None
+        self._cache_key: tuple | None = None
+        self._points: tuple[list, list] = ([], [])
+        self.setMinimumHeight(160)
+
+    def set_series(self, spend: series.SpendSeries) -> None:
+        self.series = spend
+        self._cache_key = None
+        self.update()
+
+    def set_period(self, period: str | None) -> None:
+        self.period = period
+        self.update()
+
+    def points(self) -> tuple[list, list]:
+        """The series for the current mode, downsampled to the plot width."""
+        width = max(1, self.width() - 2 * MARGIN)
+        key = (id(self.series), self.series.version, self.period, width)
+        if key != self._cache_key:
+            with metrics.timer("qt.chart_downsample"):
+                if self.period is None:
+                    xs, ys = self.series.cumulative()
+                    self._points = series.lttb(xs, ys, width)
+                else:
+                    xs, ys = self.series.per_period(self.period)
+                    self._points = series.min_max(xs, ys, width // 2)
+            self._cache_key = key
+        return self._points
+
+    def paintEvent(self, event) -> None:
+        with metrics.timer("qt.chart_paint"):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.fillRect(self.rect(), self.palette().base())
+            area = QRectF(MARGIN, 10, self.width() - 2 * MARGIN, self.height() - 10 - MARGIN)
+            xs, ys = self.points()
+            painter.setPen(QPen(self.palette().mid().color()))
+            painter.drawRect(area)
+            if not xs:
+                painter.drawText(area, Qt.AlignCenter, "No expenses yet")
+                return
+            x0, x1 = xs[0], max(xs[-1], xs[0] + 1)
+            top = max(max(ys), 0.01)
+            sx = area.width() / (x1 - x0)
+            sy = area.height() / top
+            polygon = QPolygonF([QPointF(area.left() + (x - x0) * sx, area.bottom() - max(y, 0.0) * sy)
+                                 for x, y in zip(xs, ys)])
+            painter.setPen(QPen(QColor("#2e7d32"), 1.5))
+            painter.drawPolyline(polygon)
+            painter.setPen(QPen(self.palette().text().color()))
+            painter.drawText(QRectF(area.left() + 4, area.top() + 2, 160, 20), Qt.AlignLeft, f"${top:,.2f}")
+            painter.drawText(QRectF(area.left(), area.bottom() + 4, 120, 20), Qt.AlignLeft,
+                             date.fromordinal(xs[0]).isoformat())
+            painter.drawText(QRectF(area.right() - 120, area.bottom() + 4, 120, 20), Qt.AlignRight,
+                             date.fromordinal(xs[-1]).isoformat())
+
+
+class SpendChart(QWidget):
+    """Mode selector plus :class:`SpendPlot`, kept in sync with the expense list."""
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("Spending:"))
+        self.mode = QComboBox()
+        self.mode.addItems(list(MODES))
+        self.mode.currentTextChanged.connect(lambda text: self.plot.set_period(MODES[text]))
+        bar.addWidget(self.mode)
+        bar.addStretch()
+        layout.addLayout(bar)
+        self.plot = SpendPlot()
+        layout.addWidget(self.plot)
+
+    def set_records(self, records: list[dict]) -> None:
+        """Rebuild the series from scratch (initial load, archived months added)."""
+        self.plot.set_series(series.SpendSeries(records))
+
+    def add_expense(self, record: dict) -> None:
+        self.plot.series.add(record)
+        self.plot.update()
+
+    def remove_expense(self, record: dict) -> None:
+        self.plot.series.remove(record)
+        self.plot.update()